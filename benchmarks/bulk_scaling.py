@@ -0,0 +1,73 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import os
+import time
+
+import synthetic
+
+from viesapi import BulkValidator
+
+# measures scaling of BulkValidator with number of worker processes on synthetic data
+
+BATCHES = 400
+NUMBERS = 200000
+
+
+def run(workers, responses, numbers):
+    """
+    Parse responses and normalize numbers using specified number of workers
+    :param workers: number of worker processes
+    :type workers: int
+    :return: tuple of parse and normalize throughput (items per second)
+    :rtype: tuple
+    """
+
+    with BulkValidator(workers) as bv:
+        # start workers before measuring
+        bv.normalize(numbers[:workers * bv.chunk_size])
+
+        t = time.perf_counter()
+        results = bv.parse_batch_results(responses)
+        parse = sum(len(r.numbers) + len(r.errors) for r in results) / (time.perf_counter() - t)
+
+        t = time.perf_counter()
+        bv.normalize(numbers)
+        normalize = len(numbers) / (time.perf_counter() - t)
+
+    return parse, normalize
+
+
+if __name__ == '__main__':
+    responses = [synthetic.batch_result(99, 1, i * 99) for i in range(BATCHES)]
+    numbers = ['%s %s' % synthetic.number(i) for i in range(NUMBERS)]
+
+    workers = 1
+    base = None
+
+    while workers <= (os.cpu_count() or 1):
+        parse, normalize = run(workers, responses, numbers)
+        base = base or parse
+
+        print('workers %2d   parse %9.0f numbers/s (x%.2f)   normalize %9.0f numbers/s'
+              % (workers, parse, parse / base, normalize))
+
+        workers *= 2
@@ -0,0 +1,186 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import sys
+
+# gevent must patch the standard library before anything else is imported
+if __name__ == '__main__' and '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import subprocess
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic
+
+from viesapi import VIESAPIClient, Error, HTTPTransport
+
+# checks that one client shared by many threads (or greenlets with --gevent) keeps error info
+# of each call separate and measures how throughput scales with number of workers, on free-threaded
+# python (PYTHON_GIL=0) parsing is expected to scale with threads too; the stub runs in separate process,
+# so throughput levels off once the client and the stub together saturate available CPU cores
+
+PORT = 8644
+
+# numbers of workers, the client keeps as many idle connections as the largest one needs, with
+# fewer (default 4) connections of the other workers are closed after each call and reopened
+WORKERS = (1, 2, 4, 8, 16, 32)
+
+# numbers and error codes each call must report
+CALLS = [
+    ('DK10000000', 0),
+    ('XX1', Error.CLI_EUVAT),
+    ('DK00000000', Error.VIES_UNAVAILABLE)
+]
+
+
+class Server(ThreadingHTTPServer):
+    """
+    Stub server with listen backlog large enough for all workers connecting at once
+    """
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Stub serving get_vies_data responses after configured delay
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+
+        if self.path.endswith('DK00000000'):
+            body = synthetic.error(Error.VIES_UNAVAILABLE, 'VIES service unavailable')
+        else:
+            body = synthetic.vies_data(1)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(delay):
+    """
+    Run stub server until killed
+    :param delay: seconds each response is delayed
+    :type delay: float
+    """
+
+    Handler.delay = delay
+    Server(('127.0.0.1', PORT), Handler).serve_forever()
+
+
+def run(client, workers, requests, use_gevent):
+    """
+    Run lookups from specified number of workers sharing one client
+    :param client: client object
+    :type client: VIESAPIClient
+    :param workers: number of threads or greenlets
+    :type workers: int
+    :param requests: number of lookups
+    :type requests: int
+    :param use_gevent: use gevent pool instead of threads
+    :type use_gevent: bool
+    :return: tuple of lookups per second and number of calls which reported wrong error code
+    :rtype: tuple
+    """
+
+    mismatches = []
+
+    def lookup(i):
+        number, expected = CALLS[i % len(CALLS)]
+        client.get_vies_data(number)
+
+        # another worker's call in between must not change error info seen by this one
+        time.sleep(0)
+
+        if client.get_last_error_code() != expected:
+            mismatches.append((number, client.get_last_error_code()))
+
+    t = time.perf_counter()
+
+    if use_gevent:
+        import gevent.pool
+        gevent.pool.Pool(workers).map(lookup, range(requests))
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(lookup, range(requests)))
+
+    return requests / (time.perf_counter() - t), len(mismatches)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--gevent', action='store_true', help='use gevent greenlets instead of threads')
+    p.add_argument('--requests', type=int, default=3000)
+    p.add_argument('--delay', type=float, default=0.005, help='stub response delay in seconds')
+    p.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.serve:
+        serve(args.delay)
+        sys.exit(0)
+
+    server = subprocess.Popen([sys.executable, __file__, '--serve', '--delay', str(args.delay)])
+
+    try:
+        time.sleep(1)
+
+        client = VIESAPIClient()
+        client.set_url('http://127.0.0.1:' + str(PORT))
+        client.set_transport(HTTPTransport(max_idle=max(WORKERS)))
+
+        gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+
+        print('%s, GIL %s, delay %.3f s' % ('gevent' if args.gevent else 'threads',
+                                           'enabled' if gil else 'disabled', args.delay))
+
+        base = None
+        failed = 0
+
+        for workers in WORKERS:
+            rate, mismatches = run(client, workers, args.requests, args.gevent)
+            base = base or rate
+            failed += mismatches
+
+            print('workers %2d   %7.0f lookups/s (x%.2f)   wrong error info %d'
+                  % (workers, rate, rate / base, mismatches))
+
+        print('OK' if failed == 0 else 'FAILED')
+    finally:
+        server.kill()
+
+    sys.exit(0 if failed == 0 else 1)
@@ -0,0 +1,120 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import synthetic
+
+from viesapi import VIESAPIClient, HTTPTransport, HTTP2Transport
+
+# compares throughput and number of opened connections of HTTP/1.1 keep-alive and HTTP/2 multiplexed
+# transports with growing number of concurrent threads, against local hypercorn server (requires
+# hypercorn and httpx[http2] installed)
+
+PORT = 8642
+DELAY = 0.02
+REQUESTS = 400
+
+connections = set()
+
+
+async def app(scope, receive, send):
+    """
+    ASGI application serving synthetic get_vies_data responses after fixed delay
+    """
+
+    if scope['type'] != 'http':
+        return
+
+    connections.add(tuple(scope['client']))
+    body = synthetic.vies_data(0)
+
+    await asyncio.sleep(DELAY)
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/xml'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def serve():
+    """
+    Start server in background thread
+    """
+
+    from hypercorn.config import Config
+    from hypercorn.asyncio import serve as hypercorn_serve
+
+    config = Config()
+    config.bind = ['127.0.0.1:' + str(PORT)]
+    config.loglevel = 'WARNING'
+
+    # custom shutdown trigger, signal handlers can not be installed outside main thread
+    trigger = asyncio.Event
+    threading.Thread(target=lambda: asyncio.run(hypercorn_serve(app, config, shutdown_trigger=lambda: trigger().wait())),
+                     daemon=True).start()
+    time.sleep(1)
+
+
+def run(transport, concurrency):
+    """
+    Send requests from specified number of threads sharing one transport
+    :param transport: transport object
+    :type transport: Transport
+    :param concurrency: number of threads
+    :type concurrency: int
+    :return: tuple of throughput (requests per second) and number of opened connections
+    :rtype: tuple
+    """
+
+    local = threading.local()
+
+    def lookup(i):
+        if not hasattr(local, 'client'):
+            local.client = VIESAPIClient()
+            local.client.set_url('http://127.0.0.1:' + str(PORT))
+            local.client.set_transport(transport)
+
+        if not local.client.get_vies_data('DK10000000'):
+            raise RuntimeError(local.client.get_last_error())
+
+    connections.clear()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        t = time.perf_counter()
+        list(executor.map(lookup, range(REQUESTS)))
+        elapsed = time.perf_counter() - t
+
+    transport.close()
+
+    return REQUESTS / elapsed, len(connections)
+
+
+if __name__ == '__main__':
+    serve()
+
+    for concurrency in (1, 4, 16, 64):
+        h1, h1_conns = run(HTTPTransport(max_idle=concurrency), concurrency)
+        h2, h2_conns = run(HTTP2Transport(max_connections=1, prior_knowledge=True), concurrency)
+
+        print('threads %3d   http/1.1 %7.0f req/s (%3d conns)   http/2 %7.0f req/s (%3d conns)'
+              % (concurrency, h1, h1_conns, h2, h2_conns))
@@ -0,0 +1,62 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import re
+import subprocess
+import sys
+
+# measures cumulative import time of the viesapi package using -X importtime
+
+CASES = [
+    ('import viesapi', 'import viesapi'),
+    ('validate EUVAT', 'import viesapi; viesapi.EUVAT.is_valid("PL7171642051")'),
+    ('construct client', 'import viesapi; viesapi.VIESAPIClient()'),
+    ('eager (all modules)', 'from viesapi import *; import lxml.etree, dateutil.parser, urllib.request')
+]
+
+RUNS = 10
+
+
+def measure(code):
+    """
+    Run code in a fresh interpreter and return cumulative import time of top level modules
+    :param code: python code to run
+    :type code: str
+    :return: time in microseconds
+    :rtype: int
+    """
+
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True)
+    total = 0
+
+    for line in res.stderr.splitlines():
+        m = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\S.*)$', line)
+
+        # top level imports are not indented
+        if m and not m.group(2).startswith(' '):
+            total += int(m.group(1))
+
+    return total
+
+
+for name, code in CASES:
+    times = sorted(measure(code) for _ in range(RUNS))
+    print('%-22s median %8.1f ms   min %8.1f ms' % (name, times[RUNS // 2] / 1000.0, times[0] / 1000.0))
@@ -0,0 +1,155 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic
+
+import viesapi.jsonresponseparser
+
+from viesapi import VIESAPIClient, ResponseParser, JSONResponseParser
+
+# compares decode and mapping cost of XML and JSON responses (json module and orjson if installed),
+# both directly and through the client against local stub serving both formats
+
+PORT = 8643
+RUNS = 200
+REQUESTS = 500
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Stub serving get_vies_data_parsed response in format requested by Accept header
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.headers.get('Accept', '').startswith(VIESAPIClient.FORMAT_JSON):
+            type, body = VIESAPIClient.FORMAT_JSON, synthetic.vies_data_json(1)
+        else:
+            type, body = VIESAPIClient.FORMAT_XML, synthetic.vies_data(1)
+
+        self.send_response(200)
+        self.send_header('Content-Type', type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def decode(parser, data):
+    """
+    Measure time of parsing and mapping batch result response
+    :param parser: parser class
+    :type parser: type
+    :param data: response body
+    :type data: bytes
+    :return: seconds per response
+    :rtype: float
+    """
+
+    parser.batch_result(parser.parse(data))
+
+    t = time.perf_counter()
+
+    for i in range(RUNS):
+        parser.batch_result(parser.parse(data))
+
+    return (time.perf_counter() - t) / RUNS
+
+
+def lookups(format):
+    """
+    Measure client lookups against local stub
+    :param format: response format
+    :type format: str
+    :return: tuple of requests per second and mean parse and map time in seconds
+    :rtype: tuple
+    """
+
+    client = VIESAPIClient()
+    client.set_url('http://127.0.0.1:' + str(PORT))
+    client.set_format(format)
+
+    decoding = 0
+    t = time.perf_counter()
+
+    for i in range(REQUESTS):
+        if not client.get_vies_data_parsed('DK10000000'):
+            raise RuntimeError(client.get_last_error())
+
+        timing = client.get_last_timing()
+        decoding += timing.parse + timing.map
+
+    elapsed = time.perf_counter() - t
+
+    return REQUESTS / elapsed, decoding / REQUESTS
+
+
+def decoders():
+    """
+    Get available JSON decoders
+    :return: list of (name, loads function) tuples
+    :rtype: list
+    """
+
+    out = [('json', json.loads)]
+
+    try:
+        import orjson
+        out.append(('orjson', orjson.loads))
+    except ImportError:
+        pass
+
+    return out
+
+
+if __name__ == '__main__':
+    xml = synthetic.batch_result(99, 1)
+    js = synthetic.batch_result_json(99, 1)
+
+    server = ThreadingHTTPServer(('127.0.0.1', PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base = decode(ResponseParser, xml)
+    rps, mean = lookups(VIESAPIClient.FORMAT_XML)
+
+    print('xml      batch decode %7.3f ms        lookups %6.0f req/s, parse+map %6.3f ms'
+          % (base * 1000, rps, mean * 1000))
+
+    for name, loads in decoders():
+        viesapi.jsonresponseparser.loads = loads
+
+        t = decode(JSONResponseParser, js)
+        rps, mean = lookups(VIESAPIClient.FORMAT_JSON)
+
+        print('%-8s batch decode %7.3f ms (x%.2f) lookups %6.0f req/s, parse+map %6.3f ms'
+              % (name, t * 1000, base / t, rps, mean * 1000))
+
+    server.shutdown()
@@ -0,0 +1,128 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import random
+import time
+
+from viesapi import TraderMatcher, VIESData, NameComponents, AddressComponents, LegalForm
+
+# compares TraderMatcher with scanning all counterparties for every lookup result
+
+COUNTERPARTIES = 100000
+LOOKUPS = 200
+
+WORDS = ['nord', 'sud', 'tech', 'bau', 'trans', 'logistik', 'handel', 'media', 'soft', 'agro', 'med', 'pol',
+         'euro', 'inter', 'system', 'serwis', 'projekt', 'energia', 'green', 'blue', 'alfa', 'beta', 'omega',
+         'delta', 'consult', 'trade', 'food', 'auto', 'metal', 'plast', 'wood', 'stal', 'elektro', 'gaz']
+FORMS = [('SP. Z O.O.', LegalForm.LIMITED_LIABILITY_COMPANY), ('GmbH', LegalForm.LIMITED_LIABILITY_COMPANY),
+         ('S.A.', LegalForm.JOINT_STOCK_COMPANY), ('sp.k.', LegalForm.LIMITED_PARTNERSHIP)]
+CITIES = ['Warszawa', 'Kraków', 'Berlin', 'München', 'Praha', 'Łódź', 'Wien', 'Gdańsk']
+
+
+def counterparty(rnd, i):
+    """
+    Get synthetic counterparty
+    :return: tuple of name, address and legal form id
+    :rtype: tuple
+    """
+
+    form = rnd.choice(FORMS)
+    name = ' '.join(rnd.choice(WORDS).capitalize() for _ in range(rnd.randint(1, 2))) + ' ' \
+        + ''.join(rnd.choice('abcdefghijklmnoprstuwz') for _ in range(5)).capitalize()
+    address = 'ul. ' + rnd.choice(WORDS).capitalize() + ' ' + str(rnd.randint(1, 200)) + ', ' \
+        + '%02d-%03d' % (rnd.randint(0, 99), rnd.randint(0, 999)) + ' ' + rnd.choice(CITIES)
+
+    return name + ' ' + form[0], name, address, form[1]
+
+
+def vies_data(name, form, address):
+    """
+    Get VIES data of counterparty as returned by get_vies_data_parsed
+    :rtype: VIESData
+    """
+
+    vies = VIESData()
+    vies.trader_name = name.upper()
+
+    nc = NameComponents()
+    nc.name = name.upper()
+    nc.legal_form_canonical_id = form
+    vies.trader_name_components = nc
+
+    street, city = address.split(', ')
+    ac = AddressComponents()
+    ac.country = 'PL'
+    ac.street = street[4:].rsplit(' ', 1)[0].upper()
+    ac.street_number = street.rsplit(' ', 1)[1]
+    ac.postal_code, ac.city = city.split(' ', 1)
+    ac.city = ac.city.upper()
+    vies.trader_address_components = ac
+
+    return vies
+
+
+def scan(rows, vies):
+    """
+    Find best counterparty comparing lowercased word sets with each of them
+    :return: index of best counterparty
+    :rtype: int
+    """
+
+    words = set(vies.trader_name.lower().split())
+    best, score = None, 0.0
+
+    for i, (full, _, _, _) in enumerate(rows):
+        other = set(full.lower().split())
+        s = len(words & other) / float(len(words | other))
+
+        if s > score:
+            best, score = i, s
+
+    return best
+
+
+if __name__ == '__main__':
+    rnd = random.Random(1)
+    rows = [counterparty(rnd, i) for i in range(COUNTERPARTIES)]
+
+    t = time.perf_counter()
+    matcher = TraderMatcher()
+
+    for i, (full, _, address, _) in enumerate(rows):
+        matcher.add(i, full, address)
+
+    print('index of %d counterparties built in %.2f s' % (len(matcher), time.perf_counter() - t))
+
+    picks = [rnd.randrange(COUNTERPARTIES) for _ in range(LOOKUPS)]
+    lookups = [vies_data(rows[i][1], rows[i][3], rows[i][2]) for i in picks]
+
+    t = time.perf_counter()
+    found = sum(1 for i, vies in zip(picks, lookups) if scan(rows, vies) == i)
+    elapsed = (time.perf_counter() - t) / LOOKUPS
+
+    print('scan      %8.3f ms per lookup, correct %d/%d' % (elapsed * 1000, found, LOOKUPS))
+
+    t = time.perf_counter()
+    results = list(matcher.match_all(lookups))
+    elapsed = (time.perf_counter() - t) / LOOKUPS
+    found = sum(1 for i, (vies, matches) in zip(picks, results) if matches and matches[0].key == i)
+
+    print('matcher   %8.3f ms per lookup, correct %d/%d' % (elapsed * 1000, found, LOOKUPS))
@@ -0,0 +1,103 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import time
+import tracemalloc
+
+from io import BytesIO
+
+import synthetic
+
+from lxml import etree
+from viesapi import ResponseParser
+
+# compares allocations and time of response parsing with previous implementation
+# (parse from BytesIO with default parser, xpath returning smart strings)
+
+RUNS = 200
+
+
+def legacy_parse(data):
+    """
+    Parse response the way the client did before
+    :param data: response body
+    :type data: bytes
+    :return: number of text values read
+    :rtype: int
+    """
+
+    doc = etree.parse(BytesIO(data))
+    return len(doc.xpath('/result/batch/numbers/vies/*/text()')) + len(doc.xpath('/result/error/code/text()'))
+
+
+def current_parse(data):
+    """
+    Parse response using ResponseParser
+    :param data: response body
+    :type data: bytes
+    :return: number of text values read
+    :rtype: int
+    """
+
+    doc = ResponseParser.parse(data)
+    return len(doc.xpath('/result/batch/numbers/vies/*/text()', smart_strings=False)) \
+        + len(doc.xpath('/result/error/code/text()', smart_strings=False))
+
+
+def measure(func, data):
+    """
+    Measure peak python allocations and time of parse function
+    :param func: parse function
+    :type func: callable
+    :param data: response body
+    :type data: bytes
+    :return: tuple of peak allocated bytes and seconds per run
+    :rtype: tuple
+    """
+
+    func(data)
+
+    tracemalloc.start()
+    peak = 0
+
+    for _ in range(RUNS):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func(data)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+
+    tracemalloc.stop()
+
+    t = time.perf_counter()
+
+    for _ in range(RUNS):
+        func(data)
+
+    return peak, (time.perf_counter() - t) / RUNS
+
+
+if __name__ == '__main__':
+    data = synthetic.batch_result(99, 0)
+
+    for name, func in (('legacy', legacy_parse), ('current', current_parse)):
+        peak, t = measure(func, data)
+
+        print('%-8s peak allocated %8d B   %7.1f us/parse' % (name, peak, t * 1e6))
@@ -0,0 +1,205 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic
+
+from viesapi import VIESAPIClient, HTTPTransport, RecordingTransport, ReplayTransport, ResultCache, Error, Instrumentation
+
+# records client traffic against local stub to cassette once, then replays it offline to measure
+# client side cost (parsing, mapping, caching, batching) without network and with reproducible responses;
+# without arguments cassette is recorded to temporary file, pass path to keep it or to replay existing one
+# without recording, e.g. one checked in for CI
+
+PORT = 8644
+NUMBERS = 200
+BATCH = 99
+RUNS = 5
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Stub serving lookup and batch responses
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if '/batch/vies/' in self.path:
+            body = synthetic.batch_result(BATCH, 1)
+        elif self.path.endswith('DK00000000'):
+            body = synthetic.error(Error.VIES_UNAVAILABLE, 'VIES service unavailable')
+        else:
+            body = synthetic.vies_data(int(re.sub('[^0-9]', '', self.path)) - 10000000)
+
+        self.send(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send(b'<?xml version="1.0" encoding="UTF-8"?>\n<result><batch><token>'
+                  b'0e2a7c2b-4d0e-4c50-9f8e-8f0b8e6f1a11</token></batch></result>')
+
+    def send(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def numbers(count):
+    """
+    Get synthetic EU VAT numbers
+    :param count: number of numbers
+    :type count: int
+    :return: list of numbers
+    :rtype: list
+    """
+
+    return [''.join(synthetic.number(i)) for i in range(count)]
+
+
+def workload(client):
+    """
+    Run the same sequence of requests against any transport
+    :param client: client object
+    :type client: VIESAPIClient
+    :return: number of requests sent
+    :rtype: int
+    """
+
+    for euvat in numbers(NUMBERS) + ['DK00000000']:
+        client.get_vies_data(euvat)
+
+    token = client.get_vies_data_async(numbers(BATCH))
+
+    if not token or not client.get_vies_data_async_result(token):
+        raise RuntimeError(client.get_last_error())
+
+    return NUMBERS + 3
+
+
+def record(path):
+    """
+    Record workload against local stub
+    :param path: cassette file path
+    :type path: str
+    """
+
+    server = ThreadingHTTPServer(('127.0.0.1', PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    transport = RecordingTransport(HTTPTransport(), path)
+
+    client = VIESAPIClient()
+    client.set_url('http://127.0.0.1:' + str(PORT))
+    client.set_transport(transport)
+
+    workload(client)
+
+    transport.close()
+    server.shutdown()
+
+
+def replay(path, cache):
+    """
+    Replay workload from cassette
+    :param path: cassette file path
+    :type path: str
+    :param cache: use result cache and run workload twice
+    :type cache: bool
+    :return: tuple of requests per second and mean parse and map time in seconds
+    :rtype: tuple
+    """
+
+    best, decoding = 0, 0
+
+    for i in range(RUNS):
+        client = VIESAPIClient()
+        client.set_url('http://127.0.0.1:' + str(PORT))
+        client.set_transport(ReplayTransport(path))
+
+        if cache:
+            client.set_cache(ResultCache())
+            workload(client)
+
+        parsed = []
+        client.set_instrumentation(Timings(parsed))
+
+        t = time.perf_counter()
+        count = workload(client)
+        rps = count / (time.perf_counter() - t)
+
+        if rps > best:
+            best = rps
+            decoding = sum(parsed) / len(parsed) if parsed else 0
+
+    return best, decoding
+
+
+class Timings(Instrumentation):
+    """
+    Instrumentation collecting parse and map time of completed requests
+    """
+
+    def __init__(self, out):
+        self.out = out
+
+    def on_request_end(self, timing):
+        self.out.append(timing.parse + timing.map)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        tmp = None
+    else:
+        # cassette is recorded for this run only, nothing is left in current directory
+        tmp = tempfile.mkdtemp(prefix='viesapi-replay-')
+        path = os.path.join(tmp, 'replay.jsonl')
+
+    try:
+        if not os.path.exists(path):
+            t = time.perf_counter()
+            record(path)
+            print('recorded %d requests to %s in %.2f s' % (NUMBERS + 3, path, time.perf_counter() - t))
+
+        rps, mean = replay(path, False)
+        print('replay         %7.0f req/s, parse+map %6.3f ms' % (rps, mean * 1000))
+
+        rps, mean = replay(path, True)
+        print('replay cached  %7.0f req/s, parse+map %6.3f ms' % (rps, mean * 1000))
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
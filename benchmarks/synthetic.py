@@ -0,0 +1,207 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import json
+
+# synthetic VIES API responses used by benchmarks
+
+VIES = '<vies>' \
+    '<uid>{uid}</uid>' \
+    '<countryCode>{cc}</countryCode>' \
+    '<vatNumber>{num}</vatNumber>' \
+    '<valid>true</valid>' \
+    '<traderName>TRADER {i} SP. Z O.O.</traderName>' \
+    '<traderNameComponents>' \
+    '<name>TRADER {i}</name>' \
+    '<legalForm>SP. Z O.O.</legalForm>' \
+    '<legalFormCanonicalId>2</legalFormCanonicalId>' \
+    '<legalFormCanonicalName>LIMITED LIABILITY COMPANY</legalFormCanonicalName>' \
+    '</traderNameComponents>' \
+    '<traderCompanyType>---</traderCompanyType>' \
+    '<traderAddress>UL. PROSTA {i}, 00-838 WARSZAWA</traderAddress>' \
+    '<traderAddressComponents>' \
+    '<country>PL</country>' \
+    '<postalCode>00-838</postalCode>' \
+    '<city>WARSZAWA</city>' \
+    '<street>PROSTA</street>' \
+    '<streetNumber>{i}</streetNumber>' \
+    '<houseNumber></houseNumber>' \
+    '</traderAddressComponents>' \
+    '<id>{uid}</id>' \
+    '<date>2025-01-02+01:00</date>' \
+    '<source>http://ec.europa.eu</source>' \
+    '</vies>'
+
+ERROR = '<error>' \
+    '<uid>{uid}</uid>' \
+    '<countryCode>{cc}</countryCode>' \
+    '<vatNumber>{num}</vatNumber>' \
+    '<error>MS_UNAVAILABLE</error>' \
+    '<date>2025-01-02Z</date>' \
+    '<source>http://ec.europa.eu</source>' \
+    '</error>'
+
+ACCOUNT = '<?xml version="1.0" encoding="UTF-8"?>\n<result><account>' \
+    '<uid>a1b2c3</uid><type>Company</type><validTo>2030-01-01T00:00:00+01:00</validTo>' \
+    '<billingPlan><name>Business</name><subscriptionPrice>99.0</subscriptionPrice><itemPrice>0.1</itemPrice>' \
+    '<itemPriceCheckStatus>0.1</itemPriceCheckStatus><itemPriceStatusParsed>0.2</itemPriceStatusParsed>' \
+    '<limit>{limit}</limit><requestDelay>0</requestDelay><domainLimit>1</domainLimit>' \
+    '<overplanAllowed>false</overplanAllowed><excelAddin>true</excelAddin><app>true</app><cli>true</cli>' \
+    '<stats>true</stats><monitor>true</monitor><funcGetVIESData>true</funcGetVIESData>' \
+    '<funcGetVIESDataParsed>true</funcGetVIESDataParsed></billingPlan>' \
+    '<requests><viesData>{total}</viesData><viesDataParsed>0</viesDataParsed><total>{total}</total></requests>' \
+    '</account></result>'
+
+
+def number(i):
+    """
+    Get valid synthetic EU VAT number
+    :param i: sequence number
+    :type i: int
+    :return: tuple of country code and number
+    :rtype: tuple
+    """
+
+    return 'DK', '%08d' % (10000000 + i)
+
+
+def vies_data(i=0):
+    """
+    Get synthetic get_vies_data_parsed response
+    :param i: sequence number
+    :type i: int
+    :return: response body
+    :rtype: bytes
+    """
+
+    cc, num = number(i)
+
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<result>'
+            + VIES.format(uid='%032x' % i, cc=cc, num=num, i=i)
+            + '</result>').encode()
+
+
+def batch_result(size=99, errors=1, offset=0):
+    """
+    Get synthetic get_vies_data_async_result response
+    :param size: number of numbers in batch
+    :type size: int
+    :param errors: number of failed numbers
+    :type errors: int
+    :param offset: sequence number of first number
+    :type offset: int
+    :return: response body
+    :rtype: bytes
+    """
+
+    ok = size - errors
+
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<result><batch><numbers>'
+            + ''.join(VIES.format(uid='%032x' % i, cc=number(i)[0], num=number(i)[1], i=i)
+                      for i in range(offset, offset + ok))
+            + '</numbers><errors>'
+            + ''.join(ERROR.format(uid='%032x' % i, cc=number(i)[0], num=number(i)[1])
+                      for i in range(offset + ok, offset + size))
+            + '</errors></batch></result>').encode()
+
+
+def account_status(limit=1000000, total=0):
+    """
+    Get synthetic get_account_status response
+    :param limit: plan limit
+    :type limit: int
+    :param total: number of used requests
+    :type total: int
+    :return: response body
+    :rtype: bytes
+    """
+
+    return ACCOUNT.format(limit=limit, total=total).encode()
+
+
+def error(code, description):
+    """
+    Get synthetic error response
+    :param code: error code
+    :type code: int
+    :param description: error description
+    :type description: str
+    :return: response body
+    :rtype: bytes
+    """
+
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<result><error><code>' + str(code) + '</code>'
+            + '<description>' + description + '</description></error></result>').encode()
+
+
+def vies_object(i):
+    """
+    Get synthetic vies object of JSON response
+    :param i: sequence number
+    :type i: int
+    :return: vies object
+    :rtype: dict
+    """
+
+    cc, num = number(i)
+
+    return {'uid': '%032x' % i, 'countryCode': cc, 'vatNumber': num, 'valid': True,
+            'traderName': 'TRADER %d SP. Z O.O.' % i,
+            'traderNameComponents': {'name': 'TRADER %d' % i, 'legalForm': 'SP. Z O.O.', 'legalFormCanonicalId': 2,
+                                     'legalFormCanonicalName': 'LIMITED LIABILITY COMPANY'},
+            'traderCompanyType': '---', 'traderAddress': 'UL. PROSTA %d, 00-838 WARSZAWA' % i,
+            'traderAddressComponents': {'country': 'PL', 'postalCode': '00-838', 'city': 'WARSZAWA',
+                                        'street': 'PROSTA', 'streetNumber': str(i), 'houseNumber': ''},
+            'id': '%032x' % i, 'date': '2025-01-02+01:00', 'source': 'http://ec.europa.eu'}
+
+
+def vies_data_json(i=0):
+    """
+    Get synthetic get_vies_data_parsed response in JSON format
+    :param i: sequence number
+    :type i: int
+    :return: response body
+    :rtype: bytes
+    """
+
+    return json.dumps({'result': {'vies': vies_object(i)}}).encode()
+
+
+def batch_result_json(size=99, errors=1, offset=0):
+    """
+    Get synthetic get_vies_data_async_result response in JSON format
+    :param size: number of numbers in batch
+    :type size: int
+    :param errors: number of failed numbers
+    :type errors: int
+    :param offset: sequence number of first number
+    :type offset: int
+    :return: response body
+    :rtype: bytes
+    """
+
+    ok = size - errors
+
+    return json.dumps({'result': {'batch': {
+        'numbers': [vies_object(i) for i in range(offset, offset + ok)],
+        'errors': [{'uid': '%032x' % i, 'countryCode': number(i)[0], 'vatNumber': number(i)[1],
+                    'error': 'MS_UNAVAILABLE', 'date': '2025-01-02Z', 'source': 'http://ec.europa.eu'}
+                   for i in range(offset + ok, offset + size)]}}}).encode()
@@ -19,8 +19,6 @@
 # @copyright 2022-2025 NETCAT (www.netcat.pl)
 # @license https://www.apache.org/licenses/LICENSE-2.0
 #
-from time import sleep
-
 from viesapi import *
 
 # Create client object and establish connection to the production system
@@ -71,18 +69,14 @@ if token:
 else:
     print('Error: ' + viesapi.get_last_error() + ' (code: ' + str(viesapi.get_last_error_code()) + ')')
 
-# Check batch result and download data (at production it usually takes 2-3 min for result to be ready)
-while True:
-    result = viesapi.get_vies_data_async_result(token)
-    if result:
-        break
-
-    if viesapi.get_last_error_code() != Error.BATCH_PROCESSING:
-        print('Error: ' + viesapi.get_last_error() + ' (code: ' + str(viesapi.get_last_error_code()) + ')')
-        break
+# Check batch result and download data (at production it usually takes 2-3 min for result to be ready),
+# poller checks batch status at intervals adapted to batch size
+poller = BatchPoller(viesapi)
 
-    print('Batch is still processing, waiting...')
-    sleep(10)
+result = poller.wait(token, len(numbers))
 
-# Batch result is ready
-print(result)
+if result:
+    # Batch result is ready
+    print(result)
+else:
+    print('Error: ' + viesapi.get_last_error() + ' (code: ' + str(viesapi.get_last_error_code()) + ')')
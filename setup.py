@@ -31,4 +31,5 @@ setup(name='viesapi',
       license='https://www.apache.org/licenses/LICENSE-2.0',
       packages=['viesapi'],
       zip_safe=False,
-      install_requires=['lxml', 'python-dateutil'])
+      install_requires=['lxml', 'python-dateutil'],
+      extras_require={'http2': ['httpx[http2]'], 'json': ['orjson']})
@@ -0,0 +1,192 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from viesapi import VIESAPIClient, Error, HTTPTransport
+
+WORKERS = 16
+REQUESTS = 480
+
+# numbers and error codes each call must report
+CALLS = [
+    ('DK10000000', 0),
+    ('XX1', Error.CLI_EUVAT),
+    ('DK00000000', Error.VIES_UNAVAILABLE)
+]
+
+VIES = b'<?xml version="1.0" encoding="UTF-8"?>\n<result><vies>' \
+    b'<uid>a1b2c3</uid><countryCode>DK</countryCode><vatNumber>10000000</vatNumber><valid>true</valid>' \
+    b'<traderName>TRADER</traderName><traderCompanyType>---</traderCompanyType>' \
+    b'<traderAddress>PROSTA 1, WARSZAWA</traderAddress><id>a1b2c3</id>' \
+    b'<date>2025-01-02+01:00</date><source>http://ec.europa.eu</source></vies></result>'
+
+ERROR = b'<?xml version="1.0" encoding="UTF-8"?>\n<result><error><code>' \
+    + str(Error.VIES_UNAVAILABLE).encode() + b'</code><description>VIES service unavailable</description>' \
+    b'</error></result>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Stub serving get_vies_data responses after short delay, so calls of workers overlap
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(0.002)
+
+        body = ERROR if self.path.endswith('DK00000000') else VIES
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    """
+    Stub server with listen backlog large enough for all workers connecting at once
+    """
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def lookup(client, i):
+    """
+    Run one lookup and collect error info seen by the calling worker
+    :param client: client shared by all workers
+    :type client: VIESAPIClient
+    :param i: sequence number of lookup
+    :type i: int
+    :return: tuple of number, expected error code, reported error code and url of last request
+    :rtype: tuple
+    """
+
+    number, expected = CALLS[i % len(CALLS)]
+    client.get_vies_data(number)
+
+    # another worker's call in between must not change error info seen by this one
+    time.sleep(0)
+
+    timing = client.get_last_timing()
+
+    return number, expected, client.get_last_error_code(), timing.url if timing else None
+
+
+# run under gevent in separate interpreter, patching must happen before anything else is imported
+GEVENT = '''
+from gevent import monkey
+monkey.patch_all()
+
+import sys
+import threading
+
+import gevent.pool
+
+from test_concurrency import Server, Handler, lookup, client, REQUESTS, WORKERS
+
+server = Server(('127.0.0.1', 0), Handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+c = client(server.server_address[1])
+wrong = [r for r in gevent.pool.Pool(WORKERS).map(lambda i: lookup(c, i), range(REQUESTS)) if r[1] != r[2]]
+
+print(len(wrong))
+'''
+
+
+def client(port):
+    """
+    Create client shared by all workers
+    :param port: stub server port
+    :type port: int
+    :return: client object
+    :rtype: VIESAPIClient
+    """
+
+    c = VIESAPIClient()
+    c.set_url('http://127.0.0.1:' + str(port))
+    c.set_transport(HTTPTransport(max_idle=WORKERS))
+
+    return c
+
+
+class ConcurrencyTest(unittest.TestCase):
+    """
+    One client shared by many threads or greenlets must keep error info of each call separate
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def run_threads(self):
+        c = client(self.server.server_address[1])
+
+        with ThreadPoolExecutor(WORKERS) as executor:
+            return list(executor.map(lambda i: lookup(c, i), range(REQUESTS)))
+
+    def test_threads_error_code(self):
+        results = self.run_threads()
+
+        self.assertEqual([r for r in results if r[1] != r[2]], [])
+
+    def test_threads_last_timing(self):
+        results = self.run_threads()
+
+        # numbers failing validation are not sent, last timing is then the one of previous call
+        self.assertEqual([r for r in results if r[1] != Error.CLI_EUVAT and not r[3].endswith(r[0])], [])
+
+    @unittest.skipUnless(importlib.util.find_spec('gevent'), 'gevent not installed')
+    def test_gevent_error_code(self):
+        tests = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([tests, os.path.dirname(tests)]))
+
+        out = subprocess.run([sys.executable, '-c', GEVENT], env=env, capture_output=True, text=True, timeout=120)
+
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertEqual(out.stdout.strip(), '0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,17 +20,81 @@
 # @license https://www.apache.org/licenses/LICENSE-2.0
 #
 
-from viesapi.error import *
-from viesapi.number import *
-from viesapi.legalform import *
-from viesapi.namecomponents import *
-from viesapi.addresscomponents import *
-from viesapi.viesdata import *
-from viesapi.vieserror import *
-from viesapi.batchresult import *
-from viesapi.accountstatus import *
-from viesapi.nip import *
-from viesapi.euvat import *
-from viesapi.viesapiclient import *
+import importlib
 
 __version__ = '1.2.9'
+
+# public names mapped to modules they are defined in, modules are imported on first access
+__lazy__ = {
+    'Error': 'viesapi.error',
+    'Number': 'viesapi.number',
+    'LegalForm': 'viesapi.legalform',
+    'NameComponents': 'viesapi.namecomponents',
+    'AddressComponents': 'viesapi.addresscomponents',
+    'VIESData': 'viesapi.viesdata',
+    'VIESError': 'viesapi.vieserror',
+    'BatchRequest': 'viesapi.batchrequest',
+    'BatchResult': 'viesapi.batchresult',
+    'AccountStatus': 'viesapi.accountstatus',
+    'NIP': 'viesapi.nip',
+    'EUVAT': 'viesapi.euvat',
+    'VIESAPIClient': 'viesapi.viesapiclient',
+    'ResponseParser': 'viesapi.responseparser',
+    'JSONResponseParser': 'viesapi.jsonresponseparser',
+    'BulkValidator': 'viesapi.bulkvalidator',
+    'ResultCache': 'viesapi.resultcache',
+    'NegativeCache': 'viesapi.negativecache',
+    'BloomFilter': 'viesapi.bloomfilter',
+    'BatchPoller': 'viesapi.batchpoller',
+    'LatencyTracker': 'viesapi.hedging',
+    'HedgedClient': 'viesapi.hedging',
+    'RequestScheduler': 'viesapi.requestscheduler',
+    'VerificationStore': 'viesapi.reverification',
+    'VerificationChange': 'viesapi.reverification',
+    'ReverificationScheduler': 'viesapi.reverification',
+    'QuotaTracker': 'viesapi.quotatracker',
+    'TraderMatcher': 'viesapi.tradermatcher',
+    'TraderMatch': 'viesapi.tradermatcher',
+    'VIESAPIClientPool': 'viesapi.clientpool',
+    'PoolMember': 'viesapi.clientpool',
+    'ResultSink': 'viesapi.resultsink',
+    'CSVSink': 'viesapi.resultsink',
+    'JSONLSink': 'viesapi.resultsink',
+    'SQLiteSink': 'viesapi.resultsink',
+    'CallbackSink': 'viesapi.resultsink',
+    'BufferedSink': 'viesapi.resultsink',
+    'Transport': 'viesapi.transport',
+    'HTTPTransport': 'viesapi.transport',
+    'HTTP2Transport': 'viesapi.transport',
+    'RecordingTransport': 'viesapi.transport',
+    'ReplayTransport': 'viesapi.transport',
+    'Instrumentation': 'viesapi.instrumentation',
+    'RequestTiming': 'viesapi.instrumentation',
+    'Histogram': 'viesapi.instrumentation',
+    'HistogramCollector': 'viesapi.instrumentation'
+}
+
+__all__ = list(__lazy__)
+
+
+def __getattr__(name):
+    """
+    Import module containing requested public name on first access (PEP 562)
+    :param name: attribute name
+    :type name: str
+    :return: attribute value
+    """
+
+    module = __lazy__.get(name)
+
+    if not module:
+        raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,441 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from viesapi import Error, BatchRequest, BatchResult, VIESError
+
+
+class PendingBatch:
+    """
+    Batch waiting for its result
+    """
+
+    def __init__(self, token, size, submitted):
+        self.token = token
+        self.size = size
+        self.submitted = submitted
+        self.next_poll = submitted
+        self.interval = 0.0
+        self.polls = 0
+        self.numbers = None
+        self.request = None
+        self.result = BatchResult()
+        self.seen = set()
+
+    def __str__(self):
+        return 'PendingBatch: [token = ' + str(self.token) \
+            + ', size = ' + str(self.size) \
+            + ', submitted = ' + str(self.submitted) \
+            + ', polls = ' + str(self.polls) \
+            + ']'
+
+
+class BatchPoller:
+    """
+    Waits for results of uploaded batches, polling each one when it is expected to be
+    complete based on its size and observed processing time per number
+    """
+
+    def __init__(self, client, min_interval=1.0, max_interval=30.0, per_number=0.5, smoothing=0.3,
+                 on_partial=None, straggler_after=None, concurrency=8):
+        """
+        Construct new poller
+        :param client: client object
+        :type client: VIESAPIClient
+        :param min_interval: min seconds between polls of a batch
+        :type min_interval: float
+        :param max_interval: max seconds between polls of a batch
+        :type max_interval: float
+        :param per_number: initial estimate of processing seconds per number
+        :type per_number: float
+        :param smoothing: weight of newest observation in per number estimate
+        :type smoothing: float
+        :param on_partial: function called with token and BatchResult containing numbers of still processing
+            batch which were not reported before, enables partial results
+        :type on_partial: callable
+        :param straggler_after: seconds after which numbers of still processing batch which have no result yet
+            are checked one by one using get_vies_data, requires partial results and batch uploaded by submit
+        :type straggler_after: float
+        :param concurrency: max number of batches polled at once, callbacks may be called from polling threads
+        :type concurrency: int
+        """
+
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.per_number = per_number
+        self.smoothing = smoothing
+        self.on_partial = on_partial
+        self.straggler_after = straggler_after
+        self.concurrency = concurrency
+
+        self.__pending__ = {}
+        self.__lock__ = threading.Lock()
+
+    def __len__(self):
+        return len(self.__pending__)
+
+    def submit(self, numbers):
+        """
+        Upload batch of numbers and start tracking it
+        :param numbers: Array of EU VAT numbers with 2-letter country prefix or prepared batch request
+        :type numbers: list or BatchRequest
+        :return: Batch token or False
+        :rtype: str or False
+        """
+
+        batch = numbers if isinstance(numbers, BatchRequest) else BatchRequest(numbers)
+
+        token = self.client.get_vies_data_async(batch)
+
+        if token:
+            self.add(token, len(batch))
+            self.__pending__[token].numbers = batch.numbers
+            self.__pending__[token].request = batch
+
+        return token
+
+    def add(self, token, size):
+        """
+        Start tracking batch uploaded elsewhere
+        :param token: Batch token
+        :type token: str
+        :param size: number of numbers in batch
+        :type size: int
+        """
+
+        now = time.monotonic()
+
+        batch = PendingBatch(token, size, now)
+        batch.next_poll = now + min(self.max_interval, max(self.min_interval, self.__estimate(size)))
+
+        with self.__lock__:
+            self.__pending__[token] = batch
+
+    def wait(self, token, size=None, timeout=None):
+        """
+        Wait for result of single batch
+        :param token: Batch token
+        :type token: str
+        :param size: number of numbers in batch if it is not tracked yet
+        :type size: int
+        :param timeout: max seconds to wait, batch is no longer tracked after it and last error code
+            of client is Error.BATCH_PROCESSING
+        :type timeout: float
+        :return: Batch result or False
+        :rtype: BatchResult or False
+        """
+
+        if token not in self.__pending__:
+            self.add(token, size if size else 1)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            batch = self.__pending__[token]
+            next_poll = min(batch.next_poll, deadline) if deadline is not None else batch.next_poll
+            time.sleep(max(0.0, next_poll - time.monotonic()))
+
+            done, result = self.__poll(batch)
+
+            if done:
+                return result
+
+            if deadline is not None and time.monotonic() >= deadline:
+                del self.__pending__[token]
+                return False
+
+    def results(self, callback=None):
+        """
+        Iterate over results of tracked batches in order of completion, batches due at the same time
+        are polled concurrently. Polls run on other threads, so error of failed batch is passed along
+        with it rather than left in the client.
+        :param callback: function called with token, result and error of each completed batch
+        :type callback: callable
+        :return: generator of (token, BatchResult or False, None or tuple of error code and message) tuples
+        :rtype: generator
+        """
+
+        running = {}
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='viesapi-poll') as executor:
+            while self.__pending__ or running:
+                due, delay = self.__due(running.values())
+
+                for batch in due:
+                    running[executor.submit(self.__poll_batch, batch)] = batch.token
+
+                if not running:
+                    time.sleep(delay)
+                    continue
+
+                finished, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    del running[future]
+                    token, done, result, error = future.result()
+
+                    if not done:
+                        continue
+
+                    if callback:
+                        callback(token, result, error)
+
+                    yield token, result, error
+
+    def drain(self, sink):
+        """
+        Write results of tracked batches to sink as they complete and release them
+        :param sink: result sink, records are written in order of submitted numbers
+        :type sink: ResultSink
+        :return: number of written batches
+        :rtype: int
+        """
+
+        numbers = dict((token, batch.request) for token, batch in self.__pending__.items())
+        count = 0
+
+        for token, result, error in self.results():
+            if result:
+                sink.write_batch(result, numbers.pop(token, None))
+            else:
+                request = numbers.pop(token, None)
+
+                for number in request.mapping if request else ():
+                    sink.write(number, error[1])
+
+            count += 1
+
+        return count
+
+    async def results_async(self, callback=None):
+        """
+        Asynchronously iterate over results of tracked batches in order of completion, batches due
+        at the same time are polled concurrently from default executor so event loop is not blocked
+        :param callback: function called with token, result and error of each completed batch
+        :type callback: callable
+        :return: async generator of (token, BatchResult or False, None or tuple of error code and message) tuples
+        :rtype: async generator
+        """
+
+        loop = asyncio.get_running_loop()
+        running = {}
+
+        while self.__pending__ or running:
+            due, delay = self.__due(running.values())
+
+            for batch in due:
+                running[loop.run_in_executor(None, self.__poll_batch, batch)] = batch.token
+
+            if not running:
+                await asyncio.sleep(delay)
+                continue
+
+            finished, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+            for future in finished:
+                del running[future]
+                token, done, result, error = future.result()
+
+                if not done:
+                    continue
+
+                if callback:
+                    callback(token, result, error)
+
+                yield token, result, error
+
+    def __due(self, running):
+        """
+        Get batches which are due to be polled and are not being polled already
+        :param running: tokens of batches being polled
+        :type running: iterable
+        :return: tuple of due batches, at most concurrency including running ones, and seconds
+            until next batch is due or None if polling threads are busy or no batch waits
+        :rtype: tuple
+        """
+
+        running = set(running)
+        now = time.monotonic()
+
+        with self.__lock__:
+            idle = sorted((b for b in self.__pending__.values() if b.token not in running),
+                          key=lambda b: b.next_poll)
+
+        free = max(0, max(1, self.concurrency) - len(running))
+        due = [b for b in idle if b.next_poll <= now][:free]
+
+        if len(due) == free or len(due) == len(idle):
+            # wait for running polls to complete
+            return due, None
+
+        return due, max(0.0, idle[len(due)].next_poll - now)
+
+    def __poll_batch(self, batch):
+        """
+        Poll batch from executor
+        :param batch: tracked batch
+        :type batch: PendingBatch
+        :return: tuple of token, completion flag, result and error, error info of client is kept per thread
+            so it is read here on the polling thread
+        :rtype: tuple
+        """
+
+        done, result = self.__poll(batch)
+        error = None if result else (self.client.get_last_error_code(), self.client.get_last_error())
+
+        return batch.token, done, result, error
+
+    def __poll(self, batch):
+        """
+        Check batch result and reschedule its next poll if it is still processing
+        :param batch: tracked batch
+        :type batch: PendingBatch
+        :return: tuple of completion flag and result
+        :rtype: tuple
+        """
+
+        partial = self.on_partial is not None
+
+        batch.polls += 1
+        result = self.client.get_vies_data_async_result(batch.token, partial)
+        now = time.monotonic()
+
+        # read before partial result callback, which may use the same client and reset its error
+        processing = (result and not result.complete) or self.client.get_last_error_code() == Error.BATCH_PROCESSING
+
+        if result and not result.complete:
+            self.__report(batch, result)
+            result = False
+
+            if self.straggler_after is not None and batch.numbers and now - batch.submitted >= self.straggler_after:
+                with self.__lock__:
+                    del self.__pending__[batch.token]
+
+                return True, self.__resolve_stragglers(batch)
+
+        if not result and processing:
+            # poll again when the rest of estimated time elapses, backing off if estimate was exceeded
+            remaining = batch.submitted + self.__estimate(batch.size) - now
+            batch.interval = remaining if remaining > self.min_interval else batch.interval * 2
+            batch.interval = min(self.max_interval, max(self.min_interval, batch.interval))
+            batch.next_poll = now + batch.interval
+
+            if self.straggler_after is not None and batch.numbers:
+                batch.next_poll = min(batch.next_poll, max(now, batch.submitted + self.straggler_after))
+
+            return False, None
+
+        with self.__lock__:
+            del self.__pending__[batch.token]
+
+            if result:
+                observed = (now - batch.submitted) / max(batch.size, 1)
+
+                if batch.polls == 1:
+                    # batch was ready at first poll, it might have been ready earlier so estimate is decreased
+                    observed = min(observed, self.per_number) * (1 - self.smoothing)
+
+                self.per_number += self.smoothing * (observed - self.per_number)
+
+        if result:
+            if partial:
+                self.__report(batch, result)
+
+        return True, result
+
+    def __report(self, batch, result):
+        """
+        Pass numbers not reported yet to partial result callback
+        :param batch: tracked batch
+        :type batch: PendingBatch
+        :param result: partial or complete batch result
+        :type result: BatchResult
+        """
+
+        new = BatchResult()
+        new.complete = result.complete
+
+        for vd in result.numbers:
+            key = vd.country_code + vd.vat_number
+
+            if key not in batch.seen:
+                batch.seen.add(key)
+                batch.result.numbers.append(vd)
+                new.numbers.append(vd)
+
+        for ve in result.errors:
+            key = ve.country_code + ve.vat_number
+
+            if key not in batch.seen:
+                batch.seen.add(key)
+                batch.result.errors.append(ve)
+                new.errors.append(ve)
+
+        if new.numbers or new.errors:
+            self.on_partial(batch.token, new)
+
+    def __resolve_stragglers(self, batch):
+        """
+        Check numbers without result one by one and complete batch result
+        :param batch: tracked batch
+        :type batch: PendingBatch
+        :return: batch result
+        :rtype: BatchResult
+        """
+
+        result = BatchResult()
+
+        for number in batch.numbers:
+            if number in batch.seen:
+                continue
+
+            vies = self.client.get_vies_data(number)
+
+            if vies:
+                result.numbers.append(vies)
+            else:
+                ve = VIESError()
+                ve.country_code = number[0:2]
+                ve.vat_number = number[2:]
+                ve.error = self.client.get_last_error()
+                result.errors.append(ve)
+
+        self.__report(batch, result)
+
+        return batch.result
+
+    def __estimate(self, size):
+        """
+        Estimate batch processing time
+        :param size: number of numbers in batch
+        :type size: int
+        :return: seconds
+        :rtype: float
+        """
+
+        return size * self.per_number
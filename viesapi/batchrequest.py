@@ -0,0 +1,117 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+from viesapi import EUVAT
+
+
+class BatchRequest:
+    """
+    Batch of EU VAT numbers to upload, each number is normalized and validated once
+    and duplicates are sent only once
+    """
+
+    HEAD = b'<?xml version="1.0" encoding="utf-8"?>\r\n<request>\r\n  <batch>\r\n    <numbers>\r\n'
+    TAIL = b'    </numbers>\r\n  </batch>\r\n</request>'
+
+    def __init__(self, numbers=None):
+        """
+        Construct new batch request
+        :param numbers: EU VAT numbers with 2-letter country prefix
+        :type numbers: list
+        """
+
+        self.numbers = []
+        self.mapping = {}
+        self.invalid = []
+        self.__seen__ = set()
+
+        if numbers:
+            self.extend(numbers)
+
+    def add(self, number):
+        """
+        Add number to batch
+        :param number: EU VAT number with 2-letter country prefix
+        :type number: str
+        :return: normalized number or False if number is not valid
+        :rtype: str or False
+        """
+
+        normalized = self.mapping.get(number)
+
+        if normalized is not None:
+            return normalized
+
+        normalized = EUVAT.validate(number)
+
+        if not normalized:
+            self.invalid.append(number)
+            return False
+
+        self.mapping[number] = normalized
+
+        if normalized not in self.__seen__:
+            self.__seen__.add(normalized)
+            self.numbers.append(normalized)
+
+        return normalized
+
+    def extend(self, numbers):
+        """
+        Add numbers to batch
+        :param numbers: EU VAT numbers with 2-letter country prefix
+        :type numbers: list
+        """
+
+        for number in numbers:
+            self.add(number)
+
+    def normalized(self, number):
+        """
+        Get normalized form of number added to batch
+        :param number: number as passed to add
+        :type number: str
+        :return: normalized number or None if number was not added or is not valid
+        :rtype: str or None
+        """
+
+        return self.mapping.get(number)
+
+    def body(self):
+        """
+        Serialize request body
+        :return: XML request body
+        :rtype: bytes
+        """
+
+        # validated numbers contain only [A-Z0-9+*], they need no escaping
+        return self.HEAD \
+            + b''.join(b'      <number>' + n.encode() + b'</number>\r\n' for n in self.numbers) \
+            + self.TAIL
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __str__(self):
+        return 'BatchRequest: [numbers = ' + str(self.numbers) \
+            + ', invalid = ' + str(self.invalid) \
+            + ']'
@@ -21,6 +21,9 @@
 #
 
 
+from viesapi import EUVAT
+
+
 class BatchResult:
     """
     Batch result
@@ -29,8 +32,120 @@ class BatchResult:
     def __init__(self):
         self.numbers = []
         self.errors = []
+        self.complete = True
+
+        # indexes are built on first lookup and extended with records appended since then
+        self.__by_number__ = {}
+        self.__by_uid__ = {}
+        self.__indexed__ = (0, 0)
+
+    def get(self, euvat):
+        """
+        Get result for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object, VIESError object or None if number is not in result
+        :rtype: VIESData or VIESError or None
+        """
+
+        self.__index()
+
+        record = self.__by_number__.get(euvat)
+
+        if record is None:
+            number = EUVAT.normalize(euvat)
+
+            if number:
+                record = self.__by_number__.get(number)
+
+        return record
+
+    def get_by_uid(self, uid):
+        """
+        Get result with specified uid
+        :param uid: record uid
+        :type uid: str
+        :return: VIESData object, VIESError object or None if uid is not in result
+        :rtype: VIESData or VIESError or None
+        """
+
+        self.__index()
+
+        return self.__by_uid__.get(uid)
+
+    def items(self, numbers=None):
+        """
+        Iterate over successes and errors in input order
+        :param numbers: numbers in order they were passed to get_vies_data_async or batch request,
+            records are returned in order of numbers and then errors if not specified
+        :type numbers: list or BatchRequest
+        :return: iterator of (number, record) tuples, record is VIESData, VIESError or None if missing
+        :rtype: iterator
+        """
+
+        if numbers is None:
+            for record in self.numbers:
+                yield record.country_code + record.vat_number, record
+
+            for record in self.errors:
+                yield record.country_code + record.vat_number, record
+
+            return
+
+        mapping = getattr(numbers, 'mapping', None)
+
+        if mapping is not None:
+            numbers = list(mapping)
+
+        self.__index()
+
+        for number in numbers:
+            normalized = mapping.get(number) if mapping is not None else EUVAT.normalize(number)
+            yield number, self.__by_number__.get(normalized) if normalized else None
+
+    def merge(self, *others):
+        """
+        Append records of other batch results to this one, records are shared, not copied
+        :param others: batch results
+        :type others: BatchResult
+        :return: this batch result
+        :rtype: BatchResult
+        """
+
+        for other in others:
+            self.numbers.extend(other.numbers)
+            self.errors.extend(other.errors)
+            self.complete = self.complete and other.complete
+
+        return self
+
+    def __index(self):
+        """
+        Index records appended since last lookup
+        """
+
+        n, e = self.__indexed__
+
+        if n == len(self.numbers) and e == len(self.errors):
+            return
+
+        if n > len(self.numbers) or e > len(self.errors):
+            # lists were replaced or truncated
+            n, e = 0, 0
+            self.__by_number__ = {}
+            self.__by_uid__ = {}
+
+        for records in (self.numbers[n:], self.errors[e:]):
+            for record in records:
+                self.__by_number__[record.country_code + record.vat_number] = record
+
+                if record.uid:
+                    self.__by_uid__[record.uid] = record
+
+        self.__indexed__ = (len(self.numbers), len(self.errors))
 
     def __str__(self):
         return 'BatchResult: [numbers = [' + ', '.join(str(e) for e in self.numbers) + ']' \
             + ', errors = [' + ', '.join(str(e) for e in self.errors) + ']' \
+            + ', complete = ' + str(self.complete) \
             + ']'
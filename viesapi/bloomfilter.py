@@ -0,0 +1,274 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import hashlib
+import math
+import os
+import struct
+import time
+
+
+class BloomFilter:
+    """
+    Compact set of strings with no false negatives and configurable false positive rate,
+    can be saved to a file and merged with filters saved by other processes.
+    With ttl items expire: the filter keeps current and previous generation of items, a new
+    generation starts every ttl seconds (aligned to the clock, so all processes sharing a file
+    agree on it) and an item is kept for ttl to 2 * ttl seconds after it was added.
+    """
+
+    MAGIC = b'VAB2'
+    HEADER = struct.Struct('>4sQIIdQ')
+
+    def __init__(self, capacity=1000000, error_rate=0.001, ttl=None):
+        """
+        Construct new filter
+        :param capacity: expected number of items
+        :type capacity: int
+        :param error_rate: false positive rate when filter holds capacity items
+        :type error_rate: float
+        :param ttl: seconds of one generation of items or None to keep items forever
+        :type ttl: float
+        """
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl
+
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / float(capacity) * math.log(2))))
+        self.count = 0
+        self.generation = self.__current()
+
+        self.__bits__ = bytearray((self.size + 7) // 8)
+        self.__previous__ = bytearray(len(self.__bits__)) if ttl else None
+
+    def add(self, item):
+        """
+        Add item
+        :param item: item
+        :type item: str
+        """
+
+        self.__rotate(self.__current())
+
+        bits = self.__bits__
+
+        for i in self.__positions(item):
+            bits[i >> 3] |= 1 << (i & 7)
+
+        self.count += 1
+
+    def merge(self, other):
+        """
+        Add all items of other filter created with the same parameters, items of generations
+        already expired here are skipped
+        :param other: other filter
+        :type other: BloomFilter
+        """
+
+        if other.size != self.size or other.hashes != self.hashes or (other.ttl or None) != (self.ttl or None):
+            raise ValueError('Bloom filters have different parameters')
+
+        self.__rotate(max(self.__current(), other.generation))
+
+        generations = [(other.generation, other.__bits__)]
+
+        if other.__previous__ is not None:
+            generations.append((other.generation - 1, other.__previous__))
+
+        for generation, bits in generations:
+            if generation == self.generation:
+                self.__bits__ = self.__union(self.__bits__, bits)
+            elif generation == self.generation - 1 and self.__previous__ is not None:
+                self.__previous__ = self.__union(self.__previous__, bits)
+
+        # the same items may be in both filters, so count is estimated from the bits set
+        self.count = self.__estimate(self.__bits__) + self.__estimate(self.__previous__)
+
+    def save(self, path):
+        """
+        Save filter to file, items of filter already saved there are merged in first
+        so the file can be shared by processes
+        :param path: file path
+        :type path: str
+        """
+
+        if os.path.exists(path):
+            try:
+                self.merge(BloomFilter.load(path))
+            except ValueError:
+                # file holds filter with different parameters or is damaged, it is replaced
+                pass
+
+        tmp = path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.size, self.hashes, self.count, self.ttl or 0.0,
+                                     self.generation))
+            f.write(self.__bits__)
+
+            if self.__previous__ is not None:
+                f.write(self.__previous__)
+
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Load filter from file
+        :param path: file path
+        :type path: str
+        :return: filter
+        :rtype: BloomFilter
+        :raises ValueError: if file is not a saved filter
+        """
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < BloomFilter.HEADER.size:
+            raise ValueError('Not a bloom filter file')
+
+        magic, size, hashes, count, ttl, generation = BloomFilter.HEADER.unpack_from(data)
+
+        n = (size + 7) // 8
+
+        if magic != BloomFilter.MAGIC or len(data) - BloomFilter.HEADER.size != (2 * n if ttl else n):
+            raise ValueError('Not a bloom filter file')
+
+        start = BloomFilter.HEADER.size
+
+        bf = BloomFilter.__new__(BloomFilter)
+        bf.capacity = None
+        bf.error_rate = None
+        bf.ttl = ttl or None
+        bf.size = size
+        bf.hashes = hashes
+        bf.count = count
+        bf.generation = generation
+        bf.__bits__ = bytearray(data[start:start + n])
+        bf.__previous__ = bytearray(data[start + n:]) if ttl else None
+
+        return bf
+
+    def __current(self):
+        """
+        Get number of current generation
+        :return: generation
+        :rtype: int
+        """
+
+        return int(time.time() // self.ttl) if self.ttl else 0
+
+    def __rotate(self, generation):
+        """
+        Start new generation of items if its time has come
+        :param generation: number of current generation
+        :type generation: int
+        """
+
+        if generation <= self.generation:
+            return
+
+        empty = bytearray(len(self.__bits__))
+
+        if generation == self.generation + 1:
+            self.__previous__ = self.__bits__
+            self.count = self.__estimate(self.__previous__)
+        else:
+            self.__previous__ = empty[:]
+            self.count = 0
+
+        self.__bits__ = empty
+        self.generation = generation
+
+    def __union(self, bits, other):
+        """
+        Get union of two bit arrays
+        :param bits: bit array
+        :type bits: bytearray
+        :param other: bit array of the same length
+        :type other: bytearray
+        :return: bit array with bits set in any of them
+        :rtype: bytearray
+        """
+
+        n = len(bits)
+
+        return bytearray((int.from_bytes(bits, 'little') | int.from_bytes(other, 'little')).to_bytes(n, 'little'))
+
+    def __estimate(self, bits):
+        """
+        Estimate number of items from number of bits set
+        :param bits: bit array or None
+        :type bits: bytearray
+        :return: estimated number of items
+        :rtype: int
+        """
+
+        if bits is None:
+            return 0
+
+        ones = bin(int.from_bytes(bits, 'little')).count('1')
+
+        if ones >= self.size:
+            return self.capacity or self.size
+
+        return int(round(-self.size / float(self.hashes) * math.log(1.0 - ones / float(self.size))))
+
+    def __positions(self, item):
+        """
+        Get bit positions of item using double hashing
+        :param item: item
+        :type item: str
+        :return: bit positions
+        :rtype: list
+        """
+
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        self.__rotate(self.__current())
+
+        positions = self.__positions(item)
+
+        for bits in (self.__bits__, self.__previous__):
+            if bits is not None and all(bits[i >> 3] & (1 << (i & 7)) for i in positions):
+                return True
+
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def __str__(self):
+        return 'BloomFilter: [size = ' + str(self.size) \
+            + ', hashes = ' + str(self.hashes) \
+            + ', ttl = ' + str(self.ttl) \
+            + ', generation = ' + str(self.generation) \
+            + ', count = ' + str(self.count) \
+            + ']'
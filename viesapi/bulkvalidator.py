@@ -0,0 +1,322 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import os
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+
+from viesapi import Error, EUVAT, VIESData, VIESError, BatchResult, NameComponents, AddressComponents
+from viesapi.jsonresponseparser import JSONResponseParser
+from viesapi.responseparser import ResponseParser
+
+
+class BulkValidator:
+    """
+    Offloads CPU-bound number normalization and response parsing of bulk runs
+    to a pool of worker processes. Workers send results back as plain tuples
+    which are much cheaper to pickle than result objects. One validator can be
+    shared by many threads, see VIESAPIClient.set_bulk_validator.
+    """
+
+    def __init__(self, workers=None, chunk_size=500):
+        """
+        Construct new bulk validator
+        :param workers: number of worker processes, defaults to number of CPUs
+        :type workers: int
+        :param chunk_size: number of numbers sent to a worker at once
+        :type chunk_size: int
+        """
+
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+
+        self.__executor__ = None
+        self.__lock__ = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shut down worker processes
+        """
+
+        with self.__lock__:
+            executor = self.__executor__
+            self.__executor__ = None
+
+        if executor:
+            executor.shutdown()
+
+    def normalize(self, numbers):
+        """
+        Normalize and validate EU VAT numbers
+        :param numbers: EU VAT numbers with 2-letter country prefix
+        :type numbers: list
+        :return: normalized numbers in input order, False for invalid ones
+        :rtype: list
+        """
+
+        return self.__map(BulkValidator.normalize_chunk, numbers, self.chunk_size)
+
+    def parse_vies_data(self, responses):
+        """
+        Parse VIES data responses
+        :param responses: raw bodies of get_vies_data or get_vies_data_parsed responses
+        :type responses: list
+        :return: VIESData objects in input order, tuple of error code and message for failed ones
+        :rtype: list
+        """
+
+        return [BulkValidator.unpack_vies_data(r[1]) if not r[0] else r[0]
+                for r in self.__map(BulkValidator.parse_vies_data_chunk, responses, 16)]
+
+    def parse_batch_results(self, responses):
+        """
+        Parse batch result responses
+        :param responses: raw bodies of get_vies_data_async_result responses
+        :type responses: list
+        :return: BatchResult objects in input order, tuple of error code and message for failed ones
+        :rtype: list
+        """
+
+        return [BulkValidator.unpack_batch_result(r[1]) if not r[0] else r[0]
+                for r in self.__map(BulkValidator.parse_batch_result_chunk, responses, 1)]
+
+    def __map(self, func, items, size):
+        """
+        Run worker function over chunks of items
+        :param func: worker function taking list of items
+        :type func: callable
+        :param items: input items
+        :type items: list
+        :param size: chunk size
+        :type size: int
+        :return: flattened results in input order
+        :rtype: list
+        """
+
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+        if self.workers == 1:
+            results = map(func, chunks)
+        else:
+            with self.__lock__:
+                if not self.__executor__:
+                    self.__executor__ = ProcessPoolExecutor(self.workers)
+
+                executor = self.__executor__
+
+            results = executor.map(func, chunks)
+
+        out = []
+
+        for r in results:
+            out.extend(r)
+
+        return out
+
+    @staticmethod
+    def normalize_chunk(numbers):
+        """
+        Worker function normalizing chunk of numbers
+        :param numbers: EU VAT numbers
+        :type numbers: list
+        :return: normalized numbers, False for invalid ones
+        :rtype: list
+        """
+
+        return [EUVAT.validate(n) for n in numbers]
+
+    @staticmethod
+    def parse_vies_data_chunk(responses):
+        """
+        Worker function parsing chunk of VIES data responses
+        :param responses: raw response bodies
+        :type responses: list
+        :return: list of (error, packed VIESData) tuples, error is None on success
+        :rtype: list
+        """
+
+        out = []
+
+        for data in responses:
+            doc, error = BulkValidator.parse_document(data)
+
+            if not error:
+                vies = BulkValidator.parser(doc).vies_data(doc)
+
+                if vies:
+                    out.append((None, BulkValidator.pack_vies_data(vies)))
+                    continue
+
+                error = (Error.CLI_RESPONSE, Error.message(Error.CLI_RESPONSE))
+
+            out.append((error, None))
+
+        return out
+
+    @staticmethod
+    def parse_batch_result_chunk(responses):
+        """
+        Worker function parsing chunk of batch result responses
+        :param responses: raw response bodies
+        :type responses: list
+        :return: list of (error, packed BatchResult) tuples, error is None on success
+        :rtype: list
+        """
+
+        out = []
+
+        for data in responses:
+            doc, error = BulkValidator.parse_document(data)
+
+            if error:
+                out.append((error, None))
+                continue
+
+            out.append((None, BulkValidator.pack_batch_result(BulkValidator.parser(doc).batch_result(doc))))
+
+        return out
+
+    @staticmethod
+    def parse_document(data):
+        """
+        Parse XML or JSON response and check it for service error
+        :param data: raw response body
+        :type data: bytes
+        :return: tuple of XML or JSON document and error (code, message), one of them is None
+        :rtype: tuple
+        """
+
+        parser = JSONResponseParser if data.lstrip()[:1] == b'{' else ResponseParser
+
+        try:
+            doc = parser.parse(data)
+        except Exception as e:
+            return None, (Error.CLI_EXCEPTION, str(e))
+
+        if doc is None:
+            return None, (Error.CLI_RESPONSE, Error.message(Error.CLI_RESPONSE))
+
+        error = parser.error(doc)
+
+        if error:
+            return None, error
+
+        return doc, None
+
+    @staticmethod
+    def parser(doc):
+        """
+        Get parser mapping specified document
+        :param doc: XML or JSON document
+        :type doc: ElementTree or dict
+        :return: parser class
+        :rtype: type
+        """
+
+        return JSONResponseParser if isinstance(doc, dict) else ResponseParser
+
+    @staticmethod
+    def pack_vies_data(vies):
+        """
+        Convert VIESData object to tuple
+        :param vies: VIESData object
+        :type vies: VIESData
+        :return: packed object
+        :rtype: tuple
+        """
+
+        nc = vies.trader_name_components
+        ac = vies.trader_address_components
+
+        return (vies.uid, vies.country_code, vies.vat_number, vies.valid, vies.trader_name,
+                (nc.name, nc.legal_form, nc.legal_form_canonical_id, nc.legal_form_canonical_name) if nc else None,
+                vies.trader_company_type, vies.trader_address,
+                (ac.country, ac.postal_code, ac.city, ac.street, ac.street_number, ac.house_number) if ac else None,
+                vies.id, vies.date, vies.source)
+
+    @staticmethod
+    def unpack_vies_data(t):
+        """
+        Convert tuple created by pack_vies_data back to VIESData object
+        :param t: packed object
+        :type t: tuple
+        :return: VIESData object
+        :rtype: VIESData
+        """
+
+        vies = VIESData()
+        (vies.uid, vies.country_code, vies.vat_number, vies.valid, vies.trader_name, nc,
+         vies.trader_company_type, vies.trader_address, ac, vies.id, vies.date, vies.source) = t
+
+        if nc:
+            vies.trader_name_components = NameComponents()
+            (vies.trader_name_components.name, vies.trader_name_components.legal_form,
+             vies.trader_name_components.legal_form_canonical_id,
+             vies.trader_name_components.legal_form_canonical_name) = nc
+
+        if ac:
+            vies.trader_address_components = AddressComponents()
+            (vies.trader_address_components.country, vies.trader_address_components.postal_code,
+             vies.trader_address_components.city, vies.trader_address_components.street,
+             vies.trader_address_components.street_number, vies.trader_address_components.house_number) = ac
+
+        return vies
+
+    @staticmethod
+    def pack_batch_result(br):
+        """
+        Convert BatchResult object to tuple
+        :param br: batch result
+        :type br: BatchResult
+        :return: packed object
+        :rtype: tuple
+        """
+
+        return ([BulkValidator.pack_vies_data(v) for v in br.numbers],
+                [(e.uid, e.country_code, e.vat_number, e.error, e.date, e.source) for e in br.errors])
+
+    @staticmethod
+    def unpack_batch_result(t):
+        """
+        Convert tuple created by pack_batch_result back to BatchResult object
+        :param t: packed object
+        :type t: tuple
+        :return: batch result
+        :rtype: BatchResult
+        """
+
+        br = BatchResult()
+        br.numbers = [BulkValidator.unpack_vies_data(v) for v in t[0]]
+
+        for e in t[1]:
+            ve = VIESError()
+            ve.uid, ve.country_code, ve.vat_number, ve.error, ve.date, ve.source = e
+            br.errors.append(ve)
+
+        return br
@@ -0,0 +1,486 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from viesapi import Error, EUVAT, VIESAPIClient, VIESData, BatchPoller, BulkValidator, CSVSink, JSONLSink, SQLiteSink, \
+    BufferedSink
+
+
+class Reader:
+    """
+    Streaming reader of input numbers
+    """
+
+    def __init__(self, stream, format, column):
+        """
+        Construct new reader
+        :param stream: text input stream
+        :type stream: file
+        :param format: input format: csv, jsonl or text
+        :type format: str
+        :param column: CSV column name or index, JSON field name
+        :type column: str
+        """
+
+        self.stream = stream
+        self.format = format
+        self.column = column
+
+    def __iter__(self):
+        if self.format == 'jsonl':
+            field = self.column if self.column else 'number'
+
+            for line in self.stream:
+                if line.strip():
+                    yield str(json.loads(line).get(field, ''))
+        elif self.format == 'csv':
+            rows = csv.reader(self.stream)
+            index = 0
+
+            if self.column and not self.column.isdigit():
+                header = next(rows, [])
+                index = header.index(self.column)
+            elif self.column:
+                index = int(self.column)
+
+            for row in rows:
+                if len(row) > index:
+                    yield row[index]
+        else:
+            for line in self.stream:
+                if line.strip():
+                    yield line.strip()
+
+
+class Progress:
+    """
+    Progress and throughput display on stderr
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.done = 0
+        self.valid = 0
+        self.errors = 0
+        self.skipped = 0
+
+        self.__start__ = time.monotonic()
+        self.__shown__ = 0.0
+
+    def update(self, record, force=False):
+        """
+        Count finished number and refresh display at most once per second
+        :param record: VIESData object, VIESError object or error message, None to only refresh display
+        :type record: VIESData or VIESError or str or None
+        :param force: refresh display now
+        :type force: bool
+        """
+
+        if record is not None:
+            self.done += 1
+
+            if not isinstance(record, VIESData):
+                self.errors += 1
+            elif record.valid:
+                self.valid += 1
+
+        now = time.monotonic()
+
+        if not self.enabled or (not force and now - self.__shown__ < 1.0):
+            return
+
+        self.__shown__ = now
+        rate = self.done / max(now - self.__start__, 0.001)
+
+        sys.stderr.write('\rdone: %d  valid: %d  errors: %d  skipped: %d  rate: %.1f/s '
+                         % (self.done, self.valid, self.errors, self.skipped, rate))
+        sys.stderr.flush()
+
+        if force:
+            sys.stderr.write('\n')
+
+
+class BulkRunner:
+    """
+    Validates stream of numbers using concurrent batches
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.local = threading.local()
+
+        # with more workers input normalization and batch result parsing run in worker processes
+        self.bulk = BulkValidator(args.workers) if args.workers > 1 else None
+
+    def client(self):
+        """
+        Get client of the calling thread, each thread has its own client with its own connections
+        :return: client object
+        :rtype: VIESAPIClient
+        """
+
+        c = getattr(self.local, 'client', None)
+
+        if not c:
+            c = VIESAPIClient(self.args.id, self.args.key)
+
+            if self.args.url:
+                c.set_url(self.args.url)
+
+            c.set_bulk_validator(self.bulk)
+
+            self.local.client = c
+
+        return c
+
+    def run(self, numbers, sink, progress, done):
+        """
+        Validate numbers and write results
+        :param numbers: iterable of input numbers
+        :type numbers: iterable
+        :param sink: result sink
+        :type sink: ResultSink
+        :param progress: progress display
+        :type progress: Progress
+        :param done: input numbers already present in output
+        :type done: set
+        """
+
+        pending = set()
+        batch = []
+
+        try:
+            with ThreadPoolExecutor(self.args.concurrency) as executor:
+                for number, normalized in self.__normalize(numbers, done, progress):
+                    if not normalized:
+                        self.__write(sink, progress, number, Error.message(Error.CLI_EUVAT))
+                        continue
+
+                    batch.append((number, normalized))
+
+                    if len(batch) < self.args.batch_size:
+                        continue
+
+                    pending.add(executor.submit(self.validate, batch))
+                    batch = []
+
+                    # keep number of batches in flight bounded so memory use does not grow with input size
+                    while len(pending) >= self.args.concurrency:
+                        pending = self.__drain(pending, sink, progress, FIRST_COMPLETED)
+
+                if batch:
+                    pending.add(executor.submit(self.validate, batch))
+
+                while pending:
+                    pending = self.__drain(pending, sink, progress, FIRST_COMPLETED)
+        finally:
+            if self.bulk:
+                self.bulk.close()
+
+        progress.update(None, True)
+
+    def __normalize(self, numbers, done, progress):
+        """
+        Normalize input numbers not present in output, in chunks sent to bulk validator if it is used
+        :param numbers: iterable of input numbers
+        :type numbers: iterable
+        :param done: input numbers already present in output
+        :type done: set
+        :param progress: progress display
+        :type progress: Progress
+        :return: generator of (input number, normalized number or False) tuples
+        :rtype: generator
+        """
+
+        size = self.bulk.workers * self.bulk.chunk_size if self.bulk else 1
+        chunk = []
+
+        for number in numbers:
+            if number in done:
+                progress.skipped += 1
+                continue
+
+            chunk.append(number)
+
+            if len(chunk) >= size:
+                yield from self.__normalize_chunk(chunk)
+                chunk = []
+
+        yield from self.__normalize_chunk(chunk)
+
+    def __normalize_chunk(self, chunk):
+        """
+        Normalize chunk of input numbers
+        :param chunk: input numbers
+        :type chunk: list
+        :return: list of (input number, normalized number or False) tuples
+        :rtype: list
+        """
+
+        if self.bulk:
+            return list(zip(chunk, self.bulk.normalize(chunk)))
+
+        return [(number, EUVAT.validate(number)) for number in chunk]
+
+    def validate(self, batch):
+        """
+        Validate batch of numbers
+        :param batch: list of (input, normalized) number pairs
+        :type batch: list
+        :return: list of (input number, VIESData, VIESError or error message) tuples
+        :rtype: list
+        """
+
+        client = self.client()
+        unique = list(dict.fromkeys(n for _, n in batch))
+
+        if len(unique) == 1:
+            vies = client.get_vies_data(unique[0])
+            results = {unique[0]: vies}
+
+            if not vies:
+                return [(i, client.get_last_error()) for i, _ in batch]
+        else:
+            results = self.__validate_batch(client, unique)
+
+            if results is False:
+                return [(i, client.get_last_error()) for i, _ in batch]
+
+        return [(number, results.get(normalized) or 'No result returned for number') for number, normalized in batch]
+
+    def __validate_batch(self, client, numbers):
+        """
+        Upload batch and wait for its result
+        :param client: client object
+        :type client: VIESAPIClient
+        :param numbers: unique normalized numbers
+        :type numbers: list
+        :return: batch result or False
+        :rtype: BatchResult or False
+        """
+
+        poller = BatchPoller(client, max_interval=self.args.poll_interval)
+        token = poller.submit(numbers)
+
+        if not token:
+            return False
+
+        return poller.wait(token)
+
+    def __drain(self, pending, sink, progress, when):
+        """
+        Wait for finished batches and write their results
+        :return: still pending futures
+        :rtype: set
+        """
+
+        finished, pending = wait(pending, return_when=when)
+
+        for f in finished:
+            for number, record in f.result():
+                self.__write(sink, progress, number, record)
+
+        return pending
+
+    def __write(self, sink, progress, number, record):
+        """
+        Write result and update progress
+        """
+
+        sink.write(number, record)
+        progress.update(record)
+
+
+def read_done(path, format):
+    """
+    Read input numbers already present in output file
+    :param path: output file path
+    :type path: str
+    :param format: output format
+    :type format: str
+    :return: set of input numbers
+    :rtype: set
+    """
+
+    done = set()
+
+    if not os.path.exists(path):
+        return done
+
+    if format == 'sqlite':
+        sink = SQLiteSink(path)
+        done = sink.numbers()
+        sink.close()
+        return done
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if format == 'csv':
+            for row in csv.DictReader(f):
+                done.add(row['number'])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['number'])
+                except ValueError:
+                    # last line may be truncated if previous run was killed
+                    pass
+
+    return done
+
+
+def truncate_partial(path):
+    """
+    Remove last line of output file if it was cut off by killed run, so appended records start on new line
+    :param path: output file path
+    :type path: str
+    """
+
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+
+        # find last newline reading backwards in blocks
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            i = f.read(end - start).rfind(b'\n')
+
+            if i >= 0:
+                end = start + i + 1
+                break
+
+            end = start
+
+        if end < size:
+            f.truncate(end)
+
+
+def guess_format(path, default):
+    """
+    Guess file format from extension
+    :rtype: str
+    """
+
+    if path:
+        ext = os.path.splitext(path)[1].lower()
+
+        if ext in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        if ext == '.csv':
+            return 'csv'
+        if ext == '.txt':
+            return 'text'
+        if ext in ('.db', '.sqlite', '.sqlite3'):
+            return 'sqlite'
+
+    return default
+
+
+def main(argv=None):
+    """
+    Command line entry point
+    :param argv: command line arguments
+    :type argv: list
+    :return: exit code
+    :rtype: int
+    """
+
+    p = argparse.ArgumentParser(prog='python -m viesapi', description='Bulk EU VAT number validator')
+    p.add_argument('-i', '--input', help='input file (default: stdin)')
+    p.add_argument('-o', '--output', help='output file (default: stdout)')
+    p.add_argument('--input-format', choices=['csv', 'jsonl', 'text'], help='input format (default: by extension or text)')
+    p.add_argument('--output-format', choices=['csv', 'jsonl', 'sqlite'],
+                   help='output format (default: by extension or jsonl)')
+    p.add_argument('--column', help='CSV column name or index, JSONL field name (default: first column, "number")')
+    p.add_argument('--id', default=os.environ.get('VIESAPI_ID'), help='API key identifier (env: VIESAPI_ID)')
+    p.add_argument('--key', default=os.environ.get('VIESAPI_KEY'), help='API key (env: VIESAPI_KEY)')
+    p.add_argument('--url', help='non default service URL')
+    p.add_argument('--batch-size', type=int, default=99, help='numbers per batch, 2-99 (default: 99)')
+    p.add_argument('--concurrency', type=int, default=4, help='batches processed at once (default: 4)')
+    p.add_argument('--workers', type=int, default=1,
+                   help='processes normalizing input and parsing batch results (default: 1, in main process)')
+    p.add_argument('--poll-interval', type=float, default=30.0, help='max seconds between batch status checks')
+    p.add_argument('--resume', action='store_true', help='skip numbers already present in output file')
+    p.add_argument('--progress', action='store_true', default=None, help='show progress (default: if stderr is a tty)')
+    p.add_argument('--no-progress', dest='progress', action='store_false', help='do not show progress')
+
+    args = p.parse_args(argv)
+    args.batch_size = max(2, min(99, args.batch_size))
+    args.concurrency = max(1, args.concurrency)
+
+    in_format = args.input_format or guess_format(args.input, 'text')
+    out_format = args.output_format or guess_format(args.output, 'jsonl')
+
+    if out_format == 'text':
+        out_format = 'jsonl'
+
+    if out_format == 'sqlite' and not args.output:
+        p.error('sqlite output format requires --output')
+
+    if args.resume and not args.output:
+        p.error('--resume requires --output')
+
+    if args.resume and out_format != 'sqlite':
+        truncate_partial(args.output)
+
+    done = read_done(args.output, out_format) if args.resume else set()
+    append = args.resume and args.output and os.path.exists(args.output)
+
+    fin = open(args.input, newline='', encoding='utf-8') if args.input else sys.stdin
+    fout = None
+
+    if out_format == 'sqlite':
+        sink = SQLiteSink(args.output)
+    else:
+        fout = open(args.output, 'a' if append else 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+        sink = CSVSink(fout, not append) if out_format == 'csv' else JSONLSink(fout)
+
+    # writing from background thread, batches stop being submitted when output falls behind
+    sink = BufferedSink(sink)
+
+    try:
+        progress = Progress(args.progress if args.progress is not None else sys.stderr.isatty())
+
+        BulkRunner(args).run(Reader(fin, in_format, args.column), sink, progress, done)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        sink.close()
+
+        if args.input:
+            fin.close()
+        if fout and args.output:
+            fout.close()
+
+    return 0
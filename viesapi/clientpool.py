@@ -0,0 +1,337 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import threading
+import time
+
+from viesapi import Error, VIESAPIClient
+
+
+class PoolMember:
+    """
+    API credential used by the client pool and its usage statistics
+    """
+
+    def __init__(self, id, key):
+        self.id = id
+        self.client = VIESAPIClient(id, key)
+        self.status = None
+        self.weight = 1
+        self.current_weight = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = {}
+        self.disabled_until = 0.0
+        self.next_request = 0.0
+
+    def __str__(self):
+        return 'PoolMember: [id = ' + str(self.id) \
+            + ', weight = ' + str(self.weight) \
+            + ', in_flight = ' + str(self.in_flight) \
+            + ', requests = ' + str(self.requests) \
+            + ', errors = ' + str(self.errors) \
+            + ', disabled_until = ' + str(self.disabled_until) \
+            + ']'
+
+
+class VIESAPIClientPool:
+    """
+    Client spreading requests across multiple API credentials
+    """
+
+    ROUND_ROBIN = 1
+    LEAST_LOADED = 2
+
+    # errors taking credential out of rotation and seconds it stays there
+    COOLDOWN = {
+        Error.VIES_TOO_MANY_REQ: 60,
+        Error.DB_AUTH_OVER_PLAN: 3600
+    }
+
+    def __init__(self, credentials, strategy=ROUND_ROBIN):
+        """
+        Construct new client pool
+        :param credentials: list of (id, key) pairs
+        :type credentials: list
+        :param strategy: member selection strategy, ROUND_ROBIN (weighted) or LEAST_LOADED
+        :type strategy: int
+        """
+
+        self.strategy = strategy
+        self.members = [PoolMember(id, key) for id, key in credentials]
+
+        self.__tokens__ = {}
+        self.__lock__ = threading.Lock()
+        self.__local__ = threading.local()
+
+    def set_url(self, url):
+        """
+        Set non default service URL for all members
+        :param url: service URL
+        :type url: str
+        """
+
+        for m in self.members:
+            m.client.set_url(url)
+
+    def refresh_status(self):
+        """
+        Download account status of each credential and update selection weights
+        using the number of requests remaining in the billing plan
+        """
+
+        for m in self.members:
+            status = m.client.get_account_status()
+
+            if not status:
+                continue
+
+            with self.__lock__:
+                m.status = status
+                remaining = (status.limit or 0) - (status.total_count or 0)
+
+                if remaining > 0:
+                    m.weight = remaining
+                    m.disabled_until = 0.0
+                elif status.over_plan_allowed:
+                    m.weight = 1
+                else:
+                    m.weight = 0
+
+    def get_vies_data(self, euvat):
+        """
+        Get VIES data for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data(euvat))
+
+    def get_vies_data_parsed(self, euvat):
+        """
+        Get VIES data returning parsed trader address for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data_parsed(euvat))
+
+    def get_vies_data_async(self, numbers):
+        """
+        Upload batch of VAT numbers using one of credentials
+        :param numbers: Array of EU VAT numbers with 2-letter country prefix
+        :type numbers: list
+        :return: Batch token for checking status and getting the result
+        :rtype: string or False
+        """
+
+        token = self.__call(lambda c: c.get_vies_data_async(numbers))
+
+        if token:
+            with self.__lock__:
+                self.__tokens__[token] = self.__local__.member
+
+        return token
+
+    def get_vies_data_async_result(self, token):
+        """
+        Check batch result and download data using credential the batch was uploaded with
+        :param token: Batch token received from get_vies_data_async function
+        :type token: string
+        :return: Batch result
+        :rtype: BatchResult or False
+        """
+
+        with self.__lock__:
+            member = self.__tokens__.get(token)
+
+        if not member:
+            self.__set(Error.CLI_INPUT, Error.message(Error.CLI_INPUT))
+            return False
+
+        result = self.__invoke(member, lambda c: c.get_vies_data_async_result(token))
+
+        if result:
+            with self.__lock__:
+                self.__tokens__.pop(token, None)
+
+        return result
+
+    def get_stats(self):
+        """
+        Get usage statistics of all credentials
+        :return: list of pool members
+        :rtype: list
+        """
+
+        return list(self.members)
+
+    def get_last_error_code(self):
+        """
+        Get last error code of the calling thread
+        :return: error code
+        :rtype: int
+        """
+
+        return getattr(self.__local__, 'errcode', 0)
+
+    def get_last_error(self):
+        """
+        Get last error message of the calling thread
+        :return: unicode string
+        :rtype: str
+        """
+
+        return getattr(self.__local__, 'err', '')
+
+    def __set(self, code, err):
+        """
+        Set error info of the calling thread
+        :param code: error code
+        :type code: int
+        :param err: error message
+        :type err: str
+        """
+
+        self.__local__.errcode = code
+        self.__local__.err = err
+
+    def __call(self, func):
+        """
+        Call client function on selected member, failing over to other members
+        when credential is rate limited or over its plan
+        :param func: function taking client object
+        :type func: callable
+        :return: function result or False
+        """
+
+        tried = set()
+
+        while True:
+            member = self.__select(tried)
+
+            if not member:
+                if not tried:
+                    self.__set(Error.DB_AUTH_OVER_PLAN, 'No API credential available in the pool')
+                return False
+
+            tried.add(member)
+            result = self.__invoke(member, func)
+
+            if result or self.get_last_error_code() not in self.COOLDOWN:
+                return result
+
+    def __invoke(self, member, func):
+        """
+        Call client function on specified member and update its statistics
+        :param member: pool member
+        :type member: PoolMember
+        :param func: function taking client object
+        :type func: callable
+        :return: function result or False
+        """
+
+        with self.__lock__:
+            member.in_flight += 1
+            member.requests += 1
+
+        try:
+            result = func(member.client)
+            code = member.client.get_last_error_code()
+            self.__set(code, member.client.get_last_error())
+        finally:
+            with self.__lock__:
+                member.in_flight -= 1
+
+        self.__local__.member = member
+
+        if not result:
+            with self.__lock__:
+                member.errors[code] = member.errors.get(code, 0) + 1
+
+                if code in self.COOLDOWN:
+                    member.disabled_until = time.monotonic() + self.COOLDOWN[code]
+
+        return result
+
+    def __select(self, exclude):
+        """
+        Select member for next request honoring plan request delays
+        :param exclude: members already tried
+        :type exclude: set
+        :return: selected member or None
+        :rtype: PoolMember or None
+        """
+
+        while True:
+            now = time.monotonic()
+
+            with self.__lock__:
+                active = [m for m in self.members
+                          if m not in exclude and m.weight > 0 and m.disabled_until <= now]
+
+                if not active:
+                    return None
+
+                ready = [m for m in active if m.next_request <= now]
+
+                if ready:
+                    if self.strategy == self.LEAST_LOADED:
+                        member = min(ready, key=lambda m: (m.in_flight / float(m.weight), m.requests / float(m.weight)))
+                    else:
+                        member = self.__next_weighted(ready)
+
+                    delay = member.status.request_delay if member.status and member.status.request_delay else 0
+                    member.next_request = now + delay
+
+                    return member
+
+                wait = min(m.next_request for m in active) - now
+
+            time.sleep(wait)
+
+    def __next_weighted(self, members):
+        """
+        Select member using smooth weighted round-robin
+        :param members: candidate members
+        :type members: list
+        :return: selected member
+        :rtype: PoolMember
+        """
+
+        total = 0
+        best = None
+
+        for m in members:
+            m.current_weight += m.weight
+            total += m.weight
+
+            if not best or m.current_weight > best.current_weight:
+                best = m
+
+        best.current_weight -= total
+
+        return best
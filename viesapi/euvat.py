@@ -30,6 +30,41 @@ class EUVAT:
     EU VAT number verificator
     """
 
+    # compiled once, numbers are validated in bulk
+    SEPARATORS = re.compile('[ -]')
+    FORMAT = re.compile('[A-Z]{2}[A-Z0-9+*]{2,12}')
+
+    COUNTRIES = {cc: re.compile(pattern) for cc, pattern in {
+        'AT': 'ATU\\d{8}',
+        'BE': 'BE[0-1]{1}\\d{9}',
+        'BG': 'BG\\d{9,10}',
+        'CY': 'CY\\d{8}[A-Z]{1}',
+        'CZ': 'CZ\\d{8,10}',
+        'DE': 'DE\\d{9}',
+        'DK': 'DK\\d{8}',
+        'EE': 'EE\\d{9}',
+        'EL': 'EL\\d{9}',
+        'ES': 'ES[A-Z0-9]{1}\\d{7}[A-Z0-9]{1}',
+        'FI': 'FI\\d{8}',
+        'FR': 'FR[A-Z0-9]{2}\\d{9}',
+        'HR': 'HR\\d{11}',
+        'HU': 'HU\\d{8}',
+        'IE': 'IE[A-Z0-9+*]{8,9}',
+        'IT': 'IT\\d{11}',
+        'LT': 'LT\\d{9,12}',
+        'LU': 'LU\\d{8}',
+        'LV': 'LV\\d{11}',
+        'MT': 'MT\\d{8}',
+        'NL': 'NL[A-Z0-9+*]{12}',
+        'PL': 'PL\\d{10}',
+        'PT': 'PT\\d{9}',
+        'RO': 'RO\\d{2,10}',
+        'SE': 'SE\\d{12}',
+        'SI': 'SI\\d{8}',
+        'SK': 'SK\\d{10}',
+        'XI': 'XI[A-Z0-9]{5,12}'
+    }.items()}
+
     @staticmethod
     def normalize(number):
         """
@@ -43,9 +78,9 @@ class EUVAT:
         if not number:
             return False
 
-        number = re.sub('[ -]', '', number).upper()
+        number = EUVAT.SEPARATORS.sub('', number).upper()
 
-        if not re.match('[A-Z]{2}[A-Z0-9+*]{2,12}', number):
+        if not EUVAT.FORMAT.fullmatch(number):
             return False
 
         return number
@@ -60,52 +95,29 @@ class EUVAT:
         :rtype: bool
         """
 
+        return EUVAT.validate(number) is not False
+
+    @staticmethod
+    def validate(number):
+        """
+        Normalizes and validates the VAT number in one pass
+        :param number: input string
+        :type number: str
+        :returns: normalized string or False if number is not valid
+        :rtype: str or False
+        """
+
         number = EUVAT.normalize(number)
 
         if not number:
             return False
 
-        cmap = {
-            'AT': 'ATU\\d{8}',
-            'BE': 'BE[0-1]{1}\\d{9}',
-            'BG': 'BG\\d{9,10}',
-            'CY': 'CY\\d{8}[A-Z]{1}',
-            'CZ': 'CZ\\d{8,10}',
-            'DE': 'DE\\d{9}',
-            'DK': 'DK\\d{8}',
-            'EE': 'EE\\d{9}',
-            'EL': 'EL\\d{9}',
-            'ES': 'ES[A-Z0-9]{1}\\d{7}[A-Z0-9]{1}',
-            'FI': 'FI\\d{8}',
-            'FR': 'FR[A-Z0-9]{2}\\d{9}',
-            'HR': 'HR\\d{11}',
-            'HU': 'HU\\d{8}',
-            'IE': 'IE[A-Z0-9+*]{8,9}',
-            'IT': 'IT\\d{11}',
-            'LT': 'LT\\d{9,12}',
-            'LU': 'LU\\d{8}',
-            'LV': 'LV\\d{11}',
-            'MT': 'MT\\d{8}',
-            'NL': 'NL[A-Z0-9+*]{12}',
-            'PL': 'PL\\d{10}',
-            'PT': 'PT\\d{9}',
-            'RO': 'RO\\d{2,10}',
-            'SE': 'SE\\d{12}',
-            'SI': 'SI\\d{8}',
-            'SK': 'SK\\d{10}',
-            'XI': 'XI[A-Z0-9]{5,12}'
-        }
-
-        cc = number[0:2].upper()
-        num = number[2:].upper()
-
-        if cc not in cmap:
-            return False
+        pattern = EUVAT.COUNTRIES.get(number[0:2])
 
-        if not re.match(cmap[cc], number):
+        if not pattern or not pattern.fullmatch(number):
             return False
 
-        if cc == 'PL':
-            return NIP.is_valid(num)
+        if number[0:2] == 'PL' and not NIP.is_valid(number[2:]):
+            return False
 
-        return True
+        return number
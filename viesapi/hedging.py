@@ -0,0 +1,267 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from viesapi import Error, EUVAT
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent request latencies per country code
+    """
+
+    def __init__(self, window=200, min_samples=20):
+        """
+        Construct new tracker
+        :param window: number of latest samples kept per country
+        :type window: int
+        :param min_samples: number of samples needed to compute percentile
+        :type min_samples: int
+        """
+
+        self.window = window
+        self.min_samples = min_samples
+
+        self.__samples__ = {}
+        self.__lock__ = threading.Lock()
+
+    def observe(self, country_code, seconds):
+        """
+        Add latency sample
+        :param country_code: 2-letter country code
+        :type country_code: str
+        :param seconds: request latency
+        :type seconds: float
+        """
+
+        with self.__lock__:
+            samples = self.__samples__.get(country_code)
+
+            if samples is None:
+                samples = self.__samples__[country_code] = deque(maxlen=self.window)
+
+            samples.append(seconds)
+
+    def percentile(self, country_code, p):
+        """
+        Get latency percentile of country
+        :param country_code: 2-letter country code
+        :type country_code: str
+        :param p: percentile in range 0-100
+        :type p: float
+        :return: latency in seconds or None if there are not enough samples
+        :rtype: float or None
+        """
+
+        with self.__lock__:
+            samples = self.__samples__.get(country_code)
+
+            if not samples or len(samples) < self.min_samples:
+                return None
+
+            ordered = sorted(samples)
+
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+
+class HedgedClient:
+    """
+    Client sending duplicate lookup when the first one is slower than usual
+    for the country, the answer which comes first wins
+    """
+
+    def __init__(self, factory, percentile=95, budget=0.05, tracker=None, workers=8):
+        """
+        Construct new hedged client
+        :param factory: function returning new configured VIESAPIClient, called once per worker thread
+        :type factory: callable
+        :param percentile: latency percentile of country after which duplicate request is sent
+        :type percentile: float
+        :param budget: max number of duplicate requests as a fraction of all lookups
+        :type budget: float
+        :param tracker: latency tracker, may be shared by clients
+        :type tracker: LatencyTracker
+        :param workers: number of threads sending requests
+        :type workers: int
+        """
+
+        self.factory = factory
+        self.percentile = percentile
+        self.budget = budget
+        self.tracker = tracker if tracker else LatencyTracker()
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+        self.__executor__ = ThreadPoolExecutor(workers, thread_name_prefix='viesapi-hedge')
+        self.__lock__ = threading.Lock()
+        self.__local__ = threading.local()
+
+    def close(self):
+        """
+        Stop worker threads
+        """
+
+        self.__executor__.shutdown()
+
+    def get_vies_data(self, euvat):
+        """
+        Get VIES data for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__hedge(euvat, False)
+
+    def get_vies_data_parsed(self, euvat):
+        """
+        Get VIES data returning parsed trader address for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__hedge(euvat, True)
+
+    def get_last_error_code(self):
+        """
+        Get last error code of the calling thread
+        :return: error code
+        :rtype: int
+        """
+
+        return getattr(self.__local__, 'errcode', 0)
+
+    def get_last_error(self):
+        """
+        Get last error message of the calling thread
+        :return: unicode string
+        :rtype: str
+        """
+
+        return getattr(self.__local__, 'err', '')
+
+    def __hedge(self, euvat, parsed):
+        """
+        Send lookup and hedge it if it is slow
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :param parsed: get data with parsed trader name and address
+        :type parsed: bool
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        number = EUVAT.validate(euvat)
+
+        if not number:
+            self.__local__.errcode = Error.CLI_EUVAT
+            self.__local__.err = Error.message(Error.CLI_EUVAT)
+            return False
+
+        cc = number[0:2]
+        delay = self.tracker.percentile(cc, self.percentile)
+
+        with self.__lock__:
+            self.calls += 1
+
+        primary = self.__executor__.submit(self.__lookup, number, parsed)
+        futures = [primary]
+
+        if delay is not None:
+            done, _ = wait(futures, timeout=delay)
+
+            if not done and self.__allow_hedge():
+                futures.append(self.__executor__.submit(self.__lookup, number, parsed))
+
+        pending = set(futures)
+        failed = None
+
+        # first successful answer wins, error is returned only when all requests failed
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for f in done:
+                result, code, err = f.result()
+
+                if result:
+                    if f is not primary:
+                        with self.__lock__:
+                            self.hedge_wins += 1
+
+                    self.__local__.errcode = 0
+                    self.__local__.err = ''
+                    return result
+
+                failed = (code, err)
+
+        self.__local__.errcode, self.__local__.err = failed
+
+        return False
+
+    def __allow_hedge(self):
+        """
+        Check and consume hedging budget
+        :return: True if duplicate request may be sent
+        :rtype: bool
+        """
+
+        with self.__lock__:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+
+            self.hedges += 1
+
+            return True
+
+    def __lookup(self, number, parsed):
+        """
+        Send lookup using client of the worker thread and record its latency
+        :param number: normalized EU VAT number
+        :type number: str
+        :param parsed: get data with parsed trader name and address
+        :type parsed: bool
+        :return: tuple of result, error code and error message
+        :rtype: tuple
+        """
+
+        client = getattr(self.__local__, 'client', None)
+
+        if not client:
+            client = self.__local__.client = self.factory()
+
+        start = time.monotonic()
+        result = client.get_vies_data_parsed(number) if parsed else client.get_vies_data(number)
+
+        if result:
+            self.tracker.observe(number[0:2], time.monotonic() - start)
+
+        return result, client.get_last_error_code(), client.get_last_error()
@@ -0,0 +1,289 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import bisect
+import threading
+import time
+
+
+class RequestTiming:
+    """
+    Phase timings of a single API request (in seconds)
+    """
+
+    PHASES = ('connect', 'send', 'first_byte', 'read', 'parse', 'map')
+
+    def __init__(self, method=None, url=None):
+        self.method = method
+        self.url = url
+        self.status = None
+        self.error_code = 0
+
+        self.connect = 0.0
+        self.send = 0.0
+        self.first_byte = 0.0
+        self.read = 0.0
+        self.parse = 0.0
+        self.map = 0.0
+
+        self.__start__ = time.perf_counter()
+        self.__last__ = self.__start__
+
+    def mark(self, phase):
+        """
+        Record time elapsed since previous mark as duration of the phase
+        :param phase: phase name, one of PHASES
+        :type phase: str
+        """
+
+        now = time.perf_counter()
+        setattr(self, phase, now - self.__last__)
+        self.__last__ = now
+
+    @property
+    def total(self):
+        """
+        Total request time
+        :return: sum of all phases
+        :rtype: float
+        """
+
+        return self.connect + self.send + self.first_byte + self.read + self.parse + self.map
+
+    def __str__(self):
+        return 'RequestTiming: [method = ' + str(self.method) \
+            + ', url = ' + str(self.url) \
+            + ', status = ' + str(self.status) \
+            + ', error_code = ' + str(self.error_code) \
+            + ', connect = ' + str(self.connect) \
+            + ', send = ' + str(self.send) \
+            + ', first_byte = ' + str(self.first_byte) \
+            + ', read = ' + str(self.read) \
+            + ', parse = ' + str(self.parse) \
+            + ', map = ' + str(self.map) \
+            + ']'
+
+
+class Instrumentation:
+    """
+    Base class of client instrumentation, all hooks do nothing by default.
+    Subclass it to export metrics or tracing spans to any monitoring system.
+    """
+
+    def on_request_start(self, timing):
+        """
+        Called before request is sent
+        :param timing: timing object of the started request
+        :type timing: RequestTiming
+        """
+
+        pass
+
+    def on_request_end(self, timing):
+        """
+        Called after response was mapped to result object or request failed
+        :param timing: timing object of the finished request
+        :type timing: RequestTiming
+        """
+
+        pass
+
+    def on_retry(self, method, url, attempt, reason):
+        """
+        Called when request is retried
+        :param method: HTTP method
+        :type method: str
+        :param url: target URL
+        :type url: str
+        :param attempt: retry number, starting from 1
+        :type attempt: int
+        :param reason: retry reason
+        :type reason: str
+        """
+
+        pass
+
+    def on_cache_hit(self, key):
+        """
+        Called when result is served from cache without request
+        :param key: cache key
+        :type key: str
+        """
+
+        pass
+
+    def on_error(self, code, message):
+        """
+        Called when client sets error
+        :param code: error code as Error.xxx value
+        :type code: int
+        :param message: error message
+        :type message: str
+        """
+
+        pass
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Construct new histogram
+        :param buckets: sorted upper bounds of buckets
+        :type buckets: tuple
+        """
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Add value to histogram
+        :param value: observed value
+        :type value: float
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, p):
+        """
+        Estimate percentile as upper bound of bucket containing it
+        :param p: percentile in range 0-100
+        :type p: float
+        :return: estimated value or None if histogram is empty
+        :rtype: float or None
+        """
+
+        if self.count == 0:
+            return None
+
+        rank = self.count * p / 100.0
+        seen = 0
+
+        for i, c in enumerate(self.counts):
+            seen += c
+
+            if seen >= rank and c > 0:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+
+        return float('inf')
+
+    def __str__(self):
+        return 'Histogram: [count = ' + str(self.count) \
+            + ', sum = ' + str(self.sum) \
+            + ', p50 = ' + str(self.percentile(50)) \
+            + ', p99 = ' + str(self.percentile(99)) \
+            + ']'
+
+
+class HistogramCollector(Instrumentation):
+    """
+    In-memory collector of request phase histograms and event counters
+    """
+
+    def __init__(self, buckets=Histogram.BUCKETS):
+        """
+        Construct new collector
+        :param buckets: sorted upper bounds of histogram buckets
+        :type buckets: tuple
+        """
+
+        self.buckets = buckets
+        self.histograms = {}
+        self.requests = 0
+        self.in_flight = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.errors = {}
+
+        self.__lock__ = threading.Lock()
+
+    def on_request_start(self, timing):
+        with self.__lock__:
+            self.requests += 1
+            self.in_flight += 1
+
+    def on_request_end(self, timing):
+        with self.__lock__:
+            self.in_flight -= 1
+
+            for phase in RequestTiming.PHASES:
+                self.__observe(phase, getattr(timing, phase))
+
+            self.__observe('total', timing.total)
+
+    def on_retry(self, method, url, attempt, reason):
+        with self.__lock__:
+            self.retries += 1
+
+    def on_cache_hit(self, key):
+        with self.__lock__:
+            self.cache_hits += 1
+
+    def on_error(self, code, message):
+        with self.__lock__:
+            self.errors[code] = self.errors.get(code, 0) + 1
+
+    def histogram(self, name):
+        """
+        Get histogram of request phase
+        :param name: phase name or 'total'
+        :type name: str
+        :return: histogram or None if nothing was recorded
+        :rtype: Histogram or None
+        """
+
+        return self.histograms.get(name)
+
+    def __observe(self, name, value):
+        """
+        Add value to named histogram
+        :param name: histogram name
+        :type name: str
+        :param value: observed value
+        :type value: float
+        """
+
+        h = self.histograms.get(name)
+
+        if not h:
+            h = self.histograms[name] = Histogram(self.buckets)
+
+        h.observe(value)
+
+    def __str__(self):
+        return 'HistogramCollector: [requests = ' + str(self.requests) \
+            + ', in_flight = ' + str(self.in_flight) \
+            + ', retries = ' + str(self.retries) \
+            + ', cache_hits = ' + str(self.cache_hits) \
+            + ', errors = ' + str(self.errors) \
+            + ', histograms = {' + ', '.join(k + ': ' + str(v) for k, v in self.histograms.items()) + '}' \
+            + ']'
@@ -0,0 +1,124 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+from viesapi.responseparser import ResponseParser
+
+# orjson decodes several times faster than json module, it is used if installed,
+# decoder is imported on first use to keep package import time low
+loads = None
+
+
+class JSONResponseParser(ResponseParser):
+    """
+    Maps JSON responses of VIES API service to result objects, JSON documents have
+    the same structure and element names as XML ones with lists in place of repeated elements
+    """
+
+    @staticmethod
+    def parse(data):
+        """
+        Parse response content
+        :param data: response data
+        :type data: bytes
+        :return: JSON document
+        :rtype: dict
+        :raises Exception: if data is not valid JSON
+        """
+
+        global loads
+
+        if loads is None:
+            try:
+                from orjson import loads
+            except ImportError:
+                from json import loads
+
+        doc = loads(data)
+
+        if not isinstance(doc, dict):
+            return None
+
+        return doc
+
+    @staticmethod
+    def get_element(doc, path):
+        """
+        Get nested JSON object
+        :param doc: JSON document or object
+        :type doc: dict
+        :param path: keys of nested objects separated by slash
+        :type path: str
+        :return: object or None
+        :rtype: dict or None
+        """
+
+        for key in path.split('/'):
+            if not isinstance(doc, dict):
+                return None
+
+            doc = doc.get(key)
+
+        return doc if isinstance(doc, dict) else None
+
+    @staticmethod
+    def get_elements(doc, path, item):
+        """
+        Get list of JSON objects
+        :param doc: JSON document or object
+        :type doc: dict
+        :param path: keys of list separated by slash
+        :type path: str
+        :param item: name of list items in XML, not used
+        :type item: str
+        :return: objects
+        :rtype: list
+        """
+
+        parent, _, key = path.rpartition('/')
+        el = JSONResponseParser.get_element(doc, parent) if parent else doc
+        items = el.get(key) if el is not None else None
+
+        return [i for i in items if isinstance(i, dict)] if isinstance(items, list) else []
+
+    @staticmethod
+    def get_text(doc, path):
+        """
+        Get JSON value as text
+        :param doc: JSON document or object
+        :type doc: dict
+        :param path: keys separated by slash
+        :type path: str
+        :return: string
+        :rtype: str
+        """
+
+        parent, _, key = path.rpartition('/')
+        el = JSONResponseParser.get_element(doc, parent) if parent else doc
+        v = el.get(key) if el is not None else None
+
+        if v is None or isinstance(v, (dict, list)):
+            return ''
+
+        if isinstance(v, bool):
+            return 'true' if v else 'false'
+
+        return str(v).strip()
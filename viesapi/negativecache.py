@@ -0,0 +1,178 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import threading
+import time
+
+from viesapi import Error, VIESData, ResultCache, BloomFilter
+
+
+class NegativeCache:
+    """
+    Cache of numbers reported as invalid, so repeated lookups of bad master data are answered
+    locally. Results are kept for their own ttl, optional Bloom filter remembers invalid numbers
+    after that (for its own ttl) at the cost of rare false positives.
+    """
+
+    # server errors meaning the number itself is bad
+    ERRORS = (Error.EUVAT_BAD,)
+
+    def __init__(self, ttl=86400, max_size=100000, bloom=None, path=None):
+        """
+        Construct new cache
+        :param ttl: seconds invalid result is kept
+        :type ttl: float
+        :param max_size: max number of kept results
+        :type max_size: int
+        :param bloom: filter of known invalid numbers or None
+        :type bloom: BloomFilter
+        :param path: file the filter is loaded from and saved to, shared by processes
+        :type path: str
+        """
+
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.bloom_hits = 0
+
+        self.__results__ = ResultCache(ttl, 0, max_size, stale_while_revalidate=False, stale_if_error=False)
+        self.__bloom__ = bloom
+        self.__removed__ = {}
+        self.__lock__ = threading.Lock()
+
+        if path and bloom is not None:
+            try:
+                self.__bloom__.merge(BloomFilter.load(path))
+            except (OSError, ValueError):
+                # no filter saved yet or it has different parameters
+                pass
+
+    def get(self, number):
+        """
+        Get invalid result of number
+        :param number: normalized EU VAT number
+        :type number: str
+        :return: VIESData object with valid set to False, tuple of error code and message,
+            or None if number is not known to be invalid
+        :rtype: VIESData or tuple or None
+        """
+
+        entry = self.__results__.get(number)
+
+        if entry and self.__results__.is_fresh(entry):
+            with self.__lock__:
+                self.hits += 1
+
+            return entry.value
+
+        if self.__bloom__ is None:
+            return None
+
+        with self.__lock__:
+            if number in self.__removed__ or number not in self.__bloom__:
+                return None
+
+            self.bloom_hits += 1
+
+        # only the fact that number is invalid is known, not the full result
+        vies = VIESData()
+        vies.country_code = number[0:2]
+        vies.vat_number = number[2:]
+        vies.valid = False
+        vies.stale = True
+
+        return vies
+
+    def put(self, number, result):
+        """
+        Store result if it shows the number is invalid
+        :param number: normalized EU VAT number
+        :type number: str
+        :param result: VIESData object or tuple of error code and message
+        :type result: VIESData or tuple
+        :return: True if result was stored
+        :rtype: bool
+        """
+
+        if isinstance(result, VIESData):
+            if result.valid is not False:
+                return False
+        elif not result or result[0] not in self.ERRORS:
+            return False
+
+        self.__results__.put(number, result)
+
+        if self.__bloom__ is not None:
+            with self.__lock__:
+                self.__removed__.pop(number, None)
+                self.__bloom__.add(number)
+
+        return True
+
+    def invalidate(self, number):
+        """
+        Remove kept result of number, Bloom filter hits of the number are ignored until it is stored
+        again. Items cannot be removed from the filter itself, so in other processes sharing its file
+        the number is remembered until its generation of the filter expires.
+        :param number: normalized EU VAT number
+        :type number: str
+        """
+
+        self.__results__.invalidate(number)
+
+        if self.__bloom__ is None:
+            return
+
+        with self.__lock__:
+            now = time.time()
+            removed = self.__removed__
+
+            removed.pop(number, None)
+            removed[number] = now
+
+            # filter forgets numbers after two generations, oldest removals are dropped first
+            expired = now - 2 * self.__bloom__.ttl if self.__bloom__.ttl else None
+
+            while removed:
+                oldest = next(iter(removed))
+
+                if len(removed) <= self.max_size and (expired is None or removed[oldest] > expired):
+                    break
+
+                del removed[oldest]
+
+    def save(self):
+        """
+        Save Bloom filter merged with the one saved by other processes
+        """
+
+        if not self.path or self.__bloom__ is None:
+            return
+
+        with self.__lock__:
+            self.__bloom__.save(self.path)
+
+    def __str__(self):
+        return 'NegativeCache: [size = ' + str(len(self.__results__)) \
+            + ', hits = ' + str(self.hits) \
+            + ', bloom_hits = ' + str(self.bloom_hits) \
+            + ']'
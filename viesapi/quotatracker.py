@@ -0,0 +1,313 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import copy
+import datetime
+import json
+import os
+import threading
+import time
+
+from viesapi import Error, AccountStatus
+
+
+class QuotaTracker:
+    """
+    Account status cache shared by clients using the same API key. Requests sent between
+    status refreshes are counted locally, so calls exceeding the billing plan limit or using
+    functions not included in the plan are refused without sending them.
+    """
+
+    def __init__(self, ttl=60.0, reserve=0, timeout=0.0, path=None, save_every=100):
+        """
+        Construct new tracker
+        :param ttl: seconds account status is cached
+        :type ttl: float
+        :param reserve: number of requests kept unused below plan limit
+        :type reserve: int
+        :param timeout: seconds calls over the limit wait for refreshed status showing free quota,
+            0 to refuse them at once
+        :type timeout: float
+        :param path: JSON file the status and local counters are kept in, so short-lived
+            processes do not fetch the status on start
+        :type path: str
+        :param save_every: number of counted requests after which the file is updated
+        :type save_every: int
+        """
+
+        self.ttl = ttl
+        self.reserve = reserve
+        self.timeout = timeout
+        self.path = path
+        self.save_every = save_every
+
+        self.refreshes = 0
+        self.refused = 0
+
+        self.__lock__ = threading.Lock()
+        self.__fetched_cond__ = threading.Condition(self.__lock__)
+        self.__refreshing__ = False
+        self.__status__ = None
+        self.__fetched__ = 0.0
+        self.__used__ = 0
+        self.__used_parsed__ = 0
+        self.__unsaved__ = 0
+
+        if path:
+            self.__load()
+
+    def status(self, fetch):
+        """
+        Get account status with requests counted since last refresh included
+        :param fetch: function downloading account status, returning AccountStatus or False
+        :type fetch: callable
+        :return: AccountStatus object or False if it could not be downloaded
+        :rtype: AccountStatus or False
+        """
+
+        if not self.__refresh(fetch):
+            return False
+
+        with self.__lock__:
+            status = copy.copy(self.__status__)
+            status.vies_data_count += self.__used__
+            status.vies_data_parsed_count += self.__used_parsed__
+            status.total_count += self.__used__ + self.__used_parsed__
+
+            return status
+
+    def acquire(self, cost=1, parsed=False, fetch=None):
+        """
+        Count requests about to be sent
+        :param cost: number of requests (numbers in batch)
+        :type cost: int
+        :param parsed: requests get parsed VIES data
+        :type parsed: bool
+        :param fetch: function downloading account status, returning AccountStatus or False
+        :type fetch: callable
+        :return: tuple of error code and description if requests must not be sent or None
+        :rtype: tuple or None
+        """
+
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            known = self.__refresh(fetch)
+
+            with self.__lock__:
+                # status is not known, requests are not held back by the tracker
+                if not known:
+                    return self.__count(cost, parsed)
+
+                status = self.__status__
+
+                if parsed and not status.func_get_vies_data_parsed or not parsed and not status.func_get_vies_data:
+                    self.refused += 1
+                    return Error.PLAN_FEATURE, 'Function is not available in billing plan ' \
+                        + str(status.billing_plan_name)
+
+                if status.over_plan_allowed or cost <= self.__remaining():
+                    return self.__count(cost, parsed)
+
+                # status is checked again after it expires, at most once a second if download fails
+                wait = max(self.__fetched__ + self.ttl - time.monotonic(), 1.0)
+
+            if time.monotonic() + wait > deadline:
+                with self.__lock__:
+                    self.refused += 1
+
+                return Error.DB_AUTH_OVER_PLAN, 'Request limit of billing plan reached'
+
+            time.sleep(wait)
+
+    def remaining(self):
+        """
+        Get number of requests which can be sent before plan limit is reached
+        :return: number of requests or None if account status is not known yet
+        :rtype: int or None
+        """
+
+        with self.__lock__:
+            if not self.__status__:
+                return None
+
+            return self.__remaining()
+
+    def invalidate(self):
+        """
+        Force status download on next call
+        """
+
+        with self.__lock__:
+            self.__fetched__ = 0.0
+
+    def close(self):
+        """
+        Save state to file
+        """
+
+        with self.__lock__:
+            if self.path and self.__status__:
+                self.__save()
+
+    def __refresh(self, fetch):
+        """
+        Download status if cached one expired, status is downloaded by one thread without holding the lock,
+        other threads use expired status meanwhile or wait for it if there is none yet
+        :param fetch: function downloading account status
+        :type fetch: callable
+        :return: True if status is known
+        :rtype: bool
+        """
+
+        with self.__lock__:
+            if self.__status__ and time.monotonic() - self.__fetched__ < self.ttl:
+                return True
+
+            if self.__refreshing__ or not fetch:
+                while self.__refreshing__ and not self.__status__:
+                    self.__fetched_cond__.wait()
+
+                return self.__status__ is not None
+
+            self.__refreshing__ = True
+
+            # requests counted while status is downloaded are not included in it
+            used = self.__used__
+            used_parsed = self.__used_parsed__
+
+        status = False
+
+        try:
+            status = fetch()
+        finally:
+            with self.__lock__:
+                self.__refreshing__ = False
+                self.__fetched_cond__.notify_all()
+
+                if status:
+                    self.__status__ = status
+                    self.__fetched__ = time.monotonic()
+                    self.__used__ -= used
+                    self.__used_parsed__ -= used_parsed
+                    self.refreshes += 1
+
+                    if self.path:
+                        self.__save()
+
+                known = self.__status__ is not None
+
+        return known
+
+    def __remaining(self):
+        """
+        Get number of requests left, must be called with lock held
+        :return: number of requests
+        :rtype: int
+        """
+
+        status = self.__status__
+
+        return status.limit - status.total_count - self.__used__ - self.__used_parsed__ - self.reserve
+
+    def __count(self, cost, parsed):
+        """
+        Count requests, must be called with lock held
+        :return: None
+        :rtype: None
+        """
+
+        if parsed:
+            self.__used_parsed__ += cost
+        else:
+            self.__used__ += cost
+
+        self.__unsaved__ += cost
+
+        if self.path and self.__status__ and self.__unsaved__ >= self.save_every:
+            self.__save()
+
+        return None
+
+    def __save(self):
+        """
+        Write status and counters to file, must be called with lock held. Failure is logged,
+        tracking goes on in memory.
+        """
+
+        state = dict((k, v.isoformat() if isinstance(v, datetime.datetime) else v)
+                     for k, v in vars(self.__status__).items())
+
+        data = {
+            'age': time.monotonic() - self.__fetched__,
+            'saved': time.time(),
+            'used': self.__used__,
+            'used_parsed': self.__used_parsed__,
+            'status': state
+        }
+
+        # processes sharing the file write their own temporary files
+        tmp = self.path + '.' + str(os.getpid()) + '.tmp'
+
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+
+            os.replace(tmp, self.path)
+        except OSError as e:
+            import logging
+            logging.getLogger(__name__).warning('Quota state could not be saved to %s: %s', self.path, e)
+
+        self.__unsaved__ = 0
+
+    def __load(self):
+        """
+        Read status and counters saved by previous process if they are not expired
+        """
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+
+            age = data['age'] + max(0.0, time.time() - data['saved'])
+
+            if age >= self.ttl:
+                return
+
+            status = AccountStatus()
+
+            for k, v in data['status'].items():
+                setattr(status, k, datetime.datetime.fromisoformat(v) if k == 'valid_to' and v else v)
+
+            self.__status__ = status
+            self.__fetched__ = time.monotonic() - age
+            self.__used__ = data['used']
+            self.__used_parsed__ = data['used_parsed']
+        except (OSError, ValueError, KeyError):
+            # missing or damaged file, status is downloaded on first use
+            pass
+
+    def __str__(self):
+        return 'QuotaTracker: [remaining = ' + str(self.remaining()) \
+            + ', refreshes = ' + str(self.refreshes) \
+            + ', refused = ' + str(self.refused) \
+            + ']'
@@ -0,0 +1,311 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import heapq
+import itertools
+import threading
+import time
+
+from concurrent.futures import Future
+
+
+class RequestScheduler:
+    """
+    Shares one client configuration between tenants, running requests by priority class,
+    with weighted fair queuing across tenants within a class, under global rate limit
+    and concurrency cap
+    """
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+    def __init__(self, factory, concurrency=4, rate=None, burst=1, weights=None, reserved=1):
+        """
+        Construct new scheduler
+        :param factory: function returning new configured VIESAPIClient, called once per worker thread
+        :type factory: callable
+        :param concurrency: max number of requests running at once
+        :type concurrency: int
+        :param rate: max requests per second, None for no limit
+        :type rate: float
+        :param burst: max number of requests sent at once when rate limit allows
+        :type burst: int
+        :param weights: tenant name mapped to its share weight, unknown tenants have weight 1
+        :type weights: dict
+        :param reserved: number of workers which run only INTERACTIVE requests
+        :type reserved: int
+        """
+
+        self.factory = factory
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.weights = dict(weights) if weights else {}
+        self.reserved = min(reserved, concurrency - 1)
+
+        self.__queues__ = {}
+        self.__finish__ = {}
+        self.__virtual__ = {}
+        self.__seq__ = itertools.count()
+        self.__tokens__ = float(burst)
+        self.__refilled__ = time.monotonic()
+        self.__running__ = 0
+        self.__closed__ = False
+        self.__cond__ = threading.Condition()
+        self.__local__ = threading.local()
+        self.__workers__ = []
+
+        for i in range(concurrency):
+            t = threading.Thread(target=self.__work, name='viesapi-scheduler-' + str(i), daemon=True)
+            t.start()
+            self.__workers__.append(t)
+
+    def submit(self, func, tenant='default', priority=NORMAL, cost=1):
+        """
+        Queue request
+        :param func: function taking client object and returning request result
+        :type func: callable
+        :param tenant: tenant name
+        :type tenant: str
+        :param priority: priority class, INTERACTIVE, NORMAL or BULK
+        :type priority: int
+        :param cost: request cost used for fair sharing, e.g. number of numbers in batch
+        :type cost: float
+        :return: future resolved with tuple of result, error code and error message
+        :rtype: Future
+        """
+
+        future = Future()
+
+        with self.__cond__:
+            if self.__closed__:
+                raise RuntimeError('Scheduler is closed')
+
+            # finish tag of weighted fair queuing: tenant's previous tag or current virtual time plus weighted cost
+            virtual = self.__virtual__.get(priority, 0.0)
+            start = max(virtual, self.__finish__.get((priority, tenant), 0.0))
+            finish = start + cost / float(self.weights.get(tenant, 1))
+            self.__finish__[(priority, tenant)] = finish
+
+            heapq.heappush(self.__queues__.setdefault(priority, []), (finish, next(self.__seq__), func, future))
+            self.__cond__.notify_all()
+
+        return future
+
+    def get_vies_data(self, euvat, tenant='default', priority=INTERACTIVE):
+        """
+        Get VIES data for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :param tenant: tenant name
+        :type tenant: str
+        :param priority: priority class
+        :type priority: int
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data(euvat), tenant, priority, 1)
+
+    def get_vies_data_parsed(self, euvat, tenant='default', priority=INTERACTIVE):
+        """
+        Get VIES data returning parsed trader address for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :param tenant: tenant name
+        :type tenant: str
+        :param priority: priority class
+        :type priority: int
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data_parsed(euvat), tenant, priority, 1)
+
+    def get_vies_data_async(self, numbers, tenant='default', priority=BULK):
+        """
+        Upload batch of VAT numbers
+        :param numbers: Array of EU VAT numbers with 2-letter country prefix
+        :type numbers: list
+        :param tenant: tenant name
+        :type tenant: str
+        :param priority: priority class
+        :type priority: int
+        :return: Batch token or False
+        :rtype: str or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data_async(numbers), tenant, priority, len(numbers))
+
+    def get_vies_data_async_result(self, token, tenant='default', priority=BULK):
+        """
+        Check batch result and download data
+        :param token: Batch token received from get_vies_data_async function
+        :type token: str
+        :param tenant: tenant name
+        :type tenant: str
+        :param priority: priority class
+        :type priority: int
+        :return: Batch result or False
+        :rtype: BatchResult or False
+        """
+
+        return self.__call(lambda c: c.get_vies_data_async_result(token), tenant, priority, 1)
+
+    def get_last_error_code(self):
+        """
+        Get last error code of the calling thread
+        :return: error code
+        :rtype: int
+        """
+
+        return getattr(self.__local__, 'errcode', 0)
+
+    def get_last_error(self):
+        """
+        Get last error message of the calling thread
+        :return: unicode string
+        :rtype: str
+        """
+
+        return getattr(self.__local__, 'err', '')
+
+    def pending(self):
+        """
+        Get number of queued requests
+        :return: number of requests
+        :rtype: int
+        """
+
+        with self.__cond__:
+            return sum(len(q) for q in self.__queues__.values())
+
+    def close(self):
+        """
+        Stop workers after queued requests are done
+        """
+
+        with self.__cond__:
+            self.__closed__ = True
+            self.__cond__.notify_all()
+
+        for t in self.__workers__:
+            t.join()
+
+    def __call(self, func, tenant, priority, cost):
+        """
+        Queue request and wait for its result
+        :return: request result
+        """
+
+        result, self.__local__.errcode, self.__local__.err = self.submit(func, tenant, priority, cost).result()
+
+        return result
+
+    def __next(self, interactive_only):
+        """
+        Pop next request: lowest priority class first, then lowest finish tag
+        :param interactive_only: take only INTERACTIVE requests
+        :type interactive_only: bool
+        :return: queue item or None
+        :rtype: tuple or None
+        """
+
+        for priority in sorted(self.__queues__):
+            if interactive_only and priority != self.INTERACTIVE:
+                break
+
+            queue = self.__queues__[priority]
+
+            if queue:
+                item = heapq.heappop(queue)
+                self.__virtual__[priority] = item[0]
+
+                return item
+
+        return None
+
+    def __take_token(self):
+        """
+        Take rate limit token
+        :return: seconds to wait for token, 0 if token was taken
+        :rtype: float
+        """
+
+        if not self.rate:
+            return 0.0
+
+        now = time.monotonic()
+        self.__tokens__ = min(float(self.burst), self.__tokens__ + (now - self.__refilled__) * self.rate)
+        self.__refilled__ = now
+
+        if self.__tokens__ >= 1.0:
+            self.__tokens__ -= 1.0
+            return 0.0
+
+        return (1.0 - self.__tokens__) / self.rate
+
+    def __work(self):
+        """
+        Worker thread loop
+        """
+
+        client = self.factory()
+
+        while True:
+            with self.__cond__:
+                while True:
+                    # some workers are kept free so interactive requests never wait behind bulk ones
+                    interactive_only = self.__running__ >= self.concurrency - self.reserved
+                    ready = any(self.__queues__.get(p) for p in self.__queues__
+                                if not interactive_only or p == self.INTERACTIVE)
+
+                    if not ready:
+                        if self.__closed__ and not any(self.__queues__.values()):
+                            return
+
+                        self.__cond__.wait()
+                        continue
+
+                    delay = self.__take_token()
+
+                    if delay > 0:
+                        self.__cond__.wait(delay)
+                        continue
+
+                    item = self.__next(interactive_only)
+                    self.__running__ += 1
+                    break
+
+            _, _, func, future = item
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    result = func(client)
+                    future.set_result((result, client.get_last_error_code(), client.get_last_error()))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.__cond__:
+                    self.__running__ -= 1
+                    self.__cond__.notify_all()
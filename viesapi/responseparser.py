@@ -0,0 +1,411 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import threading
+
+from viesapi import VIESData, VIESError, BatchResult, AccountStatus, NameComponents, AddressComponents
+
+# lxml and dateutil are imported on first use to keep package import time low
+
+
+class ResponseParser:
+    """
+    Maps XML responses of VIES API service to result objects. Mapping is written in terms of element paths
+    and get_* access methods, so parsers of other formats with the same structure only override these.
+    """
+
+    # lxml parsers must not be shared between threads, each thread creates its own on first use
+    __local__ = threading.local()
+
+    @staticmethod
+    def parse(data):
+        """
+        Parse response content
+        :param data: response data
+        :type data: bytes
+        :return: XML document
+        :rtype: ElementTree
+        :raises Exception: if data is not well-formed XML
+        """
+
+        from lxml import etree
+
+        parser = getattr(ResponseParser.__local__, 'parser', None)
+
+        if parser is None:
+            parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False, load_dtd=False, no_network=True)
+            ResponseParser.__local__.parser = parser
+
+        return etree.fromstring(data, parser).getroottree()
+
+    @classmethod
+    def error(cls, doc):
+        """
+        Get error reported by the service
+        :param doc: parsed document
+        :type doc: ElementTree or dict
+        :return: tuple of error code and description or None
+        :rtype: tuple or None
+        """
+
+        code = cls.get_text(doc, 'result/error/code')
+
+        if len(code) == 0:
+            return None
+
+        return int(code), cls.get_text(doc, 'result/error/description')
+
+    @classmethod
+    def vies_data(cls, doc):
+        """
+        Map VIES data response
+        :param doc: parsed document
+        :type doc: ElementTree or dict
+        :return: VIESData object or None
+        :rtype: VIESData or None
+        """
+
+        el = cls.get_element(doc, 'result/vies')
+
+        if el is None:
+            return None
+
+        return cls.vies_data_element(el)
+
+    @classmethod
+    def vies_data_element(cls, el):
+        """
+        Map vies element, including parsed name and address components if present
+        :param el: vies element
+        :type el: Element or dict
+        :return: VIESData object
+        :rtype: VIESData
+        """
+
+        get_text = cls.get_text
+
+        vies = VIESData()
+
+        vies.uid = get_text(el, 'uid')
+
+        vies.country_code = get_text(el, 'countryCode')
+        vies.vat_number = get_text(el, 'vatNumber')
+        vies.valid = cls.get_bool(el, 'valid')
+        vies.trader_name = get_text(el, 'traderName')
+
+        name = get_text(el, 'traderNameComponents/name')
+
+        if name and len(name) > 0:
+            nc = NameComponents()
+            nc.name = name
+            nc.legal_form = get_text(el, 'traderNameComponents/legalForm')
+            nc.legal_form_canonical_id = int(get_text(el, 'traderNameComponents/legalFormCanonicalId'))
+            nc.legal_form_canonical_name = get_text(el, 'traderNameComponents/legalFormCanonicalName')
+
+            vies.trader_name_components = nc
+
+        vies.trader_company_type = get_text(el, 'traderCompanyType')
+        vies.trader_address = get_text(el, 'traderAddress')
+
+        country = get_text(el, 'traderAddressComponents/country')
+
+        if country and len(country) > 0:
+            ac = AddressComponents()
+            ac.country = country
+            ac.postal_code = get_text(el, 'traderAddressComponents/postalCode')
+            ac.city = get_text(el, 'traderAddressComponents/city')
+            ac.street = get_text(el, 'traderAddressComponents/street')
+            ac.street_number = get_text(el, 'traderAddressComponents/streetNumber')
+            ac.house_number = get_text(el, 'traderAddressComponents/houseNumber')
+
+            vies.trader_address_components = ac
+
+        vies.id = get_text(el, 'id')
+        vies.date = cls.get_date(el, 'date')
+        vies.source = get_text(el, 'source')
+
+        return vies
+
+    @classmethod
+    def vies_error_element(cls, el):
+        """
+        Map batch error element
+        :param el: error element
+        :type el: Element or dict
+        :return: VIESError object
+        :rtype: VIESError
+        """
+
+        get_text = cls.get_text
+
+        ve = VIESError()
+        ve.uid = get_text(el, 'uid')
+        ve.country_code = get_text(el, 'countryCode')
+        ve.vat_number = get_text(el, 'vatNumber')
+        ve.error = get_text(el, 'error')
+        ve.date = cls.get_date(el, 'date')
+        ve.source = get_text(el, 'source')
+
+        return ve
+
+    @classmethod
+    def batch_token(cls, doc):
+        """
+        Get token of uploaded batch
+        :param doc: parsed document
+        :type doc: ElementTree or dict
+        :return: batch token or empty string
+        :rtype: str
+        """
+
+        return cls.get_text(doc, 'result/batch/token')
+
+    @classmethod
+    def batch_result(cls, doc):
+        """
+        Map batch result response
+        :param doc: parsed document
+        :type doc: ElementTree or dict
+        :return: batch result
+        :rtype: BatchResult
+        """
+
+        br = BatchResult()
+
+        for el in cls.get_elements(doc, 'result/batch/numbers', 'vies'):
+            if len(cls.get_text(el, 'uid')) == 0:
+                break
+
+            br.numbers.append(cls.vies_data_element(el))
+
+        for el in cls.get_elements(doc, 'result/batch/errors', 'error'):
+            if len(cls.get_text(el, 'uid')) == 0:
+                break
+
+            br.errors.append(cls.vies_error_element(el))
+
+        return br
+
+    @classmethod
+    def account_status(cls, doc):
+        """
+        Map account status response
+        :param doc: parsed document
+        :type doc: ElementTree or dict
+        :return: AccountStatus object or None
+        :rtype: AccountStatus or None
+        """
+
+        el = cls.get_element(doc, 'result/account')
+
+        if el is None:
+            return None
+
+        get_text = cls.get_text
+        get_bool = cls.get_bool
+
+        status = AccountStatus()
+
+        status.uid = get_text(el, 'uid')
+        status.type = get_text(el, 'type')
+        status.valid_to = cls.get_date_time(el, 'validTo')
+        status.billing_plan_name = get_text(el, 'billingPlan/name')
+
+        status.subscription_price = float('0' + get_text(el, 'billingPlan/subscriptionPrice'))
+        status.item_price = float('0' + get_text(el, 'billingPlan/itemPrice'))
+        status.item_price_status = float('0' + get_text(el, 'billingPlan/itemPriceCheckStatus'))
+        status.item_price_parsed = float('0' + get_text(el, 'billingPlan/itemPriceStatusParsed'))
+
+        status.limit = int(get_text(el, 'billingPlan/limit'))
+        status.request_delay = int(get_text(el, 'billingPlan/requestDelay'))
+        status.domain_limit = int(get_text(el, 'billingPlan/domainLimit'))
+        status.over_plan_allowed = get_bool(el, 'billingPlan/overplanAllowed')
+        status.excel_addin = get_bool(el, 'billingPlan/excelAddin')
+
+        status.app = get_bool(el, 'billingPlan/app')
+        status.cli = get_bool(el, 'billingPlan/cli')
+        status.stats = get_bool(el, 'billingPlan/stats')
+        status.monitor = get_bool(el, 'billingPlan/monitor')
+
+        status.func_get_vies_data = get_bool(el, 'billingPlan/funcGetVIESData')
+        status.func_get_vies_data_parsed = get_bool(el, 'billingPlan/funcGetVIESDataParsed')
+
+        status.vies_data_count = int(get_text(el, 'requests/viesData'))
+        status.vies_data_parsed_count = int(get_text(el, 'requests/viesDataParsed'))
+        status.total_count = int(get_text(el, 'requests/total'))
+
+        return status
+
+    @staticmethod
+    def xpath(doc, path):
+        """
+        Convert element path to xpath, absolute for documents and relative for elements
+        :param doc: etree document or element
+        :type doc: tree
+        :param path: element names separated by slash
+        :type path: str
+        :return: xpath string
+        :rtype: str
+        """
+
+        return '/' + path if hasattr(doc, 'getroot') else path
+
+    @staticmethod
+    def get_element(doc, path):
+        """
+        Get single XML element
+        :param doc: etree document or element
+        :type doc: tree
+        :param path: element names separated by slash
+        :type path: str
+        :return: element or None
+        :rtype: Element or None
+        """
+
+        s = doc.xpath(ResponseParser.xpath(doc, path))
+
+        if not s or len(s) != 1:
+            return None
+
+        return s[0]
+
+    @staticmethod
+    def get_elements(doc, path, item):
+        """
+        Get list of XML elements
+        :param doc: etree document or element
+        :type doc: tree
+        :param path: path of list element
+        :type path: str
+        :param item: name of list items
+        :type item: str
+        :return: elements
+        :rtype: list
+        """
+
+        return doc.xpath(ResponseParser.xpath(doc, path + '/' + item))
+
+    @staticmethod
+    def get_text(doc, path):
+        """
+        Get XML element as text
+        :param doc: etree document or element
+        :type doc: tree
+        :param path: element names separated by slash
+        :type path: str
+        :return: string
+        :rtype: str
+        """
+
+        s = doc.xpath(ResponseParser.xpath(doc, path + '/text()'), smart_strings=False)
+
+        if not s:
+            return ''
+
+        if len(s) != 1:
+            return ''
+
+        return str(s[0].strip())
+
+    @classmethod
+    def get_bool(cls, doc, path):
+        """
+        Get element as boolean
+        :param doc: parsed document or element
+        :type doc: tree or dict
+        :param path: element names separated by slash
+        :type path: str
+        :return: boolean
+        :rtype: bool
+        """
+
+        return cls.get_text(doc, path) == 'true'
+
+    @classmethod
+    def get_date_time(cls, doc, path):
+        """
+        Get element as date time object
+        :param doc: parsed document or element
+        :type doc: tree or dict
+        :param path: element names separated by slash
+        :type path: str
+        :return: datetime
+        :rtype: datetime or None
+        """
+
+        return ResponseParser.date_time(cls.get_text(doc, path))
+
+    @classmethod
+    def get_date(cls, doc, path):
+        """
+        Get element as date object
+        :param doc: parsed document or element
+        :type doc: tree or dict
+        :param path: element names separated by slash
+        :type path: str
+        :return: datetime
+        :rtype: datetime or None
+        """
+
+        return ResponseParser.date(cls.get_text(doc, path))
+
+    @staticmethod
+    def date_time(s):
+        """
+        Convert xsd:dateTime string to date time object
+        :param s: date time string
+        :type s: str
+        :return: datetime
+        :rtype: datetime or None
+        """
+
+        if len(s) == 0:
+            return None
+
+        from dateutil.parser import parse
+
+        return parse(s)
+
+    @staticmethod
+    def date(s):
+        """
+        Convert xsd:date string to date object
+        :param s: date string
+        :type s: str
+        :return: datetime
+        :rtype: datetime or None
+        """
+
+        sl = len(s)
+
+        if sl == 0:
+            return None
+        elif sl == 11:
+            # dateutil does not support xsd:date type in form YYYY-MM-DDZ
+            s = s[0:10] + 'T00:00:00Z'
+        elif sl == 16:
+            # dateutil does not support xsd:date type in form YYYY-MM-DD+00:00
+            s = s[0:10] + 'T00:00:00' + s[10:]
+
+        from dateutil.parser import parse
+
+        return parse(s)
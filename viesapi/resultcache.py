@@ -0,0 +1,346 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CacheEntry:
+    """
+    Cached result
+    """
+
+    def __init__(self, value, stored):
+        self.value = value
+        self.stored = stored
+        self.hits = 0
+        self.refreshing = False
+        self.refreshed = False
+
+    def __str__(self):
+        return 'CacheEntry: [value = ' + str(self.value) \
+            + ', stored = ' + str(self.stored) \
+            + ', hits = ' + str(self.hits) \
+            + ', refreshing = ' + str(self.refreshing) \
+            + ']'
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of lookup results with stale-while-revalidate and stale-if-error policies
+    and refresh-ahead of frequently used entries
+    """
+
+    def __init__(self, ttl=3600, stale_ttl=86400, max_size=100000, stale_while_revalidate=True,
+                 stale_if_error=True, workers=2, refresh_ahead=0.0, hot_hits=2, batch_window=0.5):
+        """
+        Construct new cache
+        :param ttl: seconds after which entry is stale
+        :type ttl: float
+        :param stale_ttl: seconds after ttl during which stale entry may still be served
+        :type stale_ttl: float
+        :param max_size: max number of entries
+        :type max_size: int
+        :param stale_while_revalidate: serve stale entry immediately and refresh it in background
+        :type stale_while_revalidate: bool
+        :param stale_if_error: serve stale entry when service is unavailable
+        :type stale_if_error: bool
+        :param workers: number of background refresh threads
+        :type workers: int
+        :param refresh_ahead: fraction of ttl after which hot entry is refreshed before it expires, 0 disables
+        :type refresh_ahead: float
+        :param hot_hits: number of hits since entry was stored making it hot
+        :type hot_hits: int
+        :param batch_window: seconds refresh-ahead requests are collected to be sent together
+        :type batch_window: float
+        """
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.workers = workers
+        self.refresh_ahead = refresh_ahead
+        self.hot_hits = hot_hits
+        self.batch_window = batch_window
+
+        # refresh-ahead metrics
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_hits = 0
+
+        self.__entries__ = OrderedDict()
+        self.__pending__ = []
+        self.__flushing__ = False
+        self.__lock__ = threading.Lock()
+        self.__executor__ = None
+
+    def __len__(self):
+        return len(self.__entries__)
+
+    def get(self, key):
+        """
+        Get entry which is fresh or may be served stale
+        :param key: cache key
+        :type key: str
+        :return: cache entry or None
+        :rtype: CacheEntry or None
+        """
+
+        now = time.monotonic()
+
+        with self.__lock__:
+            entry = self.__entries__.get(key)
+
+            if not entry:
+                return None
+
+            if now - entry.stored > self.ttl + self.stale_ttl:
+                del self.__entries__[key]
+                return None
+
+            entry.hits += 1
+            self.__entries__.move_to_end(key)
+
+            if entry.refreshed:
+                # first hit of proactively refreshed entry, the refresh avoided a cold miss
+                entry.refreshed = False
+                self.refresh_hits += 1
+
+            return entry
+
+    def put(self, key, value):
+        """
+        Store value
+        :param key: cache key
+        :type key: str
+        :param value: cached value
+        :type value: Any
+        """
+
+        with self.__lock__:
+            entry = CacheEntry(value, time.monotonic())
+            self.__entries__[key] = entry
+            self.__entries__.move_to_end(key)
+
+            while len(self.__entries__) > self.max_size:
+                self.__entries__.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Remove entry
+        :param key: cache key
+        :type key: str
+        """
+
+        with self.__lock__:
+            self.__entries__.pop(key, None)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+
+        with self.__lock__:
+            self.__entries__.clear()
+
+    def age(self, entry):
+        """
+        Get age of entry
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :return: seconds since entry was stored
+        :rtype: float
+        """
+
+        return time.monotonic() - entry.stored
+
+    def is_fresh(self, entry):
+        """
+        Check if entry is younger than ttl
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :return: True if entry is fresh
+        :rtype: bool
+        """
+
+        return self.age(entry) <= self.ttl
+
+    def refresh(self, key, entry, func):
+        """
+        Refresh entry in background unless refresh is already running
+        :param key: cache key
+        :type key: str
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :param func: function returning new value or False on failure
+        :type func: callable
+        :return: True if refresh was started
+        :rtype: bool
+        """
+
+        with self.__lock__:
+            if entry.refreshing:
+                return False
+
+            entry.refreshing = True
+
+            if not self.__executor__:
+                self.__executor__ = ThreadPoolExecutor(self.workers, thread_name_prefix='viesapi-cache')
+
+            executor = self.__executor__
+
+        future = executor.submit(self.__refresh, key, entry, func)
+        future.add_done_callback(lambda f: self.__cancelled(entry, f))
+
+        return True
+
+    def needs_refresh(self, entry):
+        """
+        Check if fresh entry is hot and close enough to expiry to be refreshed ahead
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :return: True if entry should be refreshed
+        :rtype: bool
+        """
+
+        return self.refresh_ahead > 0 and not entry.refreshing and entry.hits >= self.hot_hits \
+            and self.age(entry) >= self.ttl * self.refresh_ahead
+
+    def schedule(self, key, entry, item, func):
+        """
+        Queue entry for refresh together with other entries queued within batch window
+        :param key: cache key
+        :type key: str
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :param item: data needed to refresh entry, passed to func
+        :type item: Any
+        :param func: function taking list of (key, item) tuples and returning new values by key
+        :type func: callable
+        :return: True if entry was queued
+        :rtype: bool
+        """
+
+        with self.__lock__:
+            if entry.refreshing:
+                return False
+
+            entry.refreshing = True
+            self.__pending__.append((key, entry, item))
+
+            if self.__flushing__:
+                return True
+
+            self.__flushing__ = True
+
+        # batch refresh may wait minutes for its result, it runs on its own daemon thread so it neither
+        # delays stale-while-revalidate refreshes nor keeps interpreter from exiting
+        threading.Thread(target=self.__flush, args=(func,), name='viesapi-cache-batch', daemon=True).start()
+
+        return True
+
+    @property
+    def refresh_hit_ratio(self):
+        """
+        Get fraction of refresh-ahead requests whose result was used before it expired
+        :return: ratio in range 0-1 or None if nothing was refreshed
+        :rtype: float or None
+        """
+
+        if self.refreshes == 0:
+            return None
+
+        return self.refresh_hits / float(self.refreshes)
+
+    def close(self):
+        """
+        Cancel queued refreshes, wait for running ones and stop background threads. Running batched
+        refresh-ahead is not waited for, its daemon thread is abandoned at interpreter exit.
+        """
+
+        with self.__lock__:
+            executor = self.__executor__
+            self.__executor__ = None
+
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    def __cancelled(self, entry, future):
+        """
+        Allow entry whose refresh was cancelled by close to be refreshed again
+        """
+
+        if future.cancelled():
+            entry.refreshing = False
+
+    def __refresh(self, key, entry, func):
+        """
+        Call refresh function and store its result
+        """
+
+        try:
+            value = func()
+
+            if value:
+                self.put(key, value)
+        finally:
+            entry.refreshing = False
+
+    def __flush(self, func):
+        """
+        Refresh entries queued during batch window
+        """
+
+        time.sleep(self.batch_window)
+
+        with self.__lock__:
+            pending = self.__pending__
+            self.__pending__ = []
+            self.__flushing__ = False
+
+        try:
+            values = func([(key, item) for key, _, item in pending])
+        except Exception:
+            values = {}
+
+        for key, entry, _ in pending:
+            value = values.get(key)
+
+            if value:
+                self.put(key, value)
+
+                with self.__lock__:
+                    self.refreshes += 1
+                    new = self.__entries__.get(key)
+
+                    if new:
+                        new.refreshed = True
+            else:
+                with self.__lock__:
+                    self.refresh_failures += 1
+
+            entry.refreshing = False
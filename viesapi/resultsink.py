@@ -0,0 +1,314 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import csv
+import json
+import queue
+import sqlite3
+import threading
+
+from viesapi import VIESData, VIESError
+
+
+class ResultSink:
+    """
+    Destination of validation results, results are written out as batches complete
+    so they do not have to be kept in memory
+    """
+
+    FIELDS = ('number', 'country_code', 'vat_number', 'valid', 'trader_name', 'trader_company_type',
+              'trader_address', 'id', 'date', 'source', 'uid', 'error')
+
+    def write(self, number, record):
+        """
+        Write result of number
+        :param number: input number
+        :type number: str
+        :param record: VIESData object, VIESError object or error message
+        :type record: VIESData or VIESError or str
+        """
+
+        pass
+
+    def write_batch(self, result, numbers=None):
+        """
+        Write all records of batch result
+        :param result: batch result
+        :type result: BatchResult
+        :param numbers: input numbers the batch was submitted with, records are written in their order
+        :type numbers: list or BatchRequest
+        """
+
+        for number, record in result.items(numbers):
+            self.write(number, record if record is not None else 'No result returned for number')
+
+    def flush(self):
+        """
+        Flush written results
+        """
+
+        pass
+
+    def close(self):
+        """
+        Flush written results and release resources
+        """
+
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def row(number, record):
+        """
+        Convert result to flat row
+        :param number: input number
+        :type number: str
+        :param record: VIESData object, VIESError object or error message
+        :type record: VIESData or VIESError or str
+        :return: row with FIELDS keys
+        :rtype: dict
+        """
+
+        row = dict.fromkeys(ResultSink.FIELDS, '')
+        row['number'] = number
+        row['valid'] = False
+
+        if isinstance(record, VIESData):
+            row.update(country_code=record.country_code, vat_number=record.vat_number, valid=record.valid,
+                       trader_name=record.trader_name, trader_company_type=record.trader_company_type,
+                       trader_address=record.trader_address, id=record.id, source=record.source, uid=record.uid,
+                       date=record.date.isoformat() if record.date else '')
+        elif isinstance(record, VIESError):
+            row.update(country_code=record.country_code, vat_number=record.vat_number, source=record.source,
+                       uid=record.uid, date=record.date.isoformat() if record.date else '',
+                       error=record.error if record.error else 'Unknown error')
+        else:
+            row['error'] = record if record else 'Unknown error'
+
+        return row
+
+
+class CSVSink(ResultSink):
+    """
+    Writes results as CSV rows
+    """
+
+    def __init__(self, stream, header=True):
+        """
+        Construct new sink
+        :param stream: text output stream opened with newline=''
+        :type stream: file
+        :param header: write header row
+        :type header: bool
+        """
+
+        self.stream = stream
+        self.csv = csv.DictWriter(stream, self.FIELDS)
+
+        if header:
+            self.csv.writeheader()
+
+    def write(self, number, record):
+        self.csv.writerow(self.row(number, record))
+
+    def flush(self):
+        self.stream.flush()
+
+
+class JSONLSink(ResultSink):
+    """
+    Writes results as JSON lines
+    """
+
+    def __init__(self, stream):
+        """
+        Construct new sink
+        :param stream: text output stream
+        :type stream: file
+        """
+
+        self.stream = stream
+
+    def write(self, number, record):
+        self.stream.write(json.dumps(self.row(number, record), ensure_ascii=False) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+
+class SQLiteSink(ResultSink):
+    """
+    Writes results to SQLite table, result of the same input number is replaced
+    """
+
+    def __init__(self, path, table='result', commit_every=1000):
+        """
+        Construct new sink
+        :param path: database file path
+        :type path: str
+        :param table: table name
+        :type table: str
+        :param commit_every: number of rows written in one transaction
+        :type commit_every: int
+        """
+
+        self.table = table
+        self.commit_every = commit_every
+
+        # sink may be written from BufferedSink thread
+        self.__db__ = sqlite3.connect(path, check_same_thread=False)
+        self.__db__.execute('CREATE TABLE IF NOT EXISTS ' + table + ' ('
+                            + ', '.join(f + (' TEXT PRIMARY KEY' if f == 'number' else '') for f in self.FIELDS)
+                            + ')')
+        self.__sql__ = 'INSERT OR REPLACE INTO ' + table + ' (' + ', '.join(self.FIELDS) + ') VALUES (' \
+            + ', '.join('?' for f in self.FIELDS) + ')'
+        self.__rows__ = []
+
+    def write(self, number, record):
+        row = self.row(number, record)
+        self.__rows__.append(tuple(row[f] for f in self.FIELDS))
+
+        if len(self.__rows__) >= self.commit_every:
+            self.flush()
+
+    def numbers(self):
+        """
+        Get input numbers already written
+        :return: set of input numbers
+        :rtype: set
+        """
+
+        self.flush()
+
+        return set(r[0] for r in self.__db__.execute('SELECT number FROM ' + self.table))
+
+    def flush(self):
+        if not self.__rows__:
+            return
+
+        with self.__db__:
+            self.__db__.executemany(self.__sql__, self.__rows__)
+
+        self.__rows__ = []
+
+    def close(self):
+        self.flush()
+        self.__db__.close()
+
+
+class CallbackSink(ResultSink):
+    """
+    Passes results to a function
+    """
+
+    def __init__(self, callback):
+        """
+        Construct new sink
+        :param callback: function called with input number and VIESData, VIESError or error message
+        :type callback: callable
+        """
+
+        self.callback = callback
+
+    def write(self, number, record):
+        self.callback(number, record)
+
+
+class BufferedSink(ResultSink):
+    """
+    Writes results to another sink from background thread, write blocks when the queue
+    is full so producers are slowed down to the speed of the sink
+    """
+
+    def __init__(self, sink, size=10000):
+        """
+        Construct new sink
+        :param sink: target sink
+        :type sink: ResultSink
+        :param size: max number of results waiting to be written
+        :type size: int
+        """
+
+        self.sink = sink
+        self.blocked = 0
+
+        self.__queue__ = queue.Queue(size)
+        self.__error__ = None
+        self.__thread__ = threading.Thread(target=self.__run, daemon=True)
+        self.__thread__.start()
+
+    def write(self, number, record):
+        self.__check()
+
+        if self.__queue__.full():
+            self.blocked += 1
+
+        self.__queue__.put((number, record))
+
+    def flush(self):
+        self.__check()
+        self.__queue__.join()
+        self.__check()
+
+    def close(self):
+        if self.__thread__.is_alive():
+            self.__queue__.put(None)
+            self.__thread__.join()
+
+        self.__check()
+
+    def __run(self):
+        """
+        Writer thread
+        """
+
+        while True:
+            item = self.__queue__.get()
+
+            try:
+                if item is None:
+                    self.sink.close()
+                    return
+
+                if self.__error__ is None:
+                    self.sink.write(item[0], item[1])
+
+                    if self.__queue__.empty():
+                        self.sink.flush()
+            except Exception as e:
+                # reported to producer on its next call, remaining results are dropped
+                self.__error__ = e
+            finally:
+                self.__queue__.task_done()
+
+    def __check(self):
+        """
+        Raise error of writer thread
+        """
+
+        if self.__error__ is not None:
+            raise self.__error__
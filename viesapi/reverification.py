@@ -0,0 +1,393 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import sqlite3
+import threading
+import time
+
+from viesapi import EUVAT, VIESData, BatchPoller, BatchRequest
+
+
+class VerificationChange:
+    """
+    Change of counterparty data detected by re-verification
+    """
+
+    def __init__(self):
+        self.number = None
+        self.previous = None
+        self.current = None
+        self.fields = []
+        self.vies = None
+
+    def __str__(self):
+        return 'VerificationChange: [number = ' + str(self.number) \
+            + ', fields = ' + str(self.fields) \
+            + ', previous = ' + str(self.previous) \
+            + ', current = ' + str(self.current) \
+            + ']'
+
+
+class VerificationStore:
+    """
+    Local SQLite store of last verification state of each tracked number
+    """
+
+    # fields compared between verifications
+    FIELDS = ('valid', 'trader_name', 'trader_address')
+
+    def __init__(self, path=':memory:'):
+        """
+        Construct new store
+        :param path: database file path
+        :type path: str
+        """
+
+        self.__db__ = sqlite3.connect(path, check_same_thread=False)
+        self.__lock__ = threading.Lock()
+
+        with self.__lock__, self.__db__:
+            self.__db__.execute('CREATE TABLE IF NOT EXISTS verification ('
+                                'number TEXT PRIMARY KEY, '
+                                'valid INTEGER, '
+                                'trader_name TEXT, '
+                                'trader_address TEXT, '
+                                'date TEXT, '
+                                'hash TEXT, '
+                                'checked REAL, '
+                                'attempted REAL, '
+                                'error TEXT)')
+            self.__db__.execute('CREATE INDEX IF NOT EXISTS verification_checked ON verification (checked)')
+
+    def close(self):
+        """
+        Close database
+        """
+
+        self.__db__.close()
+
+    def add(self, numbers):
+        """
+        Start tracking numbers, invalid ones are ignored
+        :param numbers: EU VAT numbers
+        :type numbers: iterable
+        :return: number of newly tracked numbers
+        :rtype: int
+        """
+
+        rows = [(n,) for n in BatchRequest(numbers).numbers]
+
+        with self.__lock__, self.__db__:
+            before = self.__db__.total_changes
+            self.__db__.executemany('INSERT OR IGNORE INTO verification (number) VALUES (?)', rows)
+
+            return self.__db__.total_changes - before
+
+    def remove(self, number):
+        """
+        Stop tracking number
+        :param number: EU VAT number
+        :type number: str
+        """
+
+        with self.__lock__, self.__db__:
+            self.__db__.execute('DELETE FROM verification WHERE number = ?', (EUVAT.normalize(number),))
+
+    def get(self, number):
+        """
+        Get last known state of number
+        :param number: EU VAT number
+        :type number: str
+        :return: state with FIELDS keys and date, checked and error or None if number is not tracked
+        :rtype: dict or None
+        """
+
+        with self.__lock__:
+            row = self.__db__.execute('SELECT valid, trader_name, trader_address, date, checked, error '
+                                      'FROM verification WHERE number = ?', (EUVAT.normalize(number),)).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'valid': None if row[0] is None else bool(row[0]),
+            'trader_name': row[1],
+            'trader_address': row[2],
+            'date': row[3],
+            'checked': row[4],
+            'error': row[5]
+        }
+
+    def due(self, count, now, max_age, invalid_max_age, retry_delay):
+        """
+        Get numbers which need re-verification, most urgent first: never verified,
+        previously invalid, then by age of last verification
+        :param count: max number of returned numbers
+        :type count: int
+        :param now: current unix time
+        :type now: float
+        :param max_age: seconds after which valid number is re-verified
+        :type max_age: float
+        :param invalid_max_age: seconds after which invalid number is re-verified
+        :type invalid_max_age: float
+        :param retry_delay: seconds after failed attempt before number is tried again
+        :type retry_delay: float
+        :return: normalized numbers
+        :rtype: list
+        """
+
+        with self.__lock__:
+            rows = self.__db__.execute('SELECT number FROM verification '
+                                       'WHERE (checked IS NULL OR checked < ? OR (valid = 0 AND checked < ?)) '
+                                       'AND (attempted IS NULL OR attempted < ?) '
+                                       'ORDER BY checked IS NOT NULL, valid IS NOT 0, checked '
+                                       'LIMIT ?',
+                                       (now - max_age, now - invalid_max_age, now - retry_delay, count)).fetchall()
+
+        return [r[0] for r in rows]
+
+    def update(self, number, vies, now):
+        """
+        Store verification result and detect change
+        :param number: normalized number
+        :type number: str
+        :param vies: VIESData object
+        :type vies: VIESData
+        :param now: current unix time
+        :type now: float
+        :return: change or None if tracked fields did not change
+        :rtype: VerificationChange or None
+        """
+
+        digest = vies.content_hash(self.FIELDS)
+        date = vies.date.isoformat() if vies.date else None
+
+        with self.__lock__, self.__db__:
+            row = self.__db__.execute('SELECT valid, trader_name, trader_address, checked, hash '
+                                      'FROM verification WHERE number = ?', (number,)).fetchone()
+
+            if row and row[4] == digest:
+                # unchanged record, only verification time is written
+                self.__db__.execute('UPDATE verification SET date = ?, checked = ?, attempted = ?, error = NULL '
+                                    'WHERE number = ?', (date, now, now, number))
+                return None
+
+            self.__db__.execute('UPDATE verification SET valid = ?, trader_name = ?, trader_address = ?, date = ?, '
+                                'hash = ?, checked = ?, attempted = ?, error = NULL WHERE number = ?',
+                                (int(bool(vies.valid)), vies.trader_name, vies.trader_address, date, digest,
+                                 now, now, number))
+
+        last = None
+
+        if row and row[3] is not None:
+            last = VIESData()
+            last.valid = bool(row[0])
+            last.trader_name = row[1]
+            last.trader_address = row[2]
+
+        changes = vies.diff(last, self.FIELDS)
+
+        if not changes:
+            return None
+
+        change = VerificationChange()
+        change.number = number
+        change.previous = {f: getattr(last, f) for f in self.FIELDS} if last else None
+        change.current = {f: getattr(vies, f) for f in self.FIELDS}
+        change.fields = list(changes)
+        change.vies = vies
+
+        return change
+
+    def fail(self, number, error, now):
+        """
+        Record failed verification attempt
+        :param number: normalized number
+        :type number: str
+        :param error: error message
+        :type error: str
+        :param now: current unix time
+        :type now: float
+        """
+
+        with self.__lock__, self.__db__:
+            self.__db__.execute('UPDATE verification SET attempted = ?, error = ? WHERE number = ?',
+                                (now, error, number))
+
+
+class ReverificationScheduler:
+    """
+    Periodically re-verifies tracked numbers, spreading requests evenly over the day
+    within account limit and emitting only changed data
+    """
+
+    DAY = 86400
+
+    def __init__(self, client, store, on_change, per_day=None, max_age=DAY, invalid_max_age=DAY / 4,
+                 retry_delay=3600, poll_interval=30):
+        """
+        Construct new scheduler
+        :param client: client object
+        :type client: VIESAPIClient
+        :param store: verification store
+        :type store: VerificationStore
+        :param on_change: function called with VerificationChange for every changed number
+        :type on_change: callable
+        :param per_day: requests per day, defaults to requests left in account plan spread over 30 days
+        :type per_day: int
+        :param max_age: seconds after which valid number is re-verified
+        :type max_age: float
+        :param invalid_max_age: seconds after which invalid number is re-verified
+        :type invalid_max_age: float
+        :param retry_delay: seconds after failed attempt before number is tried again
+        :type retry_delay: float
+        :param poll_interval: max seconds between batch status checks
+        :type poll_interval: float
+        """
+
+        self.client = client
+        self.store = store
+        self.on_change = on_change
+        self.per_day = per_day
+        self.max_age = max_age
+        self.invalid_max_age = invalid_max_age
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+
+        self.__budget__ = 0.0
+        self.__refilled__ = None
+
+    def budget(self):
+        """
+        Get number of requests scheduler may send per day
+        :return: requests per day
+        :rtype: float
+        """
+
+        if not self.per_day:
+            status = self.client.get_account_status()
+
+            if not status:
+                return 0.0
+
+            self.per_day = max(1.0, ((status.limit or 0) - (status.total_count or 0)) / 30.0)
+
+        return float(self.per_day)
+
+    def run_once(self, now=None):
+        """
+        Verify numbers due for re-verification allowed by budget accumulated since previous run
+        :param now: current unix time
+        :type now: float
+        :return: number of verified numbers
+        :rtype: int
+        """
+
+        now = now if now is not None else time.time()
+        rate = self.budget() / self.DAY
+
+        if self.__refilled__ is None:
+            self.__refilled__ = now
+
+        # token bucket holding at most one batch, so requests never burst over the even pace
+        self.__budget__ = min(99.0, self.__budget__ + (now - self.__refilled__) * rate)
+        self.__refilled__ = now
+
+        count = int(self.__budget__)
+
+        if count < 1:
+            return 0
+
+        numbers = self.store.due(count, now, self.max_age, self.invalid_max_age, self.retry_delay)
+
+        if not numbers:
+            return 0
+
+        self.__budget__ -= len(numbers)
+
+        if len(numbers) == 1:
+            results = {}
+            errors = {}
+            vies = self.client.get_vies_data(numbers[0])
+
+            if vies:
+                results[numbers[0]] = vies
+        else:
+            results, errors = self.__verify_batch(numbers)
+
+        for number in numbers:
+            vies = results.get(number)
+
+            if vies:
+                change = self.store.update(number, vies, now)
+
+                if change:
+                    self.on_change(change)
+            else:
+                self.store.fail(number, errors.get(number) or self.client.get_last_error()
+                                or 'No result returned for number', now)
+
+        return len(results)
+
+    def run(self, stop=None):
+        """
+        Run scheduler until stop event is set
+        :param stop: stop event
+        :type stop: threading.Event
+        """
+
+        stop = stop if stop else threading.Event()
+
+        while not stop.is_set():
+            self.run_once()
+
+            budget = self.budget()
+
+            if budget:
+                # wake up when next request fits into the budget
+                stop.wait(max(1.0, self.DAY / max(budget, 1.0)))
+            else:
+                # account status could not be read, budget is unknown until it is
+                stop.wait(max(1.0, self.poll_interval))
+
+    def __verify_batch(self, numbers):
+        """
+        Verify numbers using batch API
+        :param numbers: normalized numbers
+        :type numbers: list
+        :return: tuple of VIESData objects and error messages by normalized number
+        :rtype: tuple
+        """
+
+        poller = BatchPoller(self.client, max_interval=self.poll_interval)
+        token = poller.submit(numbers)
+
+        if not token:
+            return {}, {}
+
+        br = poller.wait(token)
+
+        if not br:
+            return {}, {}
+
+        return {vd.country_code + vd.vat_number: vd for vd in br.numbers}, \
+            {ve.country_code + ve.vat_number: ve.error for ve in br.errors}
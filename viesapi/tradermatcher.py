@@ -0,0 +1,357 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import math
+import re
+import unicodedata
+
+from viesapi import LegalForm
+
+
+class TraderMatch:
+    """
+    Counterparty matched to trader data
+    """
+
+    def __init__(self):
+        self.key = None
+        self.score = 0.0
+        self.name_score = 0.0
+        self.address_score = None
+        self.legal_form_match = None
+        self.euvat_match = False
+
+    def __str__(self):
+        return 'TraderMatch: [key = ' + str(self.key) \
+            + ', score = ' + str(self.score) \
+            + ', name_score = ' + str(self.name_score) \
+            + ', address_score = ' + str(self.address_score) \
+            + ', legal_form_match = ' + str(self.legal_form_match) \
+            + ', euvat_match = ' + str(self.euvat_match) \
+            + ']'
+
+
+class TraderMatcher:
+    """
+    Index of own counterparties matched against trader names and addresses returned by VIES,
+    names are compared without legal forms as IDF weighted token sets, candidates are found
+    through inverted index so matching does not scan all counterparties
+    """
+
+    # legal form designations (normalized tokens) recognized at the end of names
+    LEGAL_FORMS = {
+        'sp z o o': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'spolka z ograniczona odpowiedzialnoscia': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'gmbh': LegalForm.LIMITED_LIABILITY_COMPANY,
+        's r o': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'sro': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'srl': LegalForm.LIMITED_LIABILITY_COMPANY,
+        's r l': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'sarl': LegalForm.LIMITED_LIABILITY_COMPANY,
+        's a r l': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'sl': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'lda': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'bv': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'b v': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'kft': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'd o o': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'doo': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'ood': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'sia': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'uab': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'ou': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'oy': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'aps': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'llc': LegalForm.LIMITED_LIABILITY_COMPANY,
+        'ltd': LegalForm.PRIVATE_LIMITED_LIABILITY_COMPANY,
+        'limited': LegalForm.PRIVATE_LIMITED_LIABILITY_COMPANY,
+        'ab': LegalForm.PRIVATE_LIMITED_LIABILITY_COMPANY,
+        'ug': LegalForm.SIMPLE_LIMITED_LIABILITY_COMPANY,
+        'eood': LegalForm.SINGLE_MEMBER_LIMITED_LIABILITY_COMPANY,
+        'eurl': LegalForm.SINGLE_MEMBER_LIMITED_LIABILITY_COMPANY,
+        'slu': LegalForm.SINGLE_MEMBER_LIMITED_LIABILITY_COMPANY,
+        'sa': LegalForm.JOINT_STOCK_COMPANY,
+        's a': LegalForm.JOINT_STOCK_COMPANY,
+        'ag': LegalForm.JOINT_STOCK_COMPANY,
+        'spa': LegalForm.JOINT_STOCK_COMPANY,
+        's p a': LegalForm.JOINT_STOCK_COMPANY,
+        'nv': LegalForm.JOINT_STOCK_COMPANY,
+        'n v': LegalForm.JOINT_STOCK_COMPANY,
+        'as': LegalForm.JOINT_STOCK_COMPANY,
+        'a s': LegalForm.JOINT_STOCK_COMPANY,
+        'ad': LegalForm.JOINT_STOCK_COMPANY,
+        'plc': LegalForm.JOINT_STOCK_COMPANY,
+        'oyj': LegalForm.JOINT_STOCK_COMPANY,
+        'zrt': LegalForm.JOINT_STOCK_COMPANY,
+        'nyrt': LegalForm.JOINT_STOCK_COMPANY,
+        'ead': LegalForm.SINGLE_MEMBER_JOINT_STOCK_COMPANY,
+        'psa': LegalForm.SIMPLIFIED_JOINT_STOCK_COMPANY,
+        'sas': LegalForm.SIMPLIFIED_JOINT_STOCK_COMPANY,
+        'sasu': LegalForm.SIMPLIFIED_JOINT_STOCK_COMPANY,
+        'sp j': LegalForm.GENERAL_PARTNERSHIP,
+        'ohg': LegalForm.GENERAL_PARTNERSHIP,
+        'snc': LegalForm.GENERAL_PARTNERSHIP,
+        'vof': LegalForm.GENERAL_PARTNERSHIP,
+        'v o f': LegalForm.GENERAL_PARTNERSHIP,
+        'sp k': LegalForm.LIMITED_PARTNERSHIP,
+        'kg': LegalForm.LIMITED_PARTNERSHIP,
+        'scs': LegalForm.LIMITED_PARTNERSHIP,
+        'cv': LegalForm.LIMITED_PARTNERSHIP,
+        'c v': LegalForm.LIMITED_PARTNERSHIP,
+        'sp k a': LegalForm.LIMITED_JOINT_STOCK_PARTNERSHIP,
+        's k a': LegalForm.LIMITED_JOINT_STOCK_PARTNERSHIP,
+        'ska': LegalForm.LIMITED_JOINT_STOCK_PARTNERSHIP,
+        'kgaa': LegalForm.LIMITED_JOINT_STOCK_PARTNERSHIP,
+        'sp p': LegalForm.PROFESSIONAL_PARTNERSHIP,
+        'llp': LegalForm.LIMITED_LIABILITY_PARTNERSHIP,
+        's c': LegalForm.PRIVATE_PARTNERSHIP,
+        'gbr': LegalForm.PRIVATE_PARTNERSHIP,
+        'gmbh co kg': LegalForm.LIMITED_LIABILITY_COMPANY_LIMITED_PARTNERSHIP,
+        'sp z o o sp k': LegalForm.LIMITED_LIABILITY_COMPANY_LIMITED_PARTNERSHIP,
+        'sp z o o s k a': LegalForm.LIMITED_LIABILITY_COMPANY_LIMITED_JOINT_STOCK_PARTNERSHIP,
+        'sp z o o sp k a': LegalForm.LIMITED_LIABILITY_COMPANY_LIMITED_JOINT_STOCK_PARTNERSHIP
+    }
+
+    # address words carrying no information
+    ADDRESS_STOP_WORDS = frozenset(['ul', 'ulica', 'al', 'aleja', 'pl', 'plac', 'os', 'osiedle', 'str', 'strasse',
+                                    'rue', 'via', 'calle', 'street', 'st', 'road', 'rd'])
+
+    # hyphens between digits are removed so postal codes stay single tokens
+    DIGIT_HYPHEN = re.compile('(?<=[0-9])-(?=[0-9])')
+    NON_ALNUM = re.compile('[^0-9a-z]+')
+
+    def __init__(self, name_weight=0.7, address_weight=0.3, min_score=0.5, legal_form_penalty=0.1,
+                 max_candidates=1000):
+        """
+        Construct new matcher
+        :param name_weight: weight of name similarity in score
+        :type name_weight: float
+        :param address_weight: weight of address similarity in score, used if both addresses are known
+        :type address_weight: float
+        :param min_score: min score of reported matches
+        :type min_score: float
+        :param legal_form_penalty: score subtracted when both legal forms are known and differ
+        :type legal_form_penalty: float
+        :param max_candidates: max number of counterparties scored per lookup, taken from those sharing
+            the rarest name tokens
+        :type max_candidates: int
+        """
+
+        self.name_weight = name_weight
+        self.address_weight = address_weight
+        self.min_score = min_score
+        self.legal_form_penalty = legal_form_penalty
+        self.max_candidates = max_candidates
+
+        self.__entries__ = []
+        self.__postings__ = {}
+        self.__euvat__ = {}
+        self.__max_form__ = max(len(k.split()) for k in self.LEGAL_FORMS)
+
+    def __len__(self):
+        return len(self.__entries__)
+
+    def add(self, key, name, address=None, euvat=None):
+        """
+        Add own counterparty
+        :param key: counterparty identifier reported in matches
+        :type key: Any
+        :param name: counterparty name with legal form
+        :type name: str
+        :param address: counterparty address
+        :type address: str
+        :param euvat: counterparty EU VAT number
+        :type euvat: str
+        """
+
+        tokens, form = self.strip_legal_form(self.tokens(name))
+        tokens = frozenset(tokens)
+
+        index = len(self.__entries__)
+        self.__entries__.append((key, tokens, form, self.address_tokens(address)))
+
+        for t in tokens:
+            self.__postings__.setdefault(t, []).append(index)
+
+        if euvat:
+            self.__euvat__.setdefault(self.NON_ALNUM.sub('', euvat.casefold()), []).append(index)
+
+    def match(self, vies, limit=3):
+        """
+        Find counterparties matching trader data
+        :param vies: trader data, name and address components are used if present
+        :type vies: VIESData
+        :param limit: max number of matches
+        :type limit: int
+        :return: matches sorted by descending score
+        :rtype: list
+        """
+
+        nc = vies.trader_name_components
+
+        if nc and nc.name:
+            tokens, form = self.strip_legal_form(self.tokens(nc.name))
+            form = nc.legal_form_canonical_id or form
+        else:
+            tokens, form = self.strip_legal_form(self.tokens(vies.trader_name))
+
+        ac = vies.trader_address_components
+
+        if ac and ac.country:
+            address = self.address_tokens(' '.join(str(v) for v in (ac.street, ac.street_number, ac.house_number,
+                                                                     ac.postal_code, ac.city) if v))
+        else:
+            address = self.address_tokens(vies.trader_address)
+
+        euvat = self.NON_ALNUM.sub('', ((vies.country_code or '') + (vies.vat_number or '')).casefold())
+
+        return self.__match(frozenset(tokens), form, address, self.__euvat__.get(euvat, ()), limit)
+
+    def match_all(self, records, limit=1):
+        """
+        Match lookup results
+        :param records: VIESData objects or batch result
+        :type records: list or BatchResult
+        :return: generator of (VIESData, list of matches) tuples
+        :rtype: generator
+        """
+
+        if hasattr(records, 'numbers'):
+            records = records.numbers
+
+        for vies in records:
+            yield vies, self.match(vies, limit)
+
+    def tokens(self, text):
+        """
+        Split text into casefolded tokens without diacritics and punctuation
+        :param text: text
+        :type text: str
+        :return: tokens
+        :rtype: list
+        """
+
+        if not text:
+            return []
+
+        text = unicodedata.normalize('NFKD', text.casefold().replace('ł', 'l'))
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+
+        return self.NON_ALNUM.sub(' ', self.DIGIT_HYPHEN.sub('', text)).split()
+
+    def address_tokens(self, address):
+        """
+        Get set of significant address tokens
+        :param address: address
+        :type address: str
+        :return: set of tokens
+        :rtype: frozenset
+        """
+
+        return frozenset(t for t in self.tokens(address) if t not in self.ADDRESS_STOP_WORDS)
+
+    def strip_legal_form(self, tokens):
+        """
+        Remove legal form designation from the end of name
+        :param tokens: name tokens
+        :type tokens: list
+        :return: tuple of remaining tokens and LegalForm canonical id (UNKNOWN if not recognized)
+        :rtype: tuple
+        """
+
+        for n in range(min(self.__max_form__, len(tokens) - 1), 0, -1):
+            form = self.LEGAL_FORMS.get(' '.join(tokens[-n:]))
+
+            if form:
+                return tokens[:-n], form
+
+        return tokens, LegalForm.UNKNOWN
+
+    def __match(self, tokens, form, address, euvat, limit):
+        """
+        Score candidates sharing name tokens or EU VAT number
+        :return: matches sorted by descending score
+        :rtype: list
+        """
+
+        entries = self.__entries__
+        postings = self.__postings__
+
+        # rarest tokens first, candidates sharing them are most likely to match
+        weights = dict((t, self.__idf(len(postings.get(t, ())))) for t in tokens)
+        candidates = dict.fromkeys(euvat)
+
+        for t in sorted(tokens, key=lambda t: len(postings.get(t, ()))):
+            posting = postings.get(t, ())
+
+            if len(candidates) + len(posting) > self.max_candidates:
+                if candidates:
+                    break
+
+                posting = posting[:self.max_candidates]
+
+            candidates.update(dict.fromkeys(posting))
+
+        total = sum(weights.values())
+        matches = []
+
+        for i in candidates:
+            key, other, other_form, other_address = entries[i]
+
+            common = sum(weights[t] for t in tokens & other)
+            union = total + sum(self.__idf(len(postings[t])) for t in other - tokens)
+
+            m = TraderMatch()
+            m.key = key
+            m.name_score = common / union if union else 0.0
+            m.euvat_match = i in euvat
+            m.score = m.name_score
+
+            if address and other_address:
+                m.address_score = len(address & other_address) / float(len(address | other_address))
+                m.score = (self.name_weight * m.name_score + self.address_weight * m.address_score) \
+                    / (self.name_weight + self.address_weight)
+
+            if form != LegalForm.UNKNOWN and other_form != LegalForm.UNKNOWN:
+                m.legal_form_match = form == other_form
+
+                if not m.legal_form_match:
+                    m.score = max(0.0, m.score - self.legal_form_penalty)
+
+            if m.euvat_match:
+                m.score = 1.0
+
+            if m.score >= self.min_score:
+                matches.append(m)
+
+        matches.sort(key=lambda m: m.score, reverse=True)
+
+        return matches[:limit]
+
+    def __idf(self, df):
+        """
+        Get weight of token present in df names
+        :return: weight
+        :rtype: float
+        """
+
+        return math.log(1.0 + (len(self.__entries__) + 1.0) / (df + 1.0))
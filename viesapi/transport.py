@@ -0,0 +1,855 @@
+#
+# -*- coding: utf-8 -*-
+#
+# Copyright 2022-2025 NETCAT (www.netcat.pl)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# @author NETCAT <firma@netcat.pl>
+# @copyright 2022-2025 NETCAT (www.netcat.pl)
+# @license https://www.apache.org/licenses/LICENSE-2.0
+#
+
+import base64
+import hashlib
+import http.client
+import json
+import os
+import select
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+
+from viesapi.instrumentation import RequestTiming
+
+
+class Response:
+    """
+    HTTP response
+    """
+
+    def __init__(self):
+        self.status = None
+        self.reason = None
+        self.headers = None
+        self.body = None
+
+    def __str__(self):
+        return 'Response: [status = ' + str(self.status) \
+            + ', reason = ' + str(self.reason) \
+            + ', body = ' + str(len(self.body) if self.body is not None else None) + ' bytes' \
+            + ']'
+
+
+class Transport:
+    """
+    Base class of HTTP transports used by the client
+    """
+
+    # methods retried when connection is dropped, POST (batch upload) may have been already processed
+    IDEMPOTENT = ('GET', 'HEAD')
+
+    def request(self, method, url, headers, body=None, timing=None):
+        """
+        Send HTTP request and read the whole response
+        :param method: HTTP method
+        :type method: str
+        :param url: target URL
+        :type url: str
+        :param headers: request headers
+        :type headers: dict
+        :param body: request content
+        :type body: bytes or None
+        :param timing: request timing to record phases into
+        :type timing: RequestTiming or None
+        :return: response object
+        :rtype: Response
+        :raises OSError: on connection failure
+        """
+
+        raise NotImplementedError()
+
+    def warmup(self, url, connections=1):
+        """
+        Prepare connections to host of URL in advance, transports which cannot do it do nothing
+        :param url: service URL
+        :type url: str
+        :param connections: number of connections to open
+        :type connections: int
+        :return: number of connections opened
+        :rtype: int
+        :raises OSError: on connection failure
+        """
+
+        return 0
+
+    def close(self):
+        """
+        Close all open connections
+        """
+
+        pass
+
+
+class TLSConnection(http.client.HTTPSConnection):
+    """
+    HTTPS connection resuming TLS session of previous connection to the same host
+    """
+
+    def __init__(self, host, port, timeout, context, sessions, key):
+        """
+        Construct new connection
+        :param host: host to connect to
+        :type host: str
+        :param port: port to connect to
+        :type port: int
+        :param timeout: socket timeout in seconds
+        :type timeout: float
+        :param context: SSL context
+        :type context: ssl.SSLContext
+        :param sessions: TLS sessions shared by connections of transport
+        :type sessions: dict
+        :param key: key of target host in sessions
+        :type key: tuple
+        """
+
+        super().__init__(host, port, timeout=timeout, context=context)
+
+        self.sessions = sessions
+        self.key = key
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+
+        server_hostname = self._tunnel_host if self._tunnel_host else self.host
+
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname,
+                                              session=self.sessions.get(self.key))
+        self.save_session()
+
+    def save_session(self):
+        """
+        Store TLS session of connection for reuse, with TLS 1.3 it is available after first response is read
+        """
+
+        if self.sock is not None and self.sock.session is not None:
+            self.sessions[self.key] = self.sock.session
+
+
+class HTTPTransport(Transport):
+    """
+    HTTP/1.1 transport keeping connections alive between requests, with TLS session resumption
+    on reconnect and optional cached DNS resolution (turned on by warmup)
+    """
+
+    # seconds resolved host addresses are cached for once warmup turned caching on
+    DNS_TTL = 300
+
+    # redirects are followed like urllib does, POST is repeated as GET only after 301, 302 and 303
+    REDIRECTS = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 10
+
+    def __init__(self, timeout=None, max_idle=4, context=None, dns_ttl=None):
+        """
+        Construct new transport
+        :param timeout: socket timeout in seconds
+        :type timeout: float
+        :param max_idle: max number of idle connections kept per host
+        :type max_idle: int
+        :param context: SSL context for https connections
+        :type context: ssl.SSLContext
+        :param dns_ttl: seconds resolved host addresses are cached for, None to resolve on every connect
+            until warmup turns caching on (for DNS_TTL seconds), 0 to never cache them
+        :type dns_ttl: float
+        """
+
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.context = context
+        self.dns_ttl = dns_ttl
+        self.instrumentation = None
+
+        self.__idle__ = {}
+        self.__dns__ = {}
+        self.__sessions__ = {}
+        self.__lock__ = threading.Lock()
+
+    def request(self, method, url, headers, body=None, timing=None):
+        for i in range(self.MAX_REDIRECTS):
+            response = self.__send(method, url, headers, body, timing)
+            location = response.headers.get('Location') if response.status in self.REDIRECTS else None
+
+            if not location:
+                break
+
+            if method not in self.IDEMPOTENT:
+                if response.status not in (301, 302, 303):
+                    break
+
+                method = 'GET'
+                body = None
+                headers = {k: v for k, v in headers.items() if k.lower() not in ('content-type', 'content-length')}
+
+            url = urllib.parse.urljoin(url, location)
+
+        return response
+
+    def __send(self, method, url, headers, body, timing):
+        """
+        Send single HTTP request on pooled connection
+        :param method: HTTP method
+        :type method: str
+        :param url: target URL
+        :type url: str
+        :param headers: request headers
+        :type headers: dict
+        :param body: request content
+        :type body: bytes or None
+        :param timing: request timing to record phases into
+        :type timing: RequestTiming or None
+        :return: response object
+        :rtype: Response
+        :raises OSError: on connection failure
+        """
+
+        u = urllib.parse.urlsplit(url)
+        key = (u.scheme, u.netloc)
+        path = u.path + ('?' + u.query if u.query else '')
+
+        proxy = self.__proxy(u) if u.scheme == 'http' else None
+
+        if proxy:
+            # plain http goes through proxy with absolute URL in request line
+            path = url
+            auth = self.__proxy_auth(proxy)
+
+            if auth:
+                headers = dict(headers)
+                headers['Proxy-Authorization'] = auth
+
+        conn = self.__acquire(key)
+        reused = conn is not None
+
+        while True:
+            if not conn:
+                conn = self.__connect(u)
+
+            sending = False
+
+            try:
+                if conn.sock is None:
+                    conn.connect()
+
+                if timing:
+                    timing.mark('connect')
+
+                sending = True
+                conn.request(method, path, body=body, headers=headers)
+                sending = False
+
+                if timing:
+                    timing.mark('send')
+
+                res = conn.getresponse()
+
+                if timing:
+                    timing.mark('first_byte')
+
+                response = Response()
+                response.status = res.status
+                response.reason = res.reason
+                response.headers = res.headers
+                response.body = res.read()
+
+                if timing:
+                    timing.mark('read')
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                conn = None
+
+                # server may drop idle keep-alive connection, retry once on a fresh one; other methods
+                # only if the request could not be sent, as server did not get to process it then
+                if not reused or (method not in self.IDEMPOTENT and not sending):
+                    raise
+
+                reused = False
+
+                if self.instrumentation:
+                    self.instrumentation.on_retry(method, url, 1, str(e))
+                continue
+            except Exception:
+                conn.close()
+                raise
+
+            if res.will_close:
+                conn.close()
+            else:
+                if isinstance(conn, TLSConnection):
+                    conn.save_session()
+
+                self.__release(key, conn)
+
+            return response
+
+    def warmup(self, url, connections=1):
+        u = urllib.parse.urlsplit(url)
+        key = (u.scheme, u.netloc)
+
+        if self.dns_ttl is None:
+            self.dns_ttl = self.DNS_TTL
+
+        if self.dns_ttl and not self.__proxy(u):
+            self.__resolve(u.hostname, u.port or (443 if u.scheme == 'https' else 80), True)
+
+        with self.__lock__:
+            idle = len(self.__idle__.get(key, ()))
+
+        opened = 0
+
+        for i in range(min(connections, self.max_idle) - idle):
+            conn = self.__connect(u)
+            conn.connect()
+
+            self.__release(key, conn)
+            opened += 1
+
+        return opened
+
+    def close(self):
+        with self.__lock__:
+            idle = self.__idle__
+            self.__idle__ = {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def __acquire(self, key):
+        """
+        Get idle connection for host
+        :param key: connection pool key
+        :type key: tuple
+        :return: connection or None
+        :rtype: http.client.HTTPConnection or None
+        """
+
+        while True:
+            with self.__lock__:
+                conns = self.__idle__.get(key)
+
+                if not conns:
+                    return None
+
+                conn = conns.pop()
+
+            if self.__alive(conn):
+                return conn
+
+            conn.close()
+
+    def __alive(self, conn):
+        """
+        Check that idle connection was not closed by server in the meantime
+        :param conn: idle connection
+        :type conn: http.client.HTTPConnection
+        :return: True if connection can be reused
+        :rtype: bool
+        """
+
+        sock = conn.sock
+
+        if sock is None:
+            return True
+
+        try:
+            if not select.select([sock], [], [], 0)[0]:
+                return True
+        except (OSError, ValueError):
+            return False
+
+        # idle connection is readable only when server closed it or, with TLS 1.3, sent session
+        # tickets after handshake which are consumed by non-blocking read without any data
+        if not isinstance(sock, ssl.SSLSocket):
+            return False
+
+        timeout = sock.gettimeout()
+
+        try:
+            sock.setblocking(False)
+            sock.recv(1)
+            return False
+        except ssl.SSLWantReadError:
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def __release(self, key, conn):
+        """
+        Return connection to idle pool
+        :param key: connection pool key
+        :type key: tuple
+        :param conn: connection
+        :type conn: http.client.HTTPConnection
+        """
+
+        with self.__lock__:
+            conns = self.__idle__.setdefault(key, [])
+
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+
+        conn.close()
+
+    def __connect(self, u):
+        """
+        Create new (not yet connected) connection object
+        :param u: split target URL
+        :type u: urllib.parse.SplitResult
+        :return: connection
+        :rtype: http.client.HTTPConnection
+        """
+
+        proxy = self.__proxy(u)
+        host = u.hostname
+        port = u.port
+
+        if proxy:
+            host = proxy.hostname
+            port = proxy.port or 80
+
+        if u.scheme == 'https':
+            if not self.context:
+                self.context = ssl.create_default_context()
+
+            conn = TLSConnection(host, port, self.timeout, self.context, self.__sessions__, (u.scheme, u.netloc))
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        if proxy and u.scheme == 'https':
+            auth = self.__proxy_auth(proxy)
+            conn.set_tunnel(u.hostname, u.port, headers={'Proxy-Authorization': auth} if auth else None)
+
+        if self.dns_ttl:
+            conn._create_connection = self.__open
+
+        return conn
+
+    def __open(self, address, timeout, source_address=None):
+        """
+        Open socket to host using cached addresses, replacement of socket.create_connection
+        :param address: tuple of host and port
+        :type address: tuple
+        :param timeout: socket timeout in seconds
+        :type timeout: float
+        :param source_address: local address to bind to
+        :type source_address: tuple
+        :return: connected socket
+        :rtype: socket.socket
+        :raises OSError: on connection failure
+        """
+
+        host, port = address
+        error = None
+
+        for addr in self.__resolve(host, port):
+            try:
+                return socket.create_connection(addr[:2], timeout, source_address)
+            except OSError as e:
+                error = e
+
+        # addresses may be out of date, resolve again on next connect
+        with self.__lock__:
+            self.__dns__.pop((host, port), None)
+
+        raise error
+
+    def __resolve(self, host, port, refresh=False):
+        """
+        Get addresses of host from cache or resolve it
+        :param host: host name
+        :type host: str
+        :param port: port number
+        :type port: int
+        :param refresh: resolve even if cached addresses did not expire
+        :type refresh: bool
+        :return: list of socket addresses
+        :rtype: list
+        :raises OSError: on resolution failure
+        """
+
+        now = time.monotonic()
+
+        with self.__lock__:
+            cached = self.__dns__.get((host, port))
+
+        if cached and cached[1] > now and not refresh:
+            return cached[0]
+
+        addrs = [info[4] for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)]
+
+        with self.__lock__:
+            self.__dns__[(host, port)] = (addrs, now + self.dns_ttl)
+
+        return addrs
+
+    def __proxy(self, u):
+        """
+        Get proxy configured in environment for target URL
+        :param u: split target URL
+        :type u: urllib.parse.SplitResult
+        :return: split proxy URL or None
+        :rtype: urllib.parse.SplitResult or None
+        """
+
+        proxy = os.environ.get(u.scheme + '_proxy') or os.environ.get(u.scheme.upper() + '_PROXY')
+
+        if not proxy:
+            return None
+
+        import urllib.request
+
+        if urllib.request.proxy_bypass_environment(u.hostname):
+            return None
+
+        return urllib.parse.urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+
+    def __proxy_auth(self, proxy):
+        """
+        Get Proxy-Authorization header value for credentials given in proxy URL
+        :param proxy: split proxy URL
+        :type proxy: urllib.parse.SplitResult
+        :return: header value or None if proxy URL has no credentials
+        :rtype: str or None
+        """
+
+        if proxy.username is None:
+            return None
+
+        credentials = urllib.parse.unquote(proxy.username) + ':' + urllib.parse.unquote(proxy.password or '')
+
+        return 'Basic ' + base64.b64encode(credentials.encode()).decode()
+
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 transport multiplexing concurrent requests over few connections.
+    Requires httpx with http2 extra, falls back to HTTPTransport when it is not installed.
+    HTTP/1.1 is used with servers which do not negotiate HTTP/2.
+    """
+
+    def __init__(self, timeout=None, max_connections=4, prior_knowledge=False):
+        """
+        Construct new transport
+        :param timeout: socket timeout in seconds
+        :type timeout: float
+        :param max_connections: max number of connections per host
+        :type max_connections: int
+        :param prior_knowledge: use HTTP/2 without negotiation, required for plain http URLs
+        :type prior_knowledge: bool
+        """
+
+        self.instrumentation = None
+
+        try:
+            import httpx
+            import h2
+        except ImportError:
+            self.http2 = False
+            self.__client__ = None
+            self.__fallback__ = HTTPTransport(timeout)
+            return
+
+        self.http2 = bool(h2)
+        self.__fallback__ = None
+        self.__terminated__ = httpx.RemoteProtocolError
+        self.__client__ = httpx.Client(http1=not prior_knowledge, http2=True, timeout=timeout,
+                                       limits=httpx.Limits(max_connections=max_connections))
+
+    def request(self, method, url, headers, body=None, timing=None):
+        if self.__fallback__:
+            self.__fallback__.instrumentation = self.instrumentation
+            return self.__fallback__.request(method, url, headers, body, timing)
+
+        extensions = {}
+
+        if timing:
+            extensions['trace'] = lambda event, info: HTTP2Transport.__trace(timing, event)
+
+        try:
+            res = self.__client__.request(method, url, headers=headers, content=body, extensions=extensions)
+        except self.__terminated__ as e:
+            # server may close connection with streams in flight (GOAWAY), retry once on a fresh one
+            if method not in self.IDEMPOTENT:
+                raise
+
+            if self.instrumentation:
+                self.instrumentation.on_retry(method, url, 1, str(e))
+
+            res = self.__client__.request(method, url, headers=headers, content=body, extensions=extensions)
+
+        response = Response()
+        response.status = res.status_code
+        response.reason = res.reason_phrase
+        response.headers = res.headers
+        response.body = res.content
+
+        if timing:
+            timing.mark('read')
+
+        return response
+
+    def warmup(self, url, connections=1):
+        if self.__fallback__:
+            return self.__fallback__.warmup(url, connections)
+
+        return 0
+
+    def close(self):
+        if self.__fallback__:
+            self.__fallback__.close()
+        else:
+            self.__client__.close()
+
+    @staticmethod
+    def __trace(timing, event):
+        """
+        Record request phases from httpcore trace events
+        :param timing: request timing
+        :type timing: RequestTiming
+        :param event: trace event name
+        :type event: str
+        """
+
+        if event.endswith('.send_request_headers.started'):
+            # time spent on connecting or waiting for connection from pool
+            timing.mark('connect')
+        elif event.endswith('.send_request_body.complete'):
+            timing.mark('send')
+        elif event.endswith('.receive_response_headers.complete'):
+            timing.mark('first_byte')
+
+
+class RecordingTransport(Transport):
+    """
+    Transport passing requests to another transport and recording request/response pairs to cassette file,
+    which can be served back later by ReplayTransport. Cassette is JSON lines file, one exchange per line,
+    appended to when it already exists. Credentials are never written to it.
+    """
+
+    REDACTED = ('Authorization', 'Cookie', 'Set-Cookie')
+
+    def __init__(self, transport, path):
+        """
+        Construct new transport
+        :param transport: transport sending requests
+        :type transport: Transport
+        :param path: cassette file path
+        :type path: str
+        """
+
+        self.transport = transport
+        self.path = path
+        self.instrumentation = None
+
+        self.__file__ = open(path, 'a', encoding='utf-8')
+        self.__lock__ = threading.Lock()
+
+    def request(self, method, url, headers, body=None, timing=None):
+        if not timing:
+            timing = RequestTiming(method, url)
+
+        self.transport.instrumentation = self.instrumentation
+
+        res = self.transport.request(method, url, headers, body, timing)
+
+        entry = {
+            'method': method,
+            'url': url,
+            'headers': RecordingTransport.__redact(headers.items()),
+            'body': body.decode('utf-8') if body is not None else None,
+            'status': res.status,
+            'reason': res.reason,
+            'response_headers': RecordingTransport.__redact(res.headers.items()),
+            'timing': dict((phase, getattr(timing, phase)) for phase in ReplayTransport.PHASES)
+        }
+
+        try:
+            entry['response_body'] = res.body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['response_body'] = base64.b64encode(res.body).decode('ascii')
+            entry['encoding'] = 'base64'
+
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+
+        with self.__lock__:
+            self.__file__.write(line)
+            self.__file__.flush()
+
+        return res
+
+    def warmup(self, url, connections=1):
+        return self.transport.warmup(url, connections)
+
+    def close(self):
+        with self.__lock__:
+            self.__file__.close()
+
+        self.transport.close()
+
+    @staticmethod
+    def __redact(headers):
+        """
+        Copy headers replacing values of credential headers
+        :param headers: header name and value pairs
+        :type headers: iterable
+        :return: list of [name, value] pairs
+        :rtype: list
+        """
+
+        redacted = [h.lower() for h in RecordingTransport.REDACTED]
+
+        return [[k, 'REDACTED' if k.lower() in redacted else v] for k, v in headers]
+
+
+class ReplayTransport(Transport):
+    """
+    Transport serving responses from cassette file recorded by RecordingTransport, without any network access.
+    Requests are matched by method, URL path with query (host is ignored) and body. Repeated requests get
+    recorded responses in order, the last one is served again when they run out.
+    """
+
+    PHASES = ('connect', 'send', 'first_byte', 'read')
+
+    LATENCY_RECORDED = 'recorded'
+
+    def __init__(self, path, latency=None):
+        """
+        Construct new transport
+        :param path: cassette file path
+        :type path: str
+        :param latency: None to respond immediately, LATENCY_RECORDED to reproduce recorded phase timings
+            or fixed response time in seconds
+        :type latency: str or float or None
+        """
+
+        self.path = path
+        self.latency = latency
+        self.instrumentation = None
+
+        self.__entries__ = {}
+        self.__served__ = {}
+        self.__lock__ = threading.Lock()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = json.loads(line)
+                body = entry['body'].encode('utf-8') if entry['body'] is not None else None
+
+                self.__entries__.setdefault(ReplayTransport.__key(entry['method'], entry['url'], body), []).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.__entries__.values())
+
+    def request(self, method, url, headers, body=None, timing=None):
+        key = ReplayTransport.__key(method, url, body)
+        entries = self.__entries__.get(key)
+
+        if not entries:
+            raise LookupError('No recorded response for ' + method + ' ' + key[1])
+
+        with self.__lock__:
+            i = self.__served__.get(key, 0)
+            self.__served__[key] = i + 1
+
+        entry = entries[min(i, len(entries) - 1)]
+
+        self.__wait(entry, timing)
+
+        response = Response()
+        response.status = entry['status']
+        response.reason = entry['reason']
+        response.headers = http.client.HTTPMessage()
+
+        for k, v in entry['response_headers']:
+            response.headers[k] = v
+
+        if entry.get('encoding') == 'base64':
+            response.body = base64.b64decode(entry['response_body'])
+        else:
+            response.body = entry['response_body'].encode('utf-8')
+
+        if timing:
+            timing.mark('read')
+
+        return response
+
+    def reset(self):
+        """
+        Start serving recorded responses from the first one again
+        """
+
+        with self.__lock__:
+            self.__served__ = {}
+
+    def __wait(self, entry, timing):
+        """
+        Simulate network latency and record request phases up to first byte
+        :param entry: cassette entry
+        :type entry: dict
+        :param timing: request timing
+        :type timing: RequestTiming or None
+        """
+
+        for phase in ('connect', 'send', 'first_byte'):
+            if self.latency == self.LATENCY_RECORDED:
+                delay = entry['timing'][phase]
+            elif self.latency and phase == 'first_byte':
+                delay = self.latency
+            else:
+                delay = 0
+
+            if delay > 0:
+                time.sleep(delay)
+
+            if timing:
+                timing.mark(phase)
+
+        if self.latency == self.LATENCY_RECORDED and entry['timing']['read'] > 0:
+            time.sleep(entry['timing']['read'])
+
+    @staticmethod
+    def __key(method, url, body):
+        """
+        Get key matching request with cassette entries
+        :param method: HTTP method
+        :type method: str
+        :param url: target URL
+        :type url: str
+        :param body: request content
+        :type body: bytes or None
+        :return: tuple of method, path with query and body digest
+        :rtype: tuple
+        """
+
+        u = urllib.parse.urlsplit(url)
+
+        return (method, u.path + ('?' + u.query if u.query else ''),
+                hashlib.sha1(body).hexdigest() if body is not None else None)
@@ -21,28 +21,41 @@
 #
 
 import base64
+import copy
 import datetime
 import hashlib
 import hmac
-import itertools
 import os
 import sys
+import threading
 import time
 import uuid
-import urllib.request
 import urllib.parse
-import urllib.error
 
-from viesapi import (Error, Number, LegalForm, NIP, EUVAT, VIESData, VIESError, BatchResult,
-                     AccountStatus, NameComponents, AddressComponents)
-from io import BytesIO
-from lxml import etree
-from dateutil.parser import parse
+from viesapi import Error, Number, NIP, EUVAT, VIESData, BatchRequest
+from viesapi.instrumentation import Instrumentation, RequestTiming
+from viesapi.jsonresponseparser import JSONResponseParser
+from viesapi.responseparser import ResponseParser
+from viesapi.transport import HTTPTransport
+
+
+class ClientState(threading.local):
+    """
+    Error info and timing of the last request, kept per thread (per greenlet under gevent
+    monkey-patching) so one client can be used concurrently
+    """
+
+    def __init__(self):
+        self.errcode = 0
+        self.err = ''
+        self.timing = None
+        self.last_timing = None
 
 
 class VIESAPIClient:
     """
-    VIESAPI service client
+    VIESAPI service client, safe to share between threads and greenlets: configuration is
+    set up front and error info of the last call is kept per thread
     """
 
     VERSION = '1.2.9'
@@ -55,6 +68,17 @@ class VIESAPIClient:
 
     HMAC_ALG = hashlib.sha256
 
+    # max seconds background cache refresh waits for batch result
+    REFRESH_TIMEOUT = 300.0
+
+    # response formats, XML is used when service does not offer JSON representation
+    FORMAT_XML = 'text/xml'
+    FORMAT_JSON = 'application/json'
+
+    # errors on which stale cached data is returned
+    STALE_IF_ERROR = (Error.VIES_UNAVAILABLE, Error.VIES_TOO_MANY_REQ, Error.VIES_SYNC, Error.MAINTENANCE,
+                      Error.CLI_CONNECT, Error.CLI_EXCEPTION)
+
     def __init__(self, id=None, key=None):
         """
         Construct new service client object
@@ -72,6 +96,16 @@ class VIESAPIClient:
             self.__id__ = id
             self.__key__ = key
 
+        self.__transport__ = HTTPTransport()
+        self.__instrumentation__ = Instrumentation()
+        self.__transport__.instrumentation = self.__instrumentation__
+        self.__state__ = ClientState()
+        self.__cache__ = None
+        self.__negative__ = None
+        self.__format__ = self.FORMAT_XML
+        self.__quota__ = None
+        self.__bulk__ = None
+
         self.__clear()
 
     def set_url(self, url):
@@ -83,128 +117,100 @@ class VIESAPIClient:
 
         self.__url__ = url
 
-    def get_vies_data(self, euvat):
+    def set_format(self, format):
         """
-        Get VIES data for specified number
-        :param euvat: EU VAT number with 2-letter country prefix
-        :type euvat: str
-        :return: VIESData object or False
-        :rtype: VIESData or False
+        Set preferred response format
+        :param format: VIESAPIClient.FORMAT_XML or VIESAPIClient.FORMAT_JSON
+        :type format: str
         """
 
-        # clear error
-        self.__clear()
+        self.__format__ = format
 
-        # validate number and construct path
-        suffix = self.__get_path_suffix(Number.EUVAT, euvat)
+    def set_cache(self, cache):
+        """
+        Set cache of get_vies_data and get_vies_data_parsed results
+        :param cache: cache object or None to disable caching
+        :type cache: ResultCache
+        """
 
-        if not suffix:
-            return False
+        self.__cache__ = cache
 
-        # prepare url
-        url = self.__url__ + '/get/vies/' + suffix
+    def set_negative_cache(self, cache):
+        """
+        Set cache of invalid numbers answering repeated lookups of them without a request
+        :param cache: negative cache or None to disable it
+        :type cache: NegativeCache
+        """
 
-        # send request
-        doc = self.__get(url)
+        self.__negative__ = cache
 
-        if not doc:
-            return False
+    def set_quota(self, quota):
+        """
+        Set tracker of account status and billing plan limits, shared by clients using the same API key
+        :param quota: quota tracker or None to disable tracking
+        :type quota: QuotaTracker
+        """
 
-        # parse response
-        vies = VIESData()
+        self.__quota__ = quota
 
-        vies.uid = self.__get_text(doc, '/result/vies/uid/text()')
+    def set_bulk_validator(self, bulk):
+        """
+        Set bulk validator parsing completed batch results in worker processes, so many threads
+        downloading large batches are not limited to one core
+        :param bulk: bulk validator or None to parse in calling thread
+        :type bulk: BulkValidator
+        """
 
-        vies.country_code = self.__get_text(doc, '/result/vies/countryCode/text()')
-        vies.vat_number = self.__get_text(doc, '/result/vies/vatNumber/text()')
+        self.__bulk__ = bulk
 
-        vies.valid = True if self.__get_text(doc, '/result/vies/valid/text()') == 'true' else False
+    def set_transport(self, transport):
+        """
+        Set HTTP transport used to send requests
+        :param transport: transport object
+        :type transport: Transport
+        """
 
-        vies.trader_name = self.__get_text(doc, '/result/vies/traderName/text()')
-        vies.trader_company_type = self.__get_text(doc, '/result/vies/traderCompanyType/text()')
-        vies.trader_address = self.__get_text(doc, '/result/vies/traderAddress/text()')
+        self.__transport__ = transport
+        self.__transport__.instrumentation = self.__instrumentation__
 
-        vies.id = self.__get_text(doc, '/result/vies/id/text()')
-        vies.date = self.__get_date(doc, '/result/vies/date/text()')
-        vies.source = self.__get_text(doc, '/result/vies/source/text()')
+    def set_instrumentation(self, instrumentation):
+        """
+        Set instrumentation receiving request timings and events
+        :param instrumentation: instrumentation object
+        :type instrumentation: Instrumentation
+        """
 
-        return vies
+        self.__instrumentation__ = instrumentation if instrumentation else Instrumentation()
+        self.__transport__.instrumentation = self.__instrumentation__
 
-    def get_vies_data_parsed(self, euvat):
+    def get_vies_data(self, euvat):
         """
-        Get VIES data returning parsed trader address for specified number
+        Get VIES data for specified number
         :param euvat: EU VAT number with 2-letter country prefix
         :type euvat: str
         :return: VIESData object or False
         :rtype: VIESData or False
         """
 
-        # clear error
-        self.__clear()
-
-        # validate number and construct path
-        suffix = self.__get_path_suffix(Number.EUVAT, euvat)
-
-        if not suffix:
-            return False
-
-        # prepare url
-        url = self.__url__ + '/get/vies/parsed/' + suffix
-
-        # send request
-        doc = self.__get(url)
-
-        if not doc:
-            return False
-
-        # parse response
-        vies = VIESData()
+        return self.__get_cached_vies_data(euvat, False)
 
-        vies.uid = self.__get_text(doc, '/result/vies/uid/text()')
-
-        vies.country_code = self.__get_text(doc, '/result/vies/countryCode/text()')
-        vies.vat_number = self.__get_text(doc, '/result/vies/vatNumber/text()')
-        vies.valid = True if self.__get_text(doc, '/result/vies/valid/text()') == 'true' else False
-        vies.trader_name = self.__get_text(doc, '/result/vies/traderName/text()')
-
-        name = self.__get_text(doc, '/result/vies/traderNameComponents/name/text()')
-
-        if name and len(name) > 0:
-            nc = NameComponents()
-            nc.name = name
-            nc.legal_form = self.__get_text(doc, '/result/vies/traderNameComponents/legalForm/text()')
-            nc.legal_form_canonical_id = int(self.__get_text(doc, '/result/vies/traderNameComponents/legalFormCanonicalId/text()'))
-            nc.legal_form_canonical_name = self.__get_text(doc, '/result/vies/traderNameComponents/legalFormCanonicalName/text()')
-
-            vies.trader_name_components = nc
-
-        vies.trader_company_type = self.__get_text(doc, '/result/vies/traderCompanyType/text()')
-        vies.trader_address = self.__get_text(doc, '/result/vies/traderAddress/text()')
-
-        country = self.__get_text(doc, '/result/vies/traderAddressComponents/country/text()')
-
-        if country and len(country) > 0:
-            ac = AddressComponents()
-            ac.country = country
-            ac.postal_code = self.__get_text(doc, '/result/vies/traderAddressComponents/postalCode/text()')
-            ac.city = self.__get_text(doc, '/result/vies/traderAddressComponents/city/text()')
-            ac.street = self.__get_text(doc, '/result/vies/traderAddressComponents/street/text()')
-            ac.street_number = self.__get_text(doc, '/result/vies/traderAddressComponents/streetNumber/text()')
-            ac.house_number = self.__get_text(doc, '/result/vies/traderAddressComponents/houseNumber/text()')
-
-            vies.trader_address_components = ac
-
-        vies.id = self.__get_text(doc, '/result/vies/id/text()')
-        vies.date = self.__get_date(doc, '/result/vies/date/text()')
-        vies.source = self.__get_text(doc, '/result/vies/source/text()')
+    def get_vies_data_parsed(self, euvat):
+        """
+        Get VIES data returning parsed trader address for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
 
-        return vies
+        return self.__get_cached_vies_data(euvat, True)
 
     def get_vies_data_async(self, numbers):
         """
         Upload batch of VAT numbers and get their current VAT statuses and traders data
-        :param numbers: Array of EU VAT numbers with 2-letter country prefix
-        :type numbers: list
+        :param numbers: Array of EU VAT numbers with 2-letter country prefix or prepared batch request,
+            duplicated numbers are sent once
+        :type numbers: list or BatchRequest
         :return: Batch token for checking status and getting the result
         :rtype: string or False
         """
@@ -213,50 +219,45 @@ class VIESAPIClient:
         self.__clear()
 
         # validate input
-        if len(numbers) < 2 or len(numbers) > 99:
-            self.__set(Error.CLI_BATCH_SIZE)
-            return False
-
-        # prepare request string
-        xml = '<?xml version="1.0" encoding="utf-8"?>\r\n' \
-            + '<request>\r\n' \
-            + '  <batch>\r\n' \
-            + '    <numbers>\r\n'
+        batch = numbers if isinstance(numbers, BatchRequest) else BatchRequest(numbers)
 
-        for number in numbers:
-            if not EUVAT.is_valid(number):
-                self.__set(Error.CLI_EUVAT)
-                return False
+        if batch.invalid:
+            self.__set(Error.CLI_EUVAT)
+            return False
 
-            xml += '      <number>' + EUVAT.normalize(number) + '</number>\r\n'
+        if len(batch) < 2 or len(batch) > 99:
+            self.__set(Error.CLI_BATCH_SIZE)
+            return False
 
-        xml += '    </numbers>\r\n' \
-           + '  </batch>\r\n' \
-           + '</request>'
+        if not self.__acquire(len(batch), False):
+            return False
 
         # prepare url
         url = self.__url__ + '/batch/vies'
 
         # send request
-        doc = self.__post(url, 'text/xml; charset=utf-8', xml)
+        doc = self.__post(url, 'text/xml; charset=utf-8', batch.body())
 
         if not doc:
             return False
 
         # parse response
-        token = self.__get_text(doc, '/result/batch/token/text()')
+        token = self.__parser(doc).batch_token(doc)
 
         if not token:
             self.__set(Error.CLI_RESPONSE)
-            return False
+            return self.__end(False)
 
-        return token
+        return self.__end(token)
 
-    def get_vies_data_async_result(self, token):
+    def get_vies_data_async_result(self, token, partial=False):
         """
         Check batch result and download data
         :param token: Batch token received from get_vies_data_async function
         :type token: string
+        :param partial: return numbers already processed while batch is still processing, such result
+            has complete set to False and last error code is Error.BATCH_PROCESSING
+        :type partial: bool
         :return: Batch result
         :rtype: BatchResult or False
         """
@@ -273,110 +274,106 @@ class VIESAPIClient:
         url = self.__url__ + '/batch/vies/' + token
 
         # send request
-        doc = self.__get(url)
+        if self.__bulk__ is not None and not partial:
+            br = self.__get_batch_result_bulk(url)
+        else:
+            doc = self.__get(url, (Error.BATCH_PROCESSING,) if partial else ())
+            br = self.__parser(doc).batch_result(doc) if doc else False
 
-        if not doc:
+        if not br:
             return False
 
-        # parse response
-        br = BatchResult()
+        br.complete = self.__state__.errcode != Error.BATCH_PROCESSING
 
-        for i in itertools.count(start=1):
-            uid = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/uid/text()')
+        if self.__negative__ is not None:
+            for vies in br.numbers:
+                if vies.valid is False:
+                    self.__negative__.put(vies.country_code + vies.vat_number, vies)
 
-            if len(uid) == 0:
-                break
+        return self.__end(br)
 
-            vd = VIESData()
-            vd.uid = uid
-            vd.country_code = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/countryCode/text()')
-            vd.vat_number = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/vatNumber/text()')
-            vd.valid = True if self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/valid/text()') == 'true' else False
-            vd.trader_name = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/traderName/text()')
-            vd.trader_company_type = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/traderCompanyType/text()')
-            vd.trader_address = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/traderAddress/text()')
-            vd.id = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/id/text()')
-            vd.date = self.__get_date(doc, '/result/batch/numbers/vies[' + str(i) + ']/date/text()')
-            vd.source = self.__get_text(doc, '/result/batch/numbers/vies[' + str(i) + ']/source/text()')
+    def __get_batch_result_bulk(self, url):
+        """
+        Download batch result and parse it in bulk validator worker process
+        :param url: batch result URL
+        :type url: str
+        :return: batch result or False
+        :rtype: BatchResult or False
+        """
 
-            br.numbers.append(vd)
+        data = self.__request('GET', url, raw=True)
 
-        for i in itertools.count(start=1):
-            uid = self.__get_text(doc, '/result/batch/errors/error[' + str(i) + ']/uid/text()')
+        if not data:
+            return False
 
-            if len(uid) == 0:
-                break
+        br = self.__bulk__.parse_batch_results([data])[0]
 
-            ve = VIESError()
-            ve.uid = uid
-            ve.country_code = self.__get_text(doc, '/result/batch/errors/error[' + str(i) + ']/countryCode/text()')
-            ve.vat_number = self.__get_text(doc, '/result/batch/errors/error[' + str(i) + ']/vatNumber/text()')
-            ve.error = self.__get_text(doc, '/result/batch/errors/error[' + str(i) + ']/error/text()')
-            ve.date = self.__get_date(doc, '/result/batch/errors/error[' + str(i) + ']/date/text()')
-            ve.source = self.__get_text(doc, '/result/batch/errors/error[' + str(i) + ']/source/text()')
+        if isinstance(br, tuple):
+            self.__set(br[0], br[1])
+            return self.__end(False)
 
-            br.errors.append(ve)
+        if self.__state__.timing:
+            self.__state__.timing.mark('parse')
 
         return br
 
     def get_account_status(self):
         """
-        Get user account's status
+        Get user account's status, cached status with locally counted requests is returned if quota tracker is set
         :return: AccountStatus object or False
         :rtype: AccountStatus or False
         """
 
-        # clear error
+        if self.__quota__ is None:
+            return self.__get_account_status()
+
         self.__clear()
 
-        # prepare url
-        url = self.__url__ + '/check/account/status'
+        return self.__quota__.status(self.__get_account_status)
 
-        # send request
-        doc = self.__get(url)
+    def warmup(self, connections=1):
+        """
+        Resolve service host and open pooled connections in advance, so first requests after start
+        do not pay DNS resolution and TCP and TLS setup, resolved addresses are cached from then on
+        unless caching was disabled in transport
+        :param connections: number of connections to open, limited by idle pool size of transport
+        :type connections: int
+        :return: True on success or False on error
+        :rtype: bool
+        """
 
-        if not doc:
+        self.__clear()
+
+        try:
+            self.__transport__.warmup(self.__url__, connections)
+        except Exception as e:
+            self.__set(Error.CLI_CONNECT, str(e))
             return False
 
-        # parse response
-        status = AccountStatus()
-
-        status.uid = self.__get_text(doc, '/result/account/uid/text()')
-        status.type = self.__get_text(doc, '/result/account/type/text()')
-        status.valid_to = self.__get_date_time(doc, '/result/account/validTo/text()')
-        status.billing_plan_name = self.__get_text(doc, '/result/account/billingPlan/name/text()')
-
-        status.subscription_price = float(
-            '0' + self.__get_text(doc, '/result/account/billingPlan/subscriptionPrice/text()'))
-        status.item_price = float('0' + self.__get_text(doc, '/result/account/billingPlan/itemPrice/text()'))
-        status.item_price_status = float(
-            '0' + self.__get_text(doc, '/result/account/billingPlan/itemPriceCheckStatus/text()'))
-        status.item_price_parsed = float(
-            '0' + self.__get_text(doc, '/result/account/billingPlan/itemPriceStatusParsed/text()'))
-
-        status.limit = int(self.__get_text(doc, '/result/account/billingPlan/limit/text()'))
-        status.request_delay = int(self.__get_text(doc, '/result/account/billingPlan/requestDelay/text()'))
-        status.domain_limit = int(self.__get_text(doc, '/result/account/billingPlan/domainLimit/text()'))
-        status.over_plan_allowed = True if self.__get_text(doc,
-                                                         '/result/account/billingPlan/overplanAllowed/text()') == 'true' else False
-        status.excel_addin = True if self.__get_text(doc,
-                                                    '/result/account/billingPlan/excelAddin/text()') == 'true' else False
-
-        status.app = True if self.__get_text(doc, '/result/account/billingPlan/app/text()') == 'true' else False
-        status.cli = True if self.__get_text(doc, '/result/account/billingPlan/cli/text()') == 'true' else False
-        status.stats = True if self.__get_text(doc, '/result/account/billingPlan/stats/text()') == 'true' else False
-        status.monitor = True if self.__get_text(doc, '/result/account/billingPlan/monitor/text()') == 'true' else False
-
-        status.func_get_vies_data = True if self.__get_text(doc,
-                                                         '/result/account/billingPlan/funcGetVIESData/text()') == 'true' else False
-        status.func_get_vies_data_parsed = True if self.__get_text(doc,
-                                                         '/result/account/billingPlan/funcGetVIESDataParsed/text()') == 'true' else False
-
-        status.vies_data_count = int(self.__get_text(doc, '/result/account/requests/viesData/text()'))
-        status.vies_data_parsed_count = int(self.__get_text(doc, '/result/account/requests/viesDataParsed/text()'))
-        status.total_count = int(self.__get_text(doc, '/result/account/requests/total/text()'))
-
-        return status
+        return True
+
+    async def warmup_async(self, connections=1):
+        """
+        Asynchronously resolve service host and open pooled connections in advance,
+        connections are opened from default executor so event loop is not blocked
+        :param connections: number of connections to open, limited by idle pool size of transport
+        :type connections: int
+        :return: True on success or False on error
+        :rtype: bool
+        """
+
+        import asyncio
+
+        self.__clear()
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.__transport__.warmup, self.__url__,
+                                                             connections)
+        except Exception as e:
+            self.__set(Error.CLI_CONNECT, str(e))
+            return False
+
+        return True
 
     def get_last_error_code(self):
         """
@@ -385,7 +382,16 @@ class VIESAPIClient:
         :rtype: int
         """
 
-        return self.__errcode__
+        return self.__state__.errcode
+
+    def get_last_timing(self):
+        """
+        Get phase timings of last sent request
+        :return: timing object or None
+        :rtype: RequestTiming or None
+        """
+
+        return self.__state__.last_timing
 
     def get_last_error(self):
         """
@@ -394,15 +400,329 @@ class VIESAPIClient:
         :rtype: str
         """
 
-        return self.__err__
+        return self.__state__.err
+
+    def __get_account_status(self):
+        """
+        Download user account's status
+        :return: AccountStatus object or False
+        :rtype: AccountStatus or False
+        """
+
+        # clear error
+        self.__clear()
+
+        # prepare url
+        url = self.__url__ + '/check/account/status'
+
+        # send request
+        doc = self.__get(url)
+
+        if not doc:
+            return False
+
+        # parse response
+        status = self.__parser(doc).account_status(doc)
+
+        if not status:
+            self.__set(Error.CLI_RESPONSE)
+            return self.__end(False)
+
+        return self.__end(status)
+
+    def __get_vies_data(self, euvat, parsed):
+        """
+        Download VIES data for specified number
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :param parsed: get data with parsed trader name and address
+        :type parsed: bool
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        # validate number and construct path
+        suffix = self.__get_path_suffix(Number.EUVAT, euvat)
+
+        if not suffix:
+            return False
+
+        if not self.__acquire(1, parsed):
+            return False
+
+        # prepare url
+        url = self.__url__ + ('/get/vies/parsed/' if parsed else '/get/vies/') + suffix
+
+        # send request
+        doc = self.__get(url)
+
+        if not doc:
+            return False
+
+        # parse response
+        vies = self.__parser(doc).vies_data(doc)
+
+        if not vies:
+            self.__set(Error.CLI_RESPONSE)
+            return self.__end(False)
+
+        return self.__end(vies)
+
+    def __get_cached_vies_data(self, euvat, parsed):
+        """
+        Get VIES data from cache or download it
+        :param euvat: EU VAT number with 2-letter country prefix
+        :type euvat: str
+        :param parsed: get data with parsed trader name and address
+        :type parsed: bool
+        :return: VIESData object or False
+        :rtype: VIESData or False
+        """
+
+        # clear error
+        self.__clear()
+
+        cache = self.__cache__
+        negative = self.__negative__
+
+        if cache is None and negative is None:
+            return self.__get_vies_data(euvat, parsed)
+
+        number = EUVAT.validate(euvat)
+
+        if not number:
+            self.__set(Error.CLI_EUVAT)
+            return False
+
+        if negative is not None:
+            invalid = negative.get(number)
+
+            if invalid is not None:
+                self.__instrumentation__.on_cache_hit('invalid/' + number)
+
+                if isinstance(invalid, VIESData):
+                    return copy.copy(invalid)
+
+                self.__set(invalid[0], invalid[1])
+                return False
+
+            if cache is None:
+                return self.__remember_invalid(number, self.__get_vies_data(number, parsed))
+
+        key = ('parsed/' if parsed else 'vies/') + number
+        entry = cache.get(key)
+
+        if entry and cache.is_fresh(entry):
+            if cache.needs_refresh(entry):
+                cache.schedule(key, entry, (number, parsed), self.__refresh)
+
+            self.__instrumentation__.on_cache_hit(key)
+            return self.__cached_result(entry)
+
+        if entry and cache.stale_while_revalidate:
+            cache.refresh(key, entry, lambda: self.__refresh_one(key, number, parsed))
+            self.__instrumentation__.on_cache_hit(key)
+            return self.__cached_result(entry)
+
+        vies = self.__remember_invalid(number, self.__get_vies_data(number, parsed))
+
+        if vies:
+            # invalid numbers are kept by negative cache for its own ttl
+            if negative is None or vies.valid is not False:
+                cache.put(key, vies)
+
+            return vies
+
+        if entry and cache.stale_if_error and self.__state__.errcode in self.STALE_IF_ERROR:
+            # service is unavailable, last known data is returned and error info is kept
+            self.__instrumentation__.on_cache_hit(key)
+            return self.__cached_result(entry)
+
+        return False
+
+    def __remember_invalid(self, number, vies):
+        """
+        Store result in negative cache if it shows the number is invalid
+        :param number: normalized EU VAT number
+        :type number: str
+        :param vies: lookup result
+        :type vies: VIESData or False
+        :return: lookup result
+        :rtype: VIESData or False
+        """
+
+        if self.__negative__ is not None:
+            self.__negative__.put(number, vies if vies else (self.__state__.errcode, self.__state__.err))
+
+        return vies
+
+    def __refresh(self, items):
+        """
+        Download VIES data of cache entries refreshed ahead of expiry, sending
+        numbers without parsed data as batches
+        :param items: list of (cache key, (number, parsed)) tuples
+        :type items: list
+        :return: VIESData objects by cache key
+        :rtype: dict
+        """
+
+        client = self.__clone()
+        values = {}
+        keys = {}
+
+        for key, (number, parsed) in items:
+            if parsed:
+                values[key] = self.__refreshed(client, key, number, client.__get_vies_data(number, True))
+            else:
+                keys[number] = key
+
+        numbers = list(keys)
+
+        for i in range(0, len(numbers), 99):
+            chunk = numbers[i:i + 99]
+
+            if len(chunk) == 1:
+                values[keys[chunk[0]]] = self.__refreshed(client, keys[chunk[0]], chunk[0],
+                                                          client.__get_vies_data(chunk[0], False))
+                continue
+
+            br = client.__get_batch_result(chunk)
+
+            if br:
+                for vd in br.numbers:
+                    number = vd.country_code + vd.vat_number
+                    key = keys.get(number)
+
+                    if key:
+                        values[key] = self.__refreshed(client, key, number, vd)
+
+        return values
+
+    def __refresh_one(self, key, number, parsed):
+        """
+        Download VIES data of stale cache entry
+        :param key: cache key
+        :type key: str
+        :param number: normalized EU VAT number
+        :type number: str
+        :param parsed: get data with parsed trader name and address
+        :type parsed: bool
+        :return: VIESData object to cache or False
+        :rtype: VIESData or False
+        """
+
+        client = self.__clone()
+
+        return self.__refreshed(client, key, number, client.__get_vies_data(number, parsed))
+
+    def __refreshed(self, client, key, number, vies):
+        """
+        Pass refreshed result through negative cache like results of get_vies_data
+        :param client: client which downloaded result, holds its error info
+        :type client: VIESAPIClient
+        :param key: cache key
+        :type key: str
+        :param number: normalized EU VAT number
+        :type number: str
+        :param vies: lookup result
+        :type vies: VIESData or False
+        :return: VIESData object to cache or False if there is nothing to cache
+        :rtype: VIESData or False
+        """
+
+        vies = client.__remember_invalid(number, vies)
+
+        if vies and vies.valid is False and self.__negative__ is not None:
+            # invalid numbers are kept by negative cache for its own ttl
+            self.__cache__.invalidate(key)
+            return False
+
+        return vies
+
+    def __get_batch_result(self, numbers):
+        """
+        Upload batch and wait for its result at most REFRESH_TIMEOUT seconds
+        :param numbers: EU VAT numbers
+        :type numbers: list
+        :return: batch result or False
+        :rtype: BatchResult or False
+        """
+
+        from viesapi.batchpoller import BatchPoller
+
+        poller = BatchPoller(self)
+        token = poller.submit(numbers)
+
+        if not token:
+            return False
+
+        return poller.wait(token, timeout=self.REFRESH_TIMEOUT)
+
+    def __cached_result(self, entry):
+        """
+        Get copy of cached VIES data marked with its age
+        :param entry: cache entry
+        :type entry: CacheEntry
+        :return: VIESData object
+        :rtype: VIESData
+        """
+
+        vies = copy.copy(entry.value)
+        vies.age = self.__cache__.age(entry)
+        vies.stale = not self.__cache__.is_fresh(entry)
+
+        return vies
+
+    def __clone(self):
+        """
+        Create client with the same configuration, used by background tasks
+        so they do not overwrite error info of this client
+        :return: client object
+        :rtype: VIESAPIClient
+        """
+
+        c = VIESAPIClient()
+        c.__url__ = self.__url__
+        c.__id__ = self.__id__
+        c.__key__ = self.__key__
+        c.__transport__ = self.__transport__
+        c.__format__ = self.__format__
+        c.__quota__ = self.__quota__
+        c.__negative__ = self.__negative__
+        c.__bulk__ = self.__bulk__
+        c.__instrumentation__ = self.__instrumentation__
+
+        return c
+
+    def __acquire(self, cost, parsed):
+        """
+        Count requests in quota tracker, status is downloaded by separate client so error info of this one is kept
+        :param cost: number of requests
+        :type cost: int
+        :param parsed: requests get parsed VIES data
+        :type parsed: bool
+        :return: True if requests can be sent
+        :rtype: bool
+        """
+
+        if self.__quota__ is None:
+            return True
+
+        error = self.__quota__.acquire(cost, parsed, lambda: self.__clone().__get_account_status())
+
+        if error:
+            self.__set(error[0], error[1])
+            return False
+
+        return True
 
     def __clear(self):
         """
         Clear error info
         """
 
-        self.__errcode__ = 0
-        self.__err__ = ''
+        self.__state__.errcode = 0
+        self.__state__.err = ''
 
     def __set(self, code, err=None):
         """
@@ -413,8 +733,10 @@ class VIESAPIClient:
         :type err: str
         """
 
-        self.__errcode__ = code
-        self.__err__ = err if err else Error.message(code)
+        self.__state__.errcode = code
+        self.__state__.err = err if err else Error.message(code)
+
+        self.__instrumentation__.on_error(code, self.__state__.err)
 
     def __auth(self, method, url):
         """
@@ -463,63 +785,55 @@ class VIESAPIClient:
         return 'VIESAPIClient/' + self.VERSION + ' Python/' + str(sys.version_info[0]) \
             + '.' + str(sys.version_info[1]) + '.' + str(sys.version_info[2])
 
-    def __parse(self, data):
+    def __parse(self, data, type=None, accept=()):
         """
         Parse HTTP response
         :param data: response data
         :type data: Any
-        :returns: XML document or False
-        :rtype: ElementTree or False
+        :param type: response content type
+        :type type: str
+        :param accept: error codes for which document is returned after error info is set
+        :type accept: tuple
+        :returns: XML or JSON document or False
+        :rtype: ElementTree or dict or False
         """
         try:
-            doc = etree.parse(BytesIO(data))
+            parser = JSONResponseParser if type and type.startswith(self.FORMAT_JSON) else ResponseParser
+
+            doc = parser.parse(data)
 
             if not doc:
                 self.__set(Error.CLI_RESPONSE)
                 return False
 
-            code = self.__get_text(doc, '/result/error/code/text()')
+            error = parser.error(doc)
 
-            if len(code) > 0:
-                self.__set(int(code), self.__get_text(doc, '/result/error/description/text()'))
-                return False
+            if error:
+                self.__set(error[0], error[1])
+
+                if error[0] not in accept:
+                    return False
+
+            if self.__state__.timing:
+                self.__state__.timing.mark('parse')
 
             return doc
         except Exception as e:
             self.__set(Error.CLI_EXCEPTION, str(e))
         return False
 
-    def __get(self, url):
+    def __get(self, url, accept=()):
         """
         Get result of HTTP GET request
         :param url: target URL
         :type url: str
+        :param accept: error codes for which document is returned after error info is set
+        :type accept: tuple
         :returns: result as XML document
         :rtype: ElementTree or False
         """
 
-        # auth
-        auth = self.__auth('GET', url)
-
-        if not auth:
-            return False
-
-        # send request
-        try:
-            req = urllib.request.Request(url)
-            req.add_header('Accept', 'text/xml')
-            req.add_header('Authorization', auth)
-            req.add_header('User-Agent', self.__user_agent())
-
-            res = urllib.request.urlopen(req)
-
-            return self.__parse(res.read())
-        except urllib.error.HTTPError as he:
-            if self.__parse(he.read()):
-                self.__set(Error.CLI_EXCEPTION, he.reason)
-        except urllib.error.URLError as ue:
-            self.__set(Error.CLI_EXCEPTION, ue.reason)
-        return False
+        return self.__request('GET', url, accept=accept)
 
     def __post(self, url, type, content):
         """
@@ -527,102 +841,126 @@ class VIESAPIClient:
         :param url: target URL
         :type url: str
         :param type: content type
-        :type url: str
-        :param url: content bytes
-        :type url: str
+        :type type: str
+        :param content: content string or bytes
+        :type content: str or bytes
         :returns: result as XML document
         :rtype: ElementTree or False
         """
 
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        return self.__request('POST', url, type, content)
+
+    def __request(self, method, url, type=None, content=None, accept=(), raw=False):
+        """
+        Send HTTP request and parse its result
+        :param method: HTTP method
+        :type method: str
+        :param url: target URL
+        :type url: str
+        :param type: content type
+        :type type: str
+        :param content: content bytes
+        :type content: bytes
+        :param accept: error codes for which document is returned after error info is set
+        :type accept: tuple
+        :param raw: return body of successful response without parsing it, error responses are still parsed
+        :type raw: bool
+        :returns: result as XML or JSON document, raw body or False
+        :rtype: ElementTree or dict or bytes or False
+        """
+
         # auth
-        auth = self.__auth('POST', url)
+        auth = self.__auth(method, url)
 
         if not auth:
             return False
 
+        headers = {
+            'Accept': self.__accept(),
+            'Authorization': auth,
+            'User-Agent': self.__user_agent()
+        }
+
+        if type:
+            headers['Content-Type'] = type
+
+        timing = RequestTiming(method, url)
+        self.__state__.timing = timing
+        self.__instrumentation__.on_request_start(timing)
+
         # send request
         try:
-            req = urllib.request.Request(url)
-            req.add_header('Accept', 'text/xml')
-            req.add_header('Authorization', auth)
-            req.add_header('Content-Type', type)
-            req.add_header('User-Agent', self.__user_agent())
-            req.data = content.encode('utf-8')
-
-            res = urllib.request.urlopen(req)
-
-            return self.__parse(res.read())
-        except urllib.error.HTTPError as he:
-            if self.__parse(he.read()):
-                self.__set(Error.CLI_EXCEPTION, he.reason)
-        except urllib.error.URLError as ue:
-            self.__set(Error.CLI_EXCEPTION, ue.reason)
-        return False
+            res = self.__transport__.request(method, url, headers, content, timing)
+        except Exception as e:
+            self.__set(Error.CLI_EXCEPTION, str(e))
+            return self.__end(False)
 
-    def __get_text(self, doc, xpath):
-        """
-        Get XML element as text
-        :param doc: etree document
-        :type doc: tree
-        :param xpath: xpath string
-        :type xpath: string
-        :return: string
-        :rtype: str
-        """
+        timing.status = res.status
+
+        if raw and res.status < 400:
+            return res.body
 
-        s = doc.xpath(xpath)
+        doc = self.__parse(res.body, res.headers.get('Content-Type'), accept)
 
-        if not s:
-            return ''
+        if doc and res.status >= 400 and not self.__state__.errcode:
+            self.__set(Error.CLI_EXCEPTION, res.reason)
+            return self.__end(False)
 
-        if len(s) != 1:
-            return ''
+        if not doc:
+            return self.__end(False)
 
-        return str(s[0].strip())
+        return doc
 
-    def __get_date_time(self, doc, xpath):
+    def __accept(self):
         """
-        Get XML element as date time object
-        :param doc: etree document
-        :type doc: tree
-        :param xpath: xpath string
-        :type xpath: string
-        :return: datetime
-        :rtype: datetime or None
+        Prepare accept header content
+        :return: accept header content
+        :rtype: str
         """
 
-        s = self.__get_text(doc, xpath)
+        if self.__format__ == self.FORMAT_JSON:
+            return self.FORMAT_JSON + ', ' + self.FORMAT_XML + ';q=0.5'
+
+        return self.FORMAT_XML
 
-        if len(s) == 0:
-            return None
+    def __parser(self, doc):
+        """
+        Get parser mapping specified document
+        :param doc: XML or JSON document
+        :type doc: ElementTree or dict
+        :return: parser class
+        :rtype: type
+        """
 
-        return parse(s)
+        return JSONResponseParser if isinstance(doc, dict) else ResponseParser
 
-    def __get_date(self, doc, xpath):
+    def __end(self, result):
         """
-        Get XML element as date object
-        :param doc: etree document
-        :type doc: tree
-        :param xpath: xpath string
-        :type xpath: string
-        :return: datetime
-        :rtype: datetime or None
+        Finish timing of current request and notify instrumentation
+        :param result: value returned to the caller
+        :type result: Any
+        :return: result
+        :rtype: Any
         """
 
-        s = self.__get_text(doc, xpath)
+        timing = self.__state__.timing
+
+        if not timing:
+            return result
 
-        sl = len(s)
+        self.__state__.timing = None
 
-        if sl == 0:
-            return None
-        elif sl == 11:
-            # dateutil does not support xsd:date type in form YYYY-MM-DDZ
-            s = s[0:10] + 'T00:00:00Z'
-        elif sl == 16:
-            # dateutil does not support xsd:date type in form YYYY-MM-DD+00:00
-            s = s[0:10] + 'T00:00:00' + s[10:]
+        if result:
+            timing.mark('map')
 
-        return parse(s)
+        timing.error_code = self.__state__.errcode
+        self.__state__.last_timing = timing
+        self.__instrumentation__.on_request_end(timing)
+
+        return result
 
     def __get_path_suffix(self, type, number):
         """
@@ -642,11 +980,13 @@ class VIESAPIClient:
 
             path = 'nip/' + NIP.normalize(number)
         elif type == Number.EUVAT:
-            if not EUVAT.is_valid(number):
+            number = EUVAT.validate(number)
+
+            if not number:
                 self.__set(Error.CLI_EUVAT)
                 return False
 
-            path = 'euvat/' + EUVAT.normalize(number)
+            path = 'euvat/' + number
         else:
             self.__set(Error.CLI_NUMBER)
             return False
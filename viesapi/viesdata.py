@@ -20,12 +20,18 @@
 # @license https://www.apache.org/licenses/LICENSE-2.0
 #
 
+import hashlib
+
 
 class VIESData:
     """
     VIES data
     """
 
+    # fields describing the trader, per-request fields (uid, id, date, source) are not compared
+    CONTENT_FIELDS = ('country_code', 'vat_number', 'valid', 'trader_name', 'trader_name_components',
+                      'trader_company_type', 'trader_address', 'trader_address_components')
+
     def __init__(self):
         self.uid = None
         self.country_code = None
@@ -39,6 +45,8 @@ class VIESData:
         self.id = None
         self.date = None
         self.source = None
+        self.stale = False
+        self.age = None
 
     def __str__(self):
         return 'VIESData: [uid = ' + str(self.uid) \
@@ -53,4 +61,64 @@ class VIESData:
             + ', id = ' + str(self.id) \
             + ', date = ' + str(self.date) \
             + ', source = ' + str(self.source) \
+            + ', stale = ' + str(self.stale) \
+            + ', age = ' + str(self.age) \
             + ']'
+
+    def content_hash(self, fields=CONTENT_FIELDS):
+        """
+        Get stable hash of trader data, equal for records describing the same trader state
+        :param fields: compared field names
+        :type fields: tuple
+        :return: hex digest
+        :rtype: str
+        """
+
+        h = hashlib.blake2b(digest_size=16)
+
+        for f in fields:
+            h.update(VIESData.__value(getattr(self, f)).encode())
+            h.update(b'\x1f')
+
+        return h.hexdigest()
+
+    def diff(self, other, fields=CONTENT_FIELDS):
+        """
+        Compare trader data with other record
+        :param other: previous VIESData object
+        :type other: VIESData
+        :param fields: compared field names
+        :type fields: tuple
+        :return: changed fields mapped to (previous, current) value tuples
+        :rtype: dict
+        """
+
+        changes = {}
+
+        for f in fields:
+            old = getattr(other, f) if other else None
+            new = getattr(self, f)
+
+            if VIESData.__value(old) != VIESData.__value(new):
+                changes[f] = (old, new)
+
+        return changes
+
+    @staticmethod
+    def __value(v):
+        """
+        Get comparable string form of field value
+        :param v: field value
+        :type v: Any
+        :return: string
+        :rtype: str
+        """
+
+        if v is None:
+            return ''
+
+        if hasattr(v, '__dict__'):
+            # name and address components
+            return '\x1e'.join(VIESData.__value(x) for x in v.__dict__.values())
+
+        return str(v)